@@ -1,21 +1,16 @@
 # app/api/admin/bulk_uploads.py
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from app.db.session import get_db
 from app.core.dependencies import get_current_user
 from app.models.project import Project
 from app.models.user import User, UserRole
+from app.services.dashboard_service import invalidate_dashboard_stats
 import csv
 import io
 
 router = APIRouter(prefix="/admin/bulk_uploads", tags=["Admin - BulkUploads"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 # For now kept the format for writing a CSV
 # email, name, role, date_of_joining, soul_id, work_role
@@ -164,6 +159,7 @@ async def bulk_upload_users(
     if insert_list:
         db.bulk_save_objects(insert_list)
         db.commit()
+        invalidate_dashboard_stats()
 
     return {
         "inserted": len(insert_list),
@@ -267,6 +263,7 @@ async def bulk_upload_projects(
     if insert_list:
         db.bulk_save_objects(insert_list)
         db.commit()
+        invalidate_dashboard_stats()
 
     return {
         "inserted": len(insert_list),
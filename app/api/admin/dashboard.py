@@ -1,111 +1,172 @@
 # app/api/admin/dashboard.py
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+import asyncio
+import json
 from datetime import date, datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, get_db, get_async_read_db
 from app.models.user import User
 from app.models.project import Project
 from app.models.history import TimeHistory
 from app.schemas.dashboard import (
     GlobalStatsResponse, 
     LiveWorkerResponse, 
-    PendingApprovalResponse
+    PendingApprovalResponse,
+    PendingApprovalPage,
 )
 from app.core.dependencies import get_current_user
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, after_cursor, decode_cursor, encode_cursor
+from app.services import dashboard_service
+from app.services.live_workers import (
+    LIVE_STREAM_HEARTBEAT_SECONDS,
+    RESYNC,
+    live_worker_bus,
+    open_sessions_query,
+    to_live_worker,
+)
 
 # Define the Router
 router = APIRouter(prefix="/admin/dashboard", tags=["Admin - Dashboard"])
 
-# Database Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 @router.get("/stats", response_model=GlobalStatsResponse)
-def get_global_stats(db: Session = Depends(get_db)):
+def get_global_stats():
     """
     Returns the high-level metrics for the top of the dashboard.
+    Computed in one query and shared by every caller for a few seconds
+    (see dashboard_service); clock-outs and project edits refresh it.
     """
-    # 1. Count Total Users
-    total_users = db.query(User).count()
-
-    # 2. Count Active Projects
-    active_projects = db.query(Project).filter(Project.is_active == True).count()
-
-    # 3. Sum Hours Worked Today
-    today_minutes = db.query(func.sum(TimeHistory.minutes_worked)).filter(
-        TimeHistory.sheet_date == date.today()
-    ).scalar() or 0  # .scalar() handles the case where no work happened yet
-    
-    total_hours = round(today_minutes / 60, 1)
-    active_projects_query = db.query(Project.name).filter(Project.is_active == True).all()
-    
-    
-
-  
-    active_names = [row.name for row in active_projects_query]
-
-    return GlobalStatsResponse(
-        total_users=total_users,
-        active_projects=active_projects,
-        total_hours_today=total_hours,
-        active_project_names=active_names
-       
-    )
+    return dashboard_service.get_global_stats()
 
 @router.get("/live", response_model=list[LiveWorkerResponse])
-def get_live_workers(db: Session = Depends(get_db)):
+async def get_live_workers(db: AsyncSession = Depends(get_async_read_db)):
     """
     Returns a list of users who have Clocked In but NOT Clocked Out.
+    Pages that stay open should use /live/stream instead of polling this.
     """
-    # Find active sessions (Clock Out is None)
-    active_sessions = db.query(TimeHistory).filter(
-        TimeHistory.clock_out_at == None
-    ).all()
+    active_sessions = (await db.execute(open_sessions_query())).all()
+    return [to_live_worker(session) for session in active_sessions]
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _live_snapshot() -> str:
+    # From the primary: a lagging replica could miss a clock-in whose
+    # notification was sent before the stream subscribed
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(open_sessions_query())).all()
+    return _sse("snapshot", json.dumps(jsonable_encoder([to_live_worker(row) for row in rows])))
 
-    results = []
-    now = datetime.now()
-
-    for session in active_sessions:
-        # Calculate how long they have been running (in minutes)
-        duration = 0
-        if session.clock_in_at:
-            # Simple difference between NOW and Start Time
-            delta = now - session.clock_in_at
-            duration = int(delta.total_seconds() / 60)
-
-        results.append(LiveWorkerResponse(
-            user_id=session.user_id,
-            user_name=session.user.name if session.user else "Unknown",
-            project_name=session.project.name if session.project else "Unknown",
-            work_role=session.work_role,
-            clock_in_time=session.clock_in_at,
-            current_duration_minutes=duration
-        ))
 
-    return results
+async def _live_events(request: Request):
+    async with live_worker_bus.subscribe() as subscriber:
+        yield await _live_snapshot()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), LIVE_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
 
+            if event is RESYNC:
+                yield await _live_snapshot()
+            else:
+                name, data = event
+                yield _sse(name, json.dumps(data))
 
-@router.get("/pending-approvals", response_model=list[PendingApprovalResponse])
+
+@router.get("/live/stream")
+async def stream_live_workers(request: Request):
+    """
+    Server-sent events: a `snapshot` event with the same list as /live,
+    then `clock_in` (one LiveWorkerResponse) and `clock_out` ({"user_id"})
+    events as they are committed. A user has at most one open session, so
+    clients key the list by user_id. Another `snapshot` replaces the list
+    whenever deltas may have been lost (slow client, reconnect).
+    """
+    return StreamingResponse(
+        _live_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/pending-approvals", response_model=PendingApprovalPage)
 def get_pending_approvals(
+    project_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Returns completed sessions that are waiting for manager approval.
+    Returns completed sessions that are waiting for manager approval,
+    newest clock-in first, one page at a time. Pass the previous page's
+    `next_cursor` as `cursor` for the next one; `total` counts every
+    match of the filters (start_date/end_date bound sheet_date).
+    Stays on the primary: the list is re-read right after each approval.
     """
-    pending_items = db.query(TimeHistory).filter(
-        TimeHistory.status == "PENDING",
-        TimeHistory.clock_out_at != None
-    ).order_by(TimeHistory.clock_in_at.desc()).all()
-    
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    filters = [TimeHistory.status == "PENDING", TimeHistory.clock_out_at != None]
+    if project_id:
+        filters.append(TimeHistory.project_id == project_id)
+    if user_id:
+        filters.append(TimeHistory.user_id == user_id)
+    if start_date:
+        filters.append(TimeHistory.sheet_date >= start_date)
+    if end_date:
+        filters.append(TimeHistory.sheet_date <= end_date)
+
+    total = db.scalar(select(func.count()).select_from(TimeHistory).where(*filters))
+
+    sort_key = (TimeHistory.clock_in_at, TimeHistory.id)
+    after = decode_cursor(cursor, datetime, UUID)
+    page_filters = filters + [after_cursor(sort_key, after)] if after else filters
+
+    # One extra row tells whether there is a next page
+    rows = db.execute(
+        select(
+            TimeHistory.id,
+            TimeHistory.work_role,
+            TimeHistory.sheet_date,
+            TimeHistory.clock_in_at,
+            TimeHistory.clock_out_at,
+            TimeHistory.tasks_completed,
+            TimeHistory.minutes_worked,
+            User.name.label("user_name"),
+            Project.name.label("project_name"),
+        )
+        .outerjoin(User, User.id == TimeHistory.user_id)
+        .outerjoin(Project, Project.id == TimeHistory.project_id)
+        .where(*page_filters)
+        .order_by(TimeHistory.clock_in_at.desc(), TimeHistory.id.desc())
+        .limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].clock_in_at, rows[-1].id)
+
     results = []
-    for item in pending_items:
+    for item in rows:
         # Calculate Duration from stored minutes or timestamps
         duration = 0.0
         if item.minutes_worked:
@@ -115,8 +176,8 @@ def get_pending_approvals(
 
         results.append(PendingApprovalResponse(
             history_id=item.id,
-            user_name=item.user.name if item.user else "Unknown",
-            project_name=item.project.name if item.project else "Unknown",
+            user_name=item.user_name or "Unknown",
+            project_name=item.project_name or "Unknown",
             work_role=item.work_role,
             sheet_date=item.sheet_date,
             clock_in=item.clock_in_at,
@@ -124,5 +185,5 @@ def get_pending_approvals(
             tasks_completed=item.tasks_completed,
             duration_minutes=round(duration, 1)
         ))
-        
-    return results
+
+    return PendingApprovalPage(items=results, total=total, next_cursor=next_cursor)
@@ -2,9 +2,12 @@ from datetime import date
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from app.core.dependencies import get_current_user, get_db
+from app.core.dependencies import get_current_user_async
+from app.db.session import get_async_read_db
 from app.models.project_members import ProjectMember
 from app.models.user import User
 from app.models.attendance_daily import AttendanceDaily
@@ -17,13 +20,13 @@ router = APIRouter(
 
 
 @router.get("/")
-def project_resource_allocation(
+async def project_resource_allocation(
     project_id: str = Query(..., description="Project UUID"),
     target_date: date = Query(date.today()),
     only_active: bool = Query(True),
     only_pm_apm: bool = Query(False),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """
     Returns resource allocation snapshot for a project on a given date.
@@ -38,13 +41,14 @@ def project_resource_allocation(
     Manager = aliased(User)
 
     query = (
-        db.query(
+        select(
             ProjectMember,
             User,
             Manager,
             AttendanceDaily,
             Shift,
         )
+        .select_from(ProjectMember)
         .join(User, ProjectMember.user_id == User.id)
         .outerjoin(Manager, User.rpm_user_id == Manager.id)
         .outerjoin(
@@ -54,16 +58,16 @@ def project_resource_allocation(
         )
         # ✅ FIX: shift comes from USER, not project_member
         .outerjoin(Shift, User.default_shift_id == Shift.id)
-        .filter(ProjectMember.project_id == project_id)
+        .where(ProjectMember.project_id == project_id)
     )
 
     if only_active:
-        query = query.filter(ProjectMember.is_active.is_(True))
+        query = query.where(ProjectMember.is_active.is_(True))
 
     if only_pm_apm:
-        query = query.filter(User.role.in_(["PM", "APM"]))
+        query = query.where(User.role.in_(["PM", "APM"]))
 
-    rows = query.all()
+    rows = (await db.execute(query)).all()
 
     result = []
 
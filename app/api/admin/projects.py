@@ -4,10 +4,11 @@ from sqlalchemy import or_
 from typing import Optional
 from uuid import UUID
 from datetime import date
-from app.db.session import SessionLocal
+from app.db.session import get_db
 from app.models.project import Project
 from app.schemas.project import ProjectCreate, ProjectResponse
 from app.schemas.project import ProjectMemberDetail
+from app.services.dashboard_service import invalidate_dashboard_stats
 # --- IMPORTS FOR PROJECT OWNERS (MANAGERS) ---
 from app.models.project_owners import ProjectOwner
 from app.schemas.project_owners import OwnerAssign, OwnerResponse
@@ -22,12 +23,6 @@ class MemberRoleUpdate(BaseModel):
     work_role: str
 router = APIRouter(prefix="/admin/projects", tags=["Admin - Projects"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 # ==========================================
 #              CORE PROJECT APIs
@@ -135,6 +130,7 @@ def create_project(payload: ProjectCreate, db: Session = Depends(get_db)):
     )
     db.add(project)
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(project)
     return project
 
@@ -177,6 +173,7 @@ def update_project(
     project.end_date = payload.end_date
 
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(project)
     return project
 
@@ -193,6 +190,7 @@ def deactivate_project(
 
     project.is_active = False
     db.commit()
+    invalidate_dashboard_stats()
 
     return {"message": "Project deactivated successfully"}
 
@@ -1,24 +1,17 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import date
 from uuid import UUID
 
-from app.db.session import SessionLocal
-from app.models.history import TimeHistory
+from app.db.session import get_db
 from app.models.project import Project
-from app.models.project_metrics import ProjectDailyMetric
+from app.models.project_daily_metrics import ProjectDailyMetrics
 from app.schemas.project_metrics import MetricCalculationRequest, ProjectMetricResponse
+from app.services.project_metrics_service import rollup_project_metrics
 
 # We keep the prefix specific so your URL is clean: /admin/metrics/project/...
 router = APIRouter(prefix="/admin/projects_daily", tags=["Admin - Metrics"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 # --- 1. CALCULATE METRICS ---
 # URL: POST /admin/metrics/project/calculate
@@ -28,56 +21,16 @@ def calculate_daily_metrics(
     db: Session = Depends(get_db)
 ):
     """
-    Scans history for a specific project & date, sums up the work, 
-    and saves it to the metrics table.
+    Rolls up the project's APPROVED history for the date into one row per
+    work role plus the AGGREGATE row, and saves them to the metrics table.
     """
-    # 1. Aggregation Query
-    raw_stats = db.query(
-        TimeHistory.work_role,
-        func.count(func.distinct(TimeHistory.user_id)).label("user_count"),
-        func.sum(TimeHistory.tasks_completed).label("total_tasks"),
-        func.sum(TimeHistory.minutes_worked).label("total_minutes")
-    ).filter(
-        TimeHistory.project_id == payload.project_id,
-        TimeHistory.sheet_date == payload.target_date
-    ).group_by(TimeHistory.work_role).all()
-
-    saved_metrics = []
-    
-    # 2. Upsert Logic
-    for row in raw_stats:
-        role = row.work_role
-        
-        # Check if exists
-        metric_entry = db.query(ProjectDailyMetric).filter(
-            ProjectDailyMetric.project_id == payload.project_id,
-            ProjectDailyMetric.metric_date == payload.target_date,
-            ProjectDailyMetric.work_role == role
-        ).first()
-
-        if not metric_entry:
-            metric_entry = ProjectDailyMetric(
-                project_id=payload.project_id,
-                metric_date=payload.target_date,
-                work_role=role
-            )
-            db.add(metric_entry)
-
-        # Update values
-        metric_entry.active_users_count = row.user_count
-        metric_entry.tasks_completed = row.total_tasks or 0
-        
-        total_mins = row.total_minutes or 0
-        metric_entry.total_hours_worked = round(total_mins / 60, 2)
-        
-        saved_metrics.append(metric_entry)
-
+    rollup_project_metrics(db, payload.target_date, project_ids=[payload.project_id])
     db.commit()
-    
-    for m in saved_metrics:
-        db.refresh(m)
-        
-    return saved_metrics
+
+    return db.query(ProjectDailyMetrics).filter(
+        ProjectDailyMetrics.project_id == payload.project_id,
+        ProjectDailyMetrics.metric_date == payload.target_date
+    ).order_by(ProjectDailyMetrics.work_role).all()
 
 
 # --- 2. GET REPORT ---
@@ -89,16 +42,16 @@ def get_project_metrics(
     end_date: date = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(ProjectDailyMetric).filter(
-        ProjectDailyMetric.project_id == project_id
+    query = db.query(ProjectDailyMetrics).filter(
+        ProjectDailyMetrics.project_id == project_id
     )
 
     if start_date:
-        query = query.filter(ProjectDailyMetric.metric_date >= start_date)
+        query = query.filter(ProjectDailyMetrics.metric_date >= start_date)
     if end_date:
-        query = query.filter(ProjectDailyMetric.metric_date <= end_date)
+        query = query.filter(ProjectDailyMetrics.metric_date <= end_date)
         
-    results = query.order_by(ProjectDailyMetric.metric_date.desc()).all()
+    results = query.order_by(ProjectDailyMetrics.metric_date.desc()).all()
     
     # Attach project name
     project_name = db.query(Project.name).filter(Project.id == project_id).scalar()
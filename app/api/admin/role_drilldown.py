@@ -1,18 +1,18 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, select, true
 from datetime import date
 from typing import Optional
 from uuid import UUID
 
-from app.db.session import get_db
-from app.core.dependencies import get_current_user
+from app.db.session import get_async_read_db
+from app.core.dependencies import get_current_user_async
 
 from app.models.project_members import ProjectMember
 from app.models.attendance_daily import AttendanceDaily
 from app.models.user import User
 from app.models.user_daily_metrics import UserDailyMetrics
-from app.models.user_quality import UserQuality
+from app.services.user_quality_service import rating_as_of
 
 router = APIRouter(
     prefix="/admin/role-drilldown",
@@ -20,20 +20,22 @@ router = APIRouter(
 )
 
 @router.get("/")
-def role_drilldown(
+async def role_drilldown(
     project_id: UUID,
     date_: date = Query(..., alias="date"),
     role: Optional[str] = None,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user=Depends(get_current_user_async),
 ):
     """
     Role Drilldown Report
     """
+    # Rating that was valid on the requested date
+    quality = rating_as_of(User.id, ProjectMember.project_id, date_)
 
     query = (
-        db.query(
+        select(
             User.name.label("user"),
             User.email,
             ProjectMember.work_role.label("role"),
@@ -45,14 +47,15 @@ def role_drilldown(
 
             UserDailyMetrics.productivity_score,
 
-            UserQuality.rating.label("quality_rating")
+            quality.c.rating.label("quality_rating")
         )
+        .select_from(User)
         .join(ProjectMember, ProjectMember.user_id == User.id)
 
+        # One attendance row per (user, day), whichever project it was opened on
         .outerjoin(
             AttendanceDaily,
             (AttendanceDaily.user_id == User.id) &
-            (AttendanceDaily.project_id == ProjectMember.project_id) &
             (AttendanceDaily.attendance_date == date_)
         )
 
@@ -63,24 +66,19 @@ def role_drilldown(
             (UserDailyMetrics.metric_date == date_)
         )
 
-        .outerjoin(
-            UserQuality,
-            (UserQuality.user_id == User.id) &
-            (UserQuality.project_id == ProjectMember.project_id) &
-            (UserQuality.is_current == True)
-        )
+        .outerjoin(quality, true())
 
-        .filter(ProjectMember.project_id == project_id)
-        .filter(ProjectMember.is_active == True)
+        .where(ProjectMember.project_id == project_id)
+        .where(ProjectMember.is_active == True)
     )
 
     if role:
-        query = query.filter(ProjectMember.work_role == role)
+        query = query.where(ProjectMember.work_role == role)
 
     if status:
-        query = query.filter(AttendanceDaily.status == status)
+        query = query.where(AttendanceDaily.status == status)
 
-    results = query.all()
+    results = (await db.execute(query)).all()
 
     return [
         {
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends
+
+from app.core.dependencies import get_current_user, user_cache
+from app.db.session import (
+    async_engine,
+    async_replica_engine,
+    get_pool_status,
+    replica_engine,
+    replica_guard,
+)
+from app.models.user import User
+from app.services.dashboard_service import global_stats_cache
+from app.services.report_cache import report_cache
+
+router = APIRouter(prefix="/admin/system", tags=["Admin - System"])
+
+
+@router.get("/user-cache")
+def user_cache_stats(_: User = Depends(get_current_user)):
+    """
+    Hit/miss counters of the resolved-user cache used by get_current_user.
+    """
+    return user_cache.stats()
+
+
+@router.get("/report-cache")
+def report_cache_stats(_: User = Depends(get_current_user)):
+    """
+    Hit/miss counters of the in-process report cache (/reports).
+    """
+    return report_cache.stats()
+
+
+@router.get("/dashboard-cache")
+def dashboard_cache_stats(_: User = Depends(get_current_user)):
+    """
+    Hit/refresh counters of the cached /admin/dashboard/stats payload.
+    """
+    return global_stats_cache.stats()
+
+
+@router.get("/db-pool")
+def db_pool_stats(_: User = Depends(get_current_user)):
+    """
+    Live connection pool counters of the shared sync and async engines,
+    plus the read replica's when one is configured.
+    """
+    stats = {
+        "sync": get_pool_status(),
+        "async": get_pool_status(async_engine.sync_engine),
+    }
+
+    if replica_engine is not None:
+        stats["replica"] = {
+            "sync": get_pool_status(replica_engine),
+            "async": get_pool_status(async_replica_engine.sync_engine),
+            "lag_seconds": replica_guard.lag_seconds,
+            "max_lag_seconds": replica_guard.max_lag_seconds,
+        }
+
+    return stats
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy import func, case
 from sqlalchemy.orm import Session, aliased
-from app.db.session import SessionLocal
+from app.db.session import get_db, get_read_db
 from app.models.user import User, UserRole
 from app.models.project_members import ProjectMember
 from app.models.attendance_daily import AttendanceDaily
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, invalidate_cached_user
 from app.schemas.user import UserCreate, UserResponse, UserUpdate, UserQualityUpdate, UserSystemUpdate
 from typing import List, Optional
 from uuid import UUID
@@ -17,12 +17,6 @@ router = APIRouter(
 )
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 #def hash_password(password: str) -> str:
   # return hashlib.sha256(password.encode()).hexdigest()
@@ -36,7 +30,7 @@ def list_users(
     is_active: Optional[bool] = None,
     limit: int = 20,
     offset: int = 0,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     query = db.query(User)
 
@@ -65,7 +59,7 @@ def list_users(
 
 @router.get("/kpi_cards_info")
 def kpi_cards_info(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: User = Depends(get_current_user)
 ):
     total_users = db.query(func.count(User.id)).scalar()
@@ -94,7 +88,7 @@ def search_with_filters(
     work_role: Optional[str] = None,
     is_active: Optional[bool] = None,
     allocated: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _: User = Depends(get_current_user)
 ):
     today = date
@@ -242,6 +236,7 @@ def update_user(
 
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user.email)
     return user
 
 @router.patch("/{user_id}/quality-rating", response_model=UserResponse)
@@ -262,6 +257,7 @@ def update_quality_rating(
 
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user.email)
 
     return user
 
@@ -287,6 +283,7 @@ def update_system_identifiers(
 
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user.email)
 
     return user
 
@@ -304,6 +301,7 @@ def deactivate_user(
 
     user.is_active = False
     db.commit()
+    invalidate_cached_user(user.email)
 
     return {"message": "User deactivated successfully"}
 
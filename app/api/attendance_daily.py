@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
@@ -16,6 +17,20 @@ router = APIRouter(
     tags=["Attendance Daily"]
 )
 
+
+def _commit_unique_day(db: Session):
+    """Commits, turning a second row for the same (user, day) into a 409."""
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        if "uq_attendance_daily_user_date" not in str(exc.orig):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Attendance for this user and date already exists",
+        )
+
 #CREATE (POST)
 @router.post("/", response_model=AttendanceDailyResponse)
 def create_attendance(
@@ -25,7 +40,7 @@ def create_attendance(
     attendance = AttendanceDaily(**payload.model_dump())
 
     db.add(attendance)
-    db.commit()
+    _commit_unique_day(db)
     db.refresh(attendance)
 
     return attendance
@@ -91,7 +106,7 @@ def update_attendance(
     for field, value in update_data.items():
         setattr(attendance, field, value)
 
-    db.commit()
+    _commit_unique_day(db)
     db.refresh(attendance)
 
     return attendance
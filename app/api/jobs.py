@@ -0,0 +1,101 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Optional
+from uuid import UUID
+
+from app.core.dependencies import get_current_user
+from app.db.session import get_db
+from app.models.job import Job, JobStatus
+from app.models.user import User
+from app.schemas.job import JobCreate, JobResponse
+from app.services.job_runner import artifact_path, job_runner, job_to_response
+
+router = APIRouter(prefix="/jobs", tags=["Background Jobs"])
+
+# Polling reads the primary: a replica may not have the job row yet.
+
+
+@router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    payload: JobCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Queues long analytics/report work and returns at once. Poll
+    GET /jobs/{id} for progress; an identical job that is still pending or
+    running is returned instead of starting a second one.
+    """
+    try:
+        job, created = job_runner.enqueue(db, payload.kind, payload.params, user_id=current_user.id)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind '{payload.kind}'")
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=jsonable_encoder(exc.errors(include_url=False)))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return job_to_response(job, deduplicated=not created)
+
+
+@router.get("/", response_model=list[JobResponse])
+def list_jobs(
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_user),
+    kind: Optional[str] = None,
+    job_status: Optional[JobStatus] = None,
+    limit: int = 50
+):
+    query = select(Job).order_by(Job.created_at.desc()).limit(limit)
+    if kind:
+        query = query.where(Job.kind == kind)
+    if job_status:
+        query = query.where(Job.status == job_status)
+
+    return [job_to_response(job) for job in db.scalars(query)]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job_to_response(job)
+
+
+@router.get("/{job_id}/download")
+def download_job_artifact(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """
+    The file produced by a finished report job, streamed from
+    JOB_ARTIFACT_DIR. 410 once the file is past its retention.
+    """
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != JobStatus.SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}")
+    if job.artifact_name is None:
+        raise HTTPException(status_code=404, detail="This job did not produce a file")
+
+    path = artifact_path(job.id)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=410, detail="The file is no longer available, run the job again")
+
+    # filename= sets Content-Disposition, quoted, or RFC 5987-encoded
+    # (filename*=utf-8''...) when the name is not plain ASCII
+    return FileResponse(path, media_type=job.artifact_media_type, filename=job.artifact_name)
@@ -1,22 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from typing import Optional
 from uuid import UUID
 from datetime import date
-import pandas as pd
-import io
 
-from app.db.session import get_db
-from app.models.project import Project
-from app.models.user import User
-from app.models.attendance_daily import AttendanceDaily
-from app.models.project_members import ProjectMember
-from app.models.user_daily_metrics import UserDailyMetrics
-from app.models.user_quality import UserQuality 
+from app.db.session import get_read_db
+from app.schemas.report import ReportFormat
+from app.services import report_service
+from app.services.report_cache import report_cache
 
 router = APIRouter(prefix="/reports", tags=["Reports & Exports"])
 
+
+def _report_response(report: report_service.Report, format: ReportFormat) -> StreamingResponse:
+    # Rows are fetched and written while the body is sent; the session from
+    # get_read_db stays open until the response has finished.
+    filename, media_type, chunks = report_service.render(report, format)
+    response = StreamingResponse(chunks, media_type=media_type)
+    if filename:
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+# Large exports can also be run in the background, see POST /jobs.
+
 # ------------------------------------------------------------------
 # 1. DAILY SCORECARD (Used by Analytics Page)
 # ------------------------------------------------------------------
@@ -24,76 +31,27 @@ router = APIRouter(prefix="/reports", tags=["Reports & Exports"])
 def export_project_daily_report(
     project_id: UUID, 
     date_str: str, 
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_read_db),
+    format: ReportFormat = ReportFormat.CSV,
 ):
     """
     Generates the 'Daily Scorecard' CSV for the Analytics Dashboard.
     Now includes 'Minutes Worked'.
+    Cached until that day's metrics change; answers 304 to a current ETag.
     """
     try:
         target_date = date.fromisoformat(date_str)
     except ValueError:
         raise HTTPException(400, "Invalid date format. Use YYYY-MM-DD")
 
-    results = db.query(
-        UserDailyMetrics, 
-        User.name, 
-        User.email
-    ).join(
-        User, UserDailyMetrics.user_id == User.id
-    ).filter(
-        UserDailyMetrics.project_id == project_id,
-        UserDailyMetrics.metric_date == target_date
-    ).all()
-
-    if not results:
-        df = pd.DataFrame([{"Message": "No data found for this date"}])
-    else:
-        data = []
-        for row in results:
-            metric = row[0]
-            name = row[1]
-            email = row[2]
-            
-            # Get Rating (SCD Logic)
-            q_record = db.query(UserQuality).filter(
-                UserQuality.user_id == metric.user_id,
-                UserQuality.project_id == project_id,
-                func.date(UserQuality.valid_from) <= target_date
-            ).filter(
-                or_(
-                    UserQuality.valid_to == None,
-                    func.date(UserQuality.valid_to) >= target_date
-                )
-            ).order_by(UserQuality.valid_from.desc()).first()
-
-            rating_text = "N/A"
-            if q_record:
-                rating_text = q_record.rating.value if hasattr(q_record.rating, 'value') else q_record.rating
-            
-            # Calculate Minutes
-            hours = float(metric.hours_worked or 0)
-            minutes = int(hours * 60)
-
-            data.append({
-                "User Name": name,
-                "Email": email,
-                "Role": metric.work_role,
-                "Tasks Completed": metric.tasks_completed,
-                "Minutes Worked": minutes,   # <--- NEW COLUMN
-                "Hours Worked": round(hours, 2),
-                "Productivity Score": metric.productivity_score,
-                "Rating": rating_text
-            })
-        
-        df = pd.DataFrame(data)
-
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
-    
-    response = StreamingResponse(iter([stream.getvalue()]), media_type="text/csv")
-    response.headers["Content-Disposition"] = f"attachment; filename=Daily_Report_{date_str}.csv"
-    return response
+    return report_cache.respond(
+        request, "project_daily", project_id, target_date, (), format,
+        watermark=report_service.metrics_watermark(db, project_id, target_date, target_date),
+        render=lambda: report_service.render(
+            report_service.build_project_daily_csv(db, project_id, target_date), format
+        ),
+    )
 
 
 # ------------------------------------------------------------------
@@ -103,47 +61,10 @@ def export_project_daily_report(
 def export_role_drilldown(
     project_id: UUID,
     report_date: date,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    format: ReportFormat = ReportFormat.CSV,
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(404, "Project not found")
-
-    members = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.is_active == True
-    ).all()
-
-    data = []
-    for m in members:
-        att = db.query(AttendanceDaily).filter(
-            AttendanceDaily.user_id == m.user_id,
-            AttendanceDaily.attendance_date == report_date
-        ).first()
-
-        minutes = att.minutes_worked if att else 0
-        hours = round(minutes / 60, 2) if minutes else 0
-
-        row = {
-            "project_code": project.code,
-            "project_name": project.name,
-            "date": report_date,
-            "role": m.work_role,
-            "user_name": m.user.name,
-            "email": m.user.email,
-            "attendance_status": att.status if att else "ABSENT",
-            "minutes_worked": minutes, # Already existed, keeping it
-            "hours_worked": hours
-        }
-        data.append(row)
-
-    df = pd.DataFrame(data)
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
-    
-    response = StreamingResponse(iter([stream.getvalue()]), media_type="text/csv")
-    response.headers["Content-Disposition"] = f"attachment; filename=roster_{project.code}_{report_date}.csv"
-    return response
+    return _report_response(report_service.build_role_drilldown_csv(db, project_id, report_date), format)
 
 
 # ------------------------------------------------------------------
@@ -152,50 +73,27 @@ def export_role_drilldown(
 @router.get("/project-history")
 def export_project_history(
     project_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    role: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    format: ReportFormat = ReportFormat.CSV,
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    metrics = db.query(UserDailyMetrics).filter(UserDailyMetrics.project_id == project_id).all()
-    
-    if not metrics:
-        return StreamingResponse(iter(["No data available"]), media_type="text/csv")
-
-    user_map = {}
-    for m in metrics:
-        if m.user_id not in user_map:
-            user_map[m.user_id] = {"hours": 0, "tasks": 0, "scores": [], "dates": []}
-        
-        user_map[m.user_id]["hours"] += float(m.hours_worked or 0)
-        user_map[m.user_id]["tasks"] += (m.tasks_completed or 0)
-        if m.productivity_score:
-            user_map[m.user_id]["scores"].append(float(m.productivity_score))
-        user_map[m.user_id]["dates"].append(m.metric_date)
-
-    summary_data = []
-    for uid, stats in user_map.items():
-        user = db.query(User).get(uid)
-        avg_score = sum(stats["scores"]) / len(stats["scores"]) if stats["scores"] else 0
-        
-        total_hours = stats["hours"]
-        total_minutes = int(total_hours * 60)
-
-        summary_data.append({
-            "project_name": project.name,
-            "user_name": user.name,
-            "email": user.email,
-            "total_minutes": total_minutes, # <--- NEW COLUMN
-            "total_hours": round(total_hours, 2),
-            "total_tasks": stats["tasks"],
-            "avg_score": round(avg_score, 2)
-        })
+    """
+    Per-user totals for the project, optionally within a date window and for one role.
+    Cached like the daily scorecard.
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(400, "'start_date' cannot be later than 'end_date'.")
 
-    df = pd.DataFrame(summary_data)
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
-    
-    response = StreamingResponse(iter([stream.getvalue()]), media_type="text/csv")
-    response.headers["Content-Disposition"] = f"attachment; filename=history_{project.code}.csv"
-    return response
+    return report_cache.respond(
+        request, "project_history", project_id, None, (start_date, end_date, role), format,
+        watermark=report_service.metrics_watermark(db, project_id, start_date, end_date, role),
+        render=lambda: report_service.render(
+            report_service.build_project_history_csv(db, project_id, start_date, end_date, role), format
+        ),
+    )
 
 
 # ------------------------------------------------------------------
@@ -206,56 +104,7 @@ def export_user_performance(
     user_id: UUID,
     start_date: date,
     end_date: date,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    format: ReportFormat = ReportFormat.CSV,
 ):
-    user = db.query(User).get(user_id)
-    if not user:
-        raise HTTPException(404, "User not found")
-    
-    metrics = db.query(UserDailyMetrics).filter(
-        UserDailyMetrics.user_id == user_id,
-        UserDailyMetrics.metric_date >= start_date,
-        UserDailyMetrics.metric_date <= end_date
-    ).order_by(UserDailyMetrics.metric_date).all()
-    
-    data = []
-    for m in metrics:
-        proj = db.query(Project).get(m.project_id)
-        
-        target_date = m.metric_date
-        q_record = db.query(UserQuality).filter(
-            UserQuality.user_id == user_id,
-            UserQuality.project_id == m.project_id,
-            func.date(UserQuality.valid_from) <= target_date
-        ).filter(
-            or_(
-                UserQuality.valid_to == None,
-                func.date(UserQuality.valid_to) >= target_date
-            )
-        ).order_by(UserQuality.valid_from.desc()).first()
-        
-        rating_text = "N/A"
-        if q_record:
-            rating_text = q_record.rating.value if hasattr(q_record.rating, 'value') else q_record.rating
-
-        hours = float(m.hours_worked or 0)
-        minutes = int(hours * 60)
-
-        data.append({
-            "Date": m.metric_date,
-            "Project": proj.name if proj else "N/A",
-            "Role": m.work_role,
-            "Tasks": m.tasks_completed,
-            "Minutes Worked": minutes, # <--- NEW COLUMN
-            "Hours Worked": round(hours, 2),
-            "Score": m.productivity_score,
-            "Rating": rating_text
-        })
-
-    df = pd.DataFrame(data)
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
-    
-    response = StreamingResponse(iter([stream.getvalue()]), media_type="text/csv")
-    response.headers["Content-Disposition"] = f"attachment; filename=report_{user.name}_{start_date}.csv"
-    return response
\ No newline at end of file
+    return _report_response(report_service.build_user_performance_csv(db, user_id, start_date, end_date), format)
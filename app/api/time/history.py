@@ -1,26 +1,35 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, date
 from typing import List, Optional
 import uuid
 from uuid import UUID
-from app.db.session import SessionLocal
+from app.db.session import get_db, get_async_db
 from app.models.history import TimeHistory
 from app.models.project import Project
-from app.schemas.history import TimeHistoryResponse, ClockInRequest, ClockOutRequest
-from app.core.dependencies import get_current_user
+from app.schemas.history import (
+    TimeHistoryResponse,
+    ClockInRequest,
+    ClockOutRequest,
+    TimeHistoryDaySummary,
+    TimeHistoryItem,
+    TimeHistoryPage,
+)
+from app.core.dependencies import get_current_user, get_current_user_async
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, after_cursor, decode_cursor, encode_cursor
 from app.models.user import User
+from app.services.analytics_recompute import mark_partition_dirty
+from app.services.attendance_materializer import fold_clock_out, session_minutes
+from app.services.dashboard_service import invalidate_dashboard_stats
+from app.services.live_workers import publish_clock_in, publish_clock_out
+from app.services.report_cache import invalidate_reports
 
-from app.schemas.history import ApprovalRequest
+from app.schemas.history import ApprovalRequest, BulkApprovalRequest, BulkApprovalResponse, BulkApprovalResult
 
 router = APIRouter(prefix="/time", tags=["Time Tracking"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 # --- 1. CLOCK IN ---
 @router.post("/clock-in", response_model=TimeHistoryResponse)
@@ -55,6 +64,9 @@ def clock_in(
     )
     
     db.add(new_session)
+    db.flush()
+    # Sent to live dashboards when (and only if) the clock-in commits
+    publish_clock_in(db, new_session.id)
     db.commit()
     db.refresh(new_session)
     if new_session.project:
@@ -81,40 +93,145 @@ def clock_out(
         )
 
     # Update the session
-    active_session.clock_out_at = datetime.now()
+    clock_out_at = datetime.now()
+    active_session.clock_out_at = clock_out_at
+    # Worked out by the database so it matches how clock_in_at was stored
+    active_session.minutes_worked = session_minutes(TimeHistory.clock_in_at, clock_out_at)
     active_session.tasks_completed = payload.tasks_completed
     active_session.notes = payload.notes
-    
+    db.flush()
+
+    # Same transaction: the day's attendance row never misses a closed session
+    fold_clock_out(db, active_session.id)
+    publish_clock_out(db, active_session.user_id)
+
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(active_session)
     return active_session
 
 # --- 3. GET HISTORY ---
-@router.get("/history", response_model=List[TimeHistoryResponse])
+# `fields` accepted by /time/history; project_name comes from a join
+HISTORY_FIELDS = {
+    **{name: getattr(TimeHistory, name) for name in TimeHistoryItem.model_fields if name != "project_name"},
+    "project_name": Project.name,
+}
+
+
+def _history_filters(
+    user_id: UUID,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    project_id: Optional[UUID],
+    work_role: Optional[str],
+) -> list:
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    filters = [TimeHistory.user_id == user_id]
+    if start_date:
+        filters.append(TimeHistory.sheet_date >= start_date)
+    if end_date:
+        filters.append(TimeHistory.sheet_date <= end_date)
+    if project_id:
+        filters.append(TimeHistory.project_id == project_id)
+    if work_role:
+        filters.append(TimeHistory.work_role == work_role)
+    return filters
+
+
+@router.get(
+    "/history",
+    response_model=TimeHistoryPage,
+    response_model_exclude_unset=True,
+)
 def get_history(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
+    project_id: Optional[UUID] = None,
+    work_role: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated item fields; all when omitted"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = db.query(TimeHistory).filter(
-        TimeHistory.user_id == current_user.id
+    """
+    The caller's sessions, newest clock-in first, one page at a time. Pass
+    the previous page's `next_cursor` as `cursor` for the next one. Items
+    carry only the requested `fields`.
+    """
+    names = list(HISTORY_FIELDS)
+    if fields:
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in HISTORY_FIELDS]
+        if unknown or not names:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown) or '(none given)'}. "
+                       f"Allowed: {', '.join(HISTORY_FIELDS)}",
+            )
+
+    filters = _history_filters(current_user.id, start_date, end_date, project_id, work_role)
+    after = decode_cursor(cursor, datetime, UUID)
+    if after:
+        filters.append(after_cursor((TimeHistory.clock_in_at, TimeHistory.id), after))
+
+    query = select(
+        *(HISTORY_FIELDS[name].label(name) for name in names),
+        # Sort key, for the cursor
+        TimeHistory.clock_in_at.label("_clock_in_at"),
+        TimeHistory.id.label("_id"),
+    ).where(*filters)
+    if "project_name" in names:
+        query = query.outerjoin(Project, Project.id == TimeHistory.project_id)
+
+    # One extra row tells whether there is a next page
+    rows = db.execute(
+        query.order_by(TimeHistory.clock_in_at.desc(), TimeHistory.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]._clock_in_at, rows[-1]._id)
+
+    return TimeHistoryPage(
+        items=[TimeHistoryItem(**{name: row._mapping[name] for name in names}) for row in rows],
+        next_cursor=next_cursor,
     )
 
-    if start_date:
-        query = query.filter(TimeHistory.sheet_date >= start_date)
 
-    if end_date:
-        query = query.filter(TimeHistory.sheet_date <= end_date)
+@router.get("/history/summary", response_model=List[TimeHistoryDaySummary])
+def get_history_summary(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    project_id: Optional[UUID] = None,
+    work_role: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    The caller's totals per day, project and role (newest day first),
+    summed by the database instead of shipping every session.
+    """
+    rows = db.execute(
+        select(
+            TimeHistory.sheet_date,
+            TimeHistory.project_id,
+            Project.name.label("project_name"),
+            TimeHistory.work_role,
+            func.count().label("sessions"),
+            func.coalesce(func.sum(TimeHistory.minutes_worked), 0).label("minutes_worked"),
+            func.coalesce(func.sum(TimeHistory.tasks_completed), 0).label("tasks_completed"),
+        )
+        .outerjoin(Project, Project.id == TimeHistory.project_id)
+        .where(*_history_filters(current_user.id, start_date, end_date, project_id, work_role))
+        .group_by(TimeHistory.sheet_date, TimeHistory.project_id, Project.name, TimeHistory.work_role)
+        .order_by(TimeHistory.sheet_date.desc(), Project.name, TimeHistory.work_role)
+    ).all()
 
-    results = query.order_by(TimeHistory.clock_in_at.desc()).all()
-    
-    # Attach project names for UI
-    for r in results:
-        if r.project:
-            r.project_name = r.project.name
-            
-    return results
+    return [TimeHistoryDaySummary.model_validate(row, from_attributes=True) for row in rows]
 
 
 
@@ -147,6 +264,10 @@ def approve_session(
     
     db.commit()
     db.refresh(session)
+
+    # Any status change can move the session in or out of the graded set
+    mark_partition_dirty(session.project_id, session.sheet_date)
+    invalidate_reports(session.project_id, session.sheet_date)
     
     # 3. Attach project name for UI (Safety check)
     if session.project:
@@ -154,25 +275,115 @@ def approve_session(
         
     return session
 
-# --- 5. GET CURRENT ACTIVE SESSION (For Home Page Logic) ---
-@router.get("/current", response_model=Optional[TimeHistoryResponse])
-def get_current_active_session(
+# --- 4b. BULK APPROVE / REJECT (Manager Action) ---
+APPROVAL_STATUSES = ("APPROVED", "REJECTED")
+
+
+@router.post("/history/bulk-approve", response_model=BulkApprovalResponse)
+def bulk_approve_sessions(
+    payload: BulkApprovalRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+):
+    """
+    Approves or rejects many completed PENDING sessions in one UPDATE,
+    picked by `history_ids` or by project_id / user_id / sheet date range.
+    Sessions already decided or still running are left alone; with
+    `history_ids` each id gets its outcome.
+    """
+    if payload.status not in APPROVAL_STATUSES:
+        raise HTTPException(status_code=400, detail="status must be APPROVED or REJECTED")
+
+    by_filter = any([payload.project_id, payload.user_id, payload.start_date, payload.end_date])
+    if payload.history_ids is None and not by_filter:
+        raise HTTPException(status_code=400, detail="Give history_ids or at least one filter")
+    if payload.history_ids is not None and by_filter:
+        raise HTTPException(status_code=400, detail="Give either history_ids or filters, not both")
+
+    filters = [TimeHistory.status == "PENDING", TimeHistory.clock_out_at != None]
+    if payload.history_ids is not None:
+        ids = list(dict.fromkeys(payload.history_ids))
+        filters.append(TimeHistory.id.in_(ids))
+    else:
+        if payload.start_date and payload.end_date and payload.start_date > payload.end_date:
+            raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+        if payload.project_id:
+            filters.append(TimeHistory.project_id == payload.project_id)
+        if payload.user_id:
+            filters.append(TimeHistory.user_id == payload.user_id)
+        if payload.start_date:
+            filters.append(TimeHistory.sheet_date >= payload.start_date)
+        if payload.end_date:
+            filters.append(TimeHistory.sheet_date <= payload.end_date)
+
+    changed = db.execute(
+        update(TimeHistory)
+        .where(*filters)
+        .values(
+            status=payload.status,
+            approval_comment=payload.approval_comment,
+            approved_by_user_id=current_user.id,
+            approved_at=func.now(),
+            updated_at=func.now(),
+        )
+        .returning(TimeHistory.id, TimeHistory.project_id, TimeHistory.sheet_date)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+
+    # Each partition is queued (and its cached reports dropped) once
+    for project_id, sheet_date in {(row.project_id, row.sheet_date) for row in changed}:
+        mark_partition_dirty(project_id, sheet_date)
+        invalidate_reports(project_id, sheet_date)
+
+    updated = {row.id for row in changed}
+    if payload.history_ids is None:
+        results = [BulkApprovalResult(history_id=row.id, outcome="updated") for row in changed]
+    else:
+        # Why the rest were skipped: one lookup, only when some were
+        skipped = {}
+        missing = [history_id for history_id in ids if history_id not in updated]
+        if missing:
+            skipped = {
+                row.id: "not_clocked_out" if row.clock_out_at is None else "not_pending"
+                for row in db.execute(
+                    select(TimeHistory.id, TimeHistory.clock_out_at).where(TimeHistory.id.in_(missing))
+                )
+            }
+        results = [
+            BulkApprovalResult(
+                history_id=history_id,
+                outcome="updated" if history_id in updated else skipped.get(history_id, "not_found"),
+            )
+            for history_id in ids
+        ]
+
+    return BulkApprovalResponse(status=payload.status, updated=len(updated), results=results)
+
+# --- 5. GET CURRENT ACTIVE SESSION (For Home Page Logic) ---
+@router.get("/current", response_model=Optional[TimeHistoryResponse])
+async def get_current_active_session(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """
     Checks if the user has a session running (Clock Out is NULL).
     Returns the session details if yes, or null if no.
     """
-    active_session = db.query(TimeHistory).filter(
-        TimeHistory.user_id == current_user.id,
-        TimeHistory.clock_out_at == None
-    ).first()
+    row = (await db.execute(
+        select(TimeHistory, Project.name)
+        .outerjoin(Project, Project.id == TimeHistory.project_id)
+        .where(
+            TimeHistory.user_id == current_user.id,
+            TimeHistory.clock_out_at == None
+        )
+        .limit(1)
+    )).first()
 
-    if active_session:
-        # Manually attach project name so the UI can display "Working on: Project Alpha"
-        if active_session.project:
-            active_session.project_name = active_session.project.name
+    if row:
+        active_session, project_name = row
+        # Attach project name so the UI can display "Working on: Project Alpha"
+        active_session.project_name = project_name
         return active_session
     
     return None
@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries also expire after
+    `ttl` seconds. Keeps hit/miss counters so the size can be tuned.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def discard(self, predicate):
+        """Removes every entry whose key matches predicate(key)."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class StaleWhileRevalidate:
+    """
+    Holds the latest value of `loader(key)` for one key at a time (a new
+    key replaces the old value). The value is served as is for `ttl`
+    seconds, then for up to `stale_ttl` more while a single background
+    thread reloads it. Past that, or on a new key, the caller loads it,
+    and callers arriving meanwhile wait for that one load instead of
+    running their own.
+
+    invalidate() makes the held value stale right away, so the next read
+    starts a reload without waiting out the ttl.
+    """
+
+    def __init__(self, loader: Callable, ttl: float, stale_ttl: float, name: str = "swr"):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self.hits = 0
+        self.stale_hits = 0
+        self.loads = 0
+        self.failures = 0
+        # (key, value, loaded_at, generation it was loaded in)
+        self._entry = None
+        self._generation = 0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def get(self, key):
+        value, found = self._lookup(key)
+        if found:
+            return value
+
+        with self._load_lock:
+            # Another caller may have loaded it while this one waited
+            value, found = self._lookup(key)
+            if found:
+                return value
+            return self._load(key)
+
+    def _lookup(self, key):
+        """(value, True) when the held value may be served, else (None, False)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry
+            if entry is None or entry[0] != key:
+                return None, False
+
+            age = now - entry[2]
+            if age < self.ttl and entry[3] == self._generation:
+                self.hits += 1
+                return entry[1], True
+            if age >= self.ttl + self.stale_ttl:
+                return None, False
+
+            self.stale_hits += 1
+            if not self._refreshing:
+                self._refreshing = True
+                threading.Thread(
+                    target=self._refresh, args=(key,), name=f"{self.name}-refresh", daemon=True
+                ).start()
+            return entry[1], True
+
+    def _load(self, key):
+        with self._lock:
+            generation = self._generation
+        value = self.loader(key)
+        with self._lock:
+            self.loads += 1
+            self._entry = (key, value, time.monotonic(), generation)
+        return value
+
+    def _refresh(self, key):
+        try:
+            with self._load_lock:
+                self._load(key)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            logger.exception("Background refresh of %s failed", self.name)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            entry = self._entry
+            return {
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "loads": self.loads,
+                "failures": self.failures,
+                "refreshing": self._refreshing,
+                "age_seconds": round(time.monotonic() - entry[2], 3) if entry else None,
+                "fresh": bool(entry) and entry[3] == self._generation
+                and time.monotonic() - entry[2] < self.ttl,
+            }
@@ -1,48 +1,130 @@
+import os
 from fastapi import Depends, Header, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import date
 
-from app.core.supabase_auth import get_user_from_token
-from app.db.session import SessionLocal
+from app.core.cache import TTLCache
+from app.core.supabase_auth import get_user_from_token, verify_token_locally
+from app.db.session import get_db, get_async_db
 from app.models.user import User, UserRole
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Resolved users by email. Entries are plain column snapshots, so a hit
+# never touches the database session.
+#
+# The cache lives in each worker process and invalidate_cached_user() only
+# clears the calling process's copy. Other workers keep serving the old
+# row (a deactivated user stays active, a role change is not seen) until
+# the entry expires, so the TTL is the upper bound on that staleness and
+# must stay short.
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "30")),
+)
 
 
-def get_current_user(
-    authorization: str = Header(...),
-    db: Session = Depends(get_db),
-):
+def _snapshot(user: User) -> dict:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+
+def invalidate_cached_user(email: str):
+    """
+    Call after any write that changes a user row. Only this process's
+    cache is cleared; other workers catch up within USER_CACHE_TTL_SECONDS.
+    """
+    user_cache.pop(email)
+
+
+def _bearer_token(authorization: str) -> str:
     if not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid Authorization header",
         )
 
-    token = authorization.replace("Bearer ", "")
-    supabase_user = get_user_from_token(token)
+    return authorization.replace("Bearer ", "")
 
-    # Try finding user
-    user = db.query(User).filter(User.email == supabase_user.email).first()
 
-    # 🔥 AUTO-PROVISION USER IF NOT EXISTS
-    if not user:
-        user = User(
+def _provision_user_stmt(supabase_user):
+    # Concurrent first logins race on users.email, so insert-or-skip in one
+    # statement and re-select only when another request won.
+    return (
+        insert(User)
+        .values(
             email=supabase_user.email,
             name=supabase_user.user_metadata.get("name", supabase_user.email.split("@")[0]),
             role=UserRole.USER,          # default role
             is_active=True,
             doj=date.today(),             # default DOJ
         )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+
+
+def get_current_user(
+    authorization: str = Header(...),
+    db: Session = Depends(get_db),
+):
+    token = _bearer_token(authorization)
+    supabase_user = get_user_from_token(token)
+
+    cached = user_cache.get(supabase_user.email)
+    if cached is not None:
+        # Detached copy: endpoints only read from current_user
+        return User(**cached)
+
+    # Try finding user
+    user = db.query(User).filter(User.email == supabase_user.email).first()
+
+    # 🔥 AUTO-PROVISION USER IF NOT EXISTS
+    if not user:
+        user = db.scalars(_provision_user_stmt(supabase_user)).first()
+        if user:
+            # Taken from the RETURNING row before commit() expires it;
+            # reading it afterwards would cost another SELECT
+            snapshot = _snapshot(user)
+            db.commit()
+            user_cache.set(snapshot["email"], snapshot)
+            return User(**snapshot)
 
-        db.add(user)
         db.commit()
-        db.refresh(user)
+        user = db.query(User).filter(User.email == supabase_user.email).one()
+
+    user_cache.set(user.email, _snapshot(user))
+    return user
+
+
+async def get_current_user_async(
+    authorization: str = Header(...),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    get_current_user for `async def` endpoints. Only the remote Supabase
+    call is pushed to the threadpool.
+    """
+    token = _bearer_token(authorization)
+    supabase_user = verify_token_locally(token)
+    if supabase_user is None:
+        supabase_user = await run_in_threadpool(get_user_from_token, token)
+
+    cached = user_cache.get(supabase_user.email)
+    if cached is not None:
+        return User(**cached)
+
+    by_email = select(User).where(User.email == supabase_user.email)
+    user = (await db.scalars(by_email)).first()
+
+    if not user:
+        user = (await db.scalars(_provision_user_stmt(supabase_user))).first()
+        await db.commit()
+
+        if not user:
+            user = (await db.scalars(by_email)).one()
 
+    user_cache.set(user.email, _snapshot(user))
     return user
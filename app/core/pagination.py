@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+# Page size limits shared by the keyset-paginated endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*values) -> str:
+    """
+    Opaque cursor for the last row of a page: its sort key values
+    (datetimes, dates, UUIDs, numbers or strings), JSON in url-safe base64.
+    """
+    raw = json.dumps([_dump(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], *types) -> Optional[tuple]:
+    """
+    The values encode_cursor() was given, converted back with `types`
+    (datetime, date, UUID, int, float, str). None for no cursor; 400 for a
+    cursor that was not produced for this sort.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong number of values")
+        return tuple(_load(kind, value) for kind, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def after_cursor(columns: tuple, values: tuple, descending: bool = True):
+    """
+    Keyset condition for the rows after `values` in ORDER BY `columns`
+    (all descending or all ascending). A row comparison, so a composite
+    index on the same columns is walked directly.
+    """
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+
+def _dump(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _load(kind, value):
+    if kind is datetime:
+        return datetime.fromisoformat(value)
+    if kind is date:
+        return date.fromisoformat(value)
+    return kind(value)
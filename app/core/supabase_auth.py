@@ -1,33 +1,201 @@
 import os
-from fastapi import HTTPException, status
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import threading
+import time
+from functools import lru_cache
 
-load_dotenv()
+from fastapi import HTTPException, status
+from jose import jwt, JWTError
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    raise RuntimeError("SUPABASE_URL or SUPABASE_ANON_KEY not set")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+@lru_cache(maxsize=1)
+def get_supabase_client():
+    """
+    Built on first use: importing the supabase SDK is slow and the app
+    should import without Supabase settings.
+    """
+    from supabase import create_client
 
+    if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+        raise RuntimeError("SUPABASE_URL or SUPABASE_ANON_KEY not set")
 
-def get_user_from_token(token: str):
+    return create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+
+# "remote" asks Supabase about every token, "local" verifies the JWT in-process
+# and only calls Supabase for signing keys we have never seen.
+SUPABASE_AUTH_MODE = os.getenv("SUPABASE_AUTH_MODE", "remote").lower()
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+# Supabase Auth signs its tokens with iss = <project url>/auth/v1
+SUPABASE_JWT_ISSUER = os.getenv(
+    "SUPABASE_JWT_ISSUER",
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1" if SUPABASE_URL else None,
+)
+SUPABASE_JWKS_URL = os.getenv(
+    "SUPABASE_JWKS_URL",
+    f"{(SUPABASE_URL or '').rstrip('/')}/auth/v1/.well-known/jwks.json",
+)
+SUPABASE_JWKS_REFRESH_SECONDS = int(os.getenv("SUPABASE_JWKS_REFRESH_SECONDS", "600"))
+
+ALLOWED_ALGORITHMS = {"HS256", "RS256", "ES256"}
+
+
+class TokenUser:
+    """
+    The part of the Supabase user object that get_current_user reads,
+    built from verified JWT claims.
+    """
+
+    def __init__(self, claims: dict):
+        self.id = claims.get("sub")
+        self.email = claims.get("email")
+        self.user_metadata = claims.get("user_metadata") or {}
+
+
+class JWKSCache:
+    """
+    Holds the project's public signing keys by kid. A daemon thread refreshes
+    them periodically, or early when an unknown kid shows up.
+    """
+
+    MIN_REFRESH_GAP_SECONDS = 30
+
+    def __init__(self, url: str, refresh_seconds: int):
+        self.url = url
+        self.refresh_seconds = refresh_seconds
+        self._keys = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._last_refresh = 0.0
+        self._thread = None
+
+    def get(self, kid):
+        self._ensure_started()
+        with self._lock:
+            key = self._keys.get(kid)
+        if key is None:
+            # Possibly a rotated key: ask the refresher to look again
+            self._wake.set()
+        return key
+
+    def refresh(self):
+        import httpx
+
+        try:
+            response = httpx.get(self.url, headers={"apikey": SUPABASE_ANON_KEY}, timeout=5.0)
+            response.raise_for_status()
+            keys = {k["kid"]: k for k in response.json().get("keys", []) if k.get("kid")}
+        except Exception:
+            # Keep serving the keys we already have
+            return
+        finally:
+            self._last_refresh = time.monotonic()
+
+        with self._lock:
+            self._keys = keys
+
+    def _ensure_started(self):
+        # Never fetch on the caller's thread (it may be the event loop);
+        # tokens seen before the first fetch lands go to Supabase.
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="jwks-refresh", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        self.refresh()
+        while True:
+            self._wake.wait(self.refresh_seconds)
+            self._wake.clear()
+            gap = time.monotonic() - self._last_refresh
+            if gap < self.MIN_REFRESH_GAP_SECONDS:
+                time.sleep(self.MIN_REFRESH_GAP_SECONDS - gap)
+            self.refresh()
+
+
+jwks_cache = JWKSCache(SUPABASE_JWKS_URL, SUPABASE_JWKS_REFRESH_SECONDS)
+
+
+def _invalid_token():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid Supabase token",
+    )
+
+
+def _verify_locally(token: str):
+    """
+    Checks signature, expiry, audience and issuer without a network call.
+    Returns None when the token can only be judged by Supabase itself
+    (unknown kid, no shared secret or issuer configured, no email claim).
+    """
     try:
-        response = supabase.auth.get_user(token)
+        header = jwt.get_unverified_header(token)
+    except JWTError:
+        raise _invalid_token()
+
+    algorithm = header.get("alg")
+    if algorithm not in ALLOWED_ALGORITHMS:
+        raise _invalid_token()
+
+    if algorithm == "HS256":
+        key = SUPABASE_JWT_SECRET
+    else:
+        key = jwks_cache.get(header.get("kid"))
+
+    if not key or not SUPABASE_JWT_ISSUER:
+        return None
+
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=SUPABASE_JWT_AUDIENCE,
+            issuer=SUPABASE_JWT_ISSUER,
+        )
+    except JWTError:
+        raise _invalid_token()
+
+    user = TokenUser(claims)
+    if not user.email:
+        return None
+
+    return user
+
+
+def _get_user_remote(token: str):
+    try:
+        response = get_supabase_client().auth.get_user(token)
 
         if not response or not response.user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid Supabase token",
-            )
+            raise _invalid_token()
 
         return response.user
 
     except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid Supabase token",
-        )
+        raise _invalid_token()
+
+
+def verify_token_locally(token: str):
+    """
+    The no-I/O part of get_user_from_token, safe to call from async code.
+    None means the token has to be checked by Supabase.
+    """
+    if SUPABASE_AUTH_MODE != "local":
+        return None
+
+    return _verify_locally(token)
+
+
+def get_user_from_token(token: str):
+    user = verify_token_locally(token)
+    if user is not None:
+        return user
+
+    return _get_user_remote(token)
@@ -1,22 +1,55 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-load_dotenv(dotenv_path=".env") 
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, Session
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True
-)
+# Connection pool tuning. Defaults match SQLAlchemy's own.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Per-statement server-side limit in milliseconds, 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# Optional read replica for reports, dashboards and drilldowns
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "30"))
+DB_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "5"))
+
+
+def create_db_engine(url: str):
+    """
+    The one place engines are built, so every router shares the same
+    pool settings.
+    """
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+        connect_args=connect_args,
+    )
+
+
+engine = create_db_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
-from sqlalchemy.orm import Session
+
 
 def get_db() -> Session:
     db = SessionLocal()
@@ -26,3 +59,165 @@ def get_db() -> Session:
         db.close()
 
 
+def create_async_db_engine(url: str):
+    """
+    Async (asyncpg) twin of create_db_engine for the read-heavy endpoints.
+    asyncpg takes ssl and server settings as connect args, not URL options.
+    """
+    async_url = make_url(url).set(drivername="postgresql+asyncpg")
+    query = dict(async_url.query)
+    connect_args = {}
+
+    sslmode = query.pop("sslmode", None)
+    if sslmode:
+        connect_args["ssl"] = sslmode
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+
+    return create_async_engine(
+        async_url.set(query=query),
+        pool_pre_ping=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+        connect_args=connect_args,
+    )
+
+
+async_engine = create_async_db_engine(DATABASE_URL)
+
+# expire_on_commit=False: attributes must stay loaded, lazy loads are not
+# possible once the response is being serialized.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+replica_engine = create_db_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+async_replica_engine = create_async_db_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+
+ReplicaSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=replica_engine
+)
+
+AsyncReplicaSessionLocal = async_sessionmaker(
+    bind=async_replica_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Zero when the replica has replayed everything it received, otherwise the
+# age of the last replayed transaction. NULL (not a standby) counts as fresh.
+REPLICA_LAG_SQL = text(
+    "SELECT COALESCE(CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END, 0)"
+)
+
+
+class ReplicaLagGuard:
+    """
+    Remembers the replica's replication lag for a few seconds so routing a
+    request never costs an extra probe query. Any probe error sends reads
+    to the primary until the next check.
+    """
+
+    def __init__(self, max_lag_seconds: float, check_every_seconds: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_every_seconds = check_every_seconds
+        self.lag_seconds = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.check_every_seconds
+
+    def _record(self, lag):
+        self.lag_seconds = float(lag) if lag is not None else None
+        self._checked_at = time.monotonic()
+
+    def _fresh(self) -> bool:
+        return self.lag_seconds is not None and self.lag_seconds <= self.max_lag_seconds
+
+    def is_fresh(self) -> bool:
+        if self._due() and self._lock.acquire(blocking=False):
+            try:
+                with replica_engine.connect() as conn:
+                    self._record(conn.execute(REPLICA_LAG_SQL).scalar())
+            except Exception:
+                self._record(None)
+            finally:
+                self._lock.release()
+        return self._fresh()
+
+    async def is_fresh_async(self) -> bool:
+        if self._due() and self._lock.acquire(blocking=False):
+            try:
+                async with async_replica_engine.connect() as conn:
+                    self._record((await conn.execute(REPLICA_LAG_SQL)).scalar())
+            except Exception:
+                self._record(None)
+            finally:
+                self._lock.release()
+        return self._fresh()
+
+
+replica_guard = ReplicaLagGuard(DB_REPLICA_MAX_LAG_SECONDS, DB_REPLICA_LAG_CHECK_SECONDS)
+
+
+def read_session() -> Session:
+    """
+    A new session on the replica when one is configured and within the lag
+    threshold, on the primary otherwise. For code outside a request
+    (background refreshes); endpoints use get_read_db.
+    """
+    if replica_engine is not None and replica_guard.is_fresh():
+        return ReplicaSessionLocal()
+    return SessionLocal()
+
+
+def get_read_db() -> Session:
+    """
+    For read-only endpoints. Uses the replica when one is configured and
+    within the lag threshold, the primary otherwise. Anything that writes,
+    or must see the caller's own writes (clock-in -> /time/current), keeps
+    using get_db.
+    """
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db() -> AsyncSession:
+    """Async twin of get_read_db."""
+    if async_replica_engine is not None and await replica_guard.is_fresh_async():
+        session_factory = AsyncReplicaSessionLocal
+    else:
+        session_factory = AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
+
+
+def get_pool_status(bind=engine) -> dict:
+    pool = bind.pool
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS,
+    }
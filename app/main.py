@@ -1,16 +1,32 @@
+from dotenv import load_dotenv
+# The only .env load: app modules read their settings at import time
+load_dotenv()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 # from app.middlewares.auth import auth_middleware
+from app.middlewares.compression import CompressionMiddleware
 from app.api.admin import users, projects
 from app.api.admin import shifts
 from app.api.admin import projects_daily
-from dotenv import load_dotenv
 from app.api import analytics
 from app.api import reports
-load_dotenv()
+from app.api import jobs
+from app.services.job_runner import job_runner
+from app.services.analytics_recompute import recompute_debouncer
 
 
-app = FastAPI(title="Resource Management System")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_runner.recover()
+    yield
+    # Queue the partitions still waiting out their debounce; recover() runs them
+    recompute_debouncer.flush()
+    job_runner.shutdown()
+
+
+app = FastAPI(title="Resource Management System", lifespan=lifespan)
 
 # app.middleware("http")(auth_middleware)
 
@@ -21,6 +37,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip (zstd/br when installed) for JSON lists and report exports
+app.add_middleware(CompressionMiddleware)
+
 app.include_router(users.router)
 app.include_router(projects.router)
 # app.include_router(auth.router)
@@ -61,6 +80,7 @@ from app.api.admin import attendance_request_approvals
 app.include_router(attendance_request_approvals.router)
 app.include_router(analytics.router)
 app.include_router(reports.router)
+app.include_router(jobs.router)
 
 from app.api.admin import router as admin_router
 from app.api.admin import role_drilldown
@@ -68,3 +88,6 @@ from app.api.admin import role_drilldown
 app.include_router(admin_router)
 app.include_router(role_drilldown.router)
 
+
+from app.api.admin import system
+app.include_router(system.router)
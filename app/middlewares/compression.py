@@ -0,0 +1,193 @@
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Bodies smaller than this are sent as they are
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+
+# Parquet is compressed already; event streams must reach the client per event
+COMPRESSIBLE_TYPES = (
+    "text/csv",
+    "text/plain",
+    "text/html",
+    "application/json",
+    "application/vnd.apache.arrow.file",
+)
+
+
+class _Gzip:
+    def __init__(self):
+        self._z = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self):
+        import brotli
+        self._c = brotli.Compressor(quality=5)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        import zstandard
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._c = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+def _available_encoders() -> dict:
+    """Content-coding -> encoder, best first. brotli / zstandard are optional."""
+    encoders = {}
+    try:
+        import zstandard  # noqa: F401
+        encoders["zstd"] = _Zstd
+    except ImportError:
+        pass
+    try:
+        import brotli  # noqa: F401
+        encoders["br"] = _Brotli
+    except ImportError:
+        pass
+    encoders["gzip"] = _Gzip
+    return encoders
+
+
+ENCODERS = _available_encoders()
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The best coding we support that the client accepts (q > 0), if any."""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            accepted[coding] = q
+
+    wildcard = accepted.get("*", 0.0)
+    candidates = [c for c in ENCODERS if accepted.get(c, wildcard) > 0]
+    if not candidates:
+        return None
+    # Client preference first, then ours
+    return max(candidates, key=lambda c: accepted.get(c, wildcard))
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON/CSV/Arrow responses with the negotiated Content-Encoding
+    (zstd or br when the packages are installed, gzip otherwise). Bodies
+    under `minimum_size` are left alone. Streaming responses are compressed
+    chunk by chunk and flushed after each one, so a long export still
+    reaches the client progressively.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSend(send, coding, self.minimum_size))
+
+
+class _CompressingSend:
+    def __init__(self, send: Send, coding: str, minimum_size: int):
+        self.send = send
+        self.coding = coding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            if not self._eligible(headers) or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            self.encoder = ENCODERS[self.coding]()
+            headers["Content-Encoding"] = self.coding
+            headers.add_vary_header("Accept-Encoding")
+            # The representation changed, so the validator can only be weak
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+
+            if not more_body:
+                data = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(data))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": data})
+                return
+
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self.send(self.start)
+
+        data = self.encoder.compress(body)
+        data += self.encoder.flush() if more_body else self.encoder.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        if self.start["status"] < 200 or self.start["status"] in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return media_type in COMPRESSIBLE_TYPES
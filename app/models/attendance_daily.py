@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Integer, ForeignKey,Numeric, DateTime, Date, Text
+from sqlalchemy import Column, String, Integer, ForeignKey,Numeric, DateTime, Date, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -8,6 +8,11 @@ from app.db.base import Base
 class AttendanceDaily(Base):
 
     __tablename__ = "attendance_daily"
+    __table_args__ = (
+        # One roster row per user per day: the upsert target of
+        # app.services.attendance_materializer
+        UniqueConstraint("user_id", "attendance_date", name="uq_attendance_daily_user_date"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Integer, ForeignKey,Numeric, DateTime, Date, Text
+from sqlalchemy import Column, String, Integer, ForeignKey,Numeric, DateTime, Date, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -7,6 +7,23 @@ from app.db.base import Base
 
 class TimeHistory(Base):
     __tablename__ = "history"
+    __table_args__ = (
+        # Open sessions only: the live dashboard and the clock-in/out lookups
+        Index(
+            "ix_history_open_sessions",
+            "user_id",
+            postgresql_where=text("clock_out_at IS NULL"),
+        ),
+        # The approvals inbox: pending completed sessions, newest clock-in first
+        Index(
+            "ix_history_pending_approvals",
+            "clock_in_at",
+            "id",
+            postgresql_where=text("status = 'PENDING' AND clock_out_at IS NOT NULL"),
+        ),
+        # A user's own history, newest clock-in first
+        Index("ix_history_user_clock_in", "user_id", "clock_in_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -0,0 +1,56 @@
+import uuid
+import enum
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Index, Enum as SqEnum, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+class Job(Base):
+    """
+    Background work queued through app.services.job_runner. `params_hash`
+    identifies identical requests so a second click joins the first job.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # At most one PENDING/RUNNING job per (kind, params): the enqueue conflict target
+        Index(
+            "uq_jobs_active_kind_params",
+            "kind",
+            "params_hash",
+            unique=True,
+            postgresql_where=text("status IN ('PENDING', 'RUNNING')"),
+        ),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    kind = Column(String, nullable=False)          # e.g. "analytics.calculate_daily"
+    params = Column(JSONB, nullable=False)
+    params_hash = Column(String(64), nullable=False)
+
+    status = Column(SqEnum(JobStatus, name="job_status"), nullable=False, default=JobStatus.PENDING)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Report jobs: the generated file lives at job_runner.artifact_path(id)
+    artifact_name = Column(String, nullable=True)
+    artifact_media_type = Column(String, nullable=True)
+
+    created_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # Refreshed by the process running the job; a stale one means it died
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
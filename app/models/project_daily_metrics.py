@@ -1,6 +1,7 @@
 import uuid
-from sqlalchemy import Column, String, Integer, Date, ForeignKey, Numeric
+from sqlalchemy import Column, String, Integer, Date, ForeignKey, Numeric, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.types import TIMESTAMP
 
@@ -8,16 +9,22 @@ from sqlalchemy.types import TIMESTAMP
 from app.db.base import Base 
 
 class ProjectDailyMetrics(Base):
+    """
+    Written only by app.services.project_metrics_service.rollup_project_metrics:
+    one row per work_role plus the AGGREGATE row, per project and day.
+    """
     __tablename__ = "project_daily_metrics"
     
-    # 🔴 THIS LINE FIXES YOUR ERROR
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        UniqueConstraint("project_id", "metric_date", "work_role", name="uq_project_daily_metrics_project_date_role"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
     
     metric_date = Column(Date, nullable=False)
+    # Grouping by Role (e.g. "How did ANNOTATION team do vs QC team?"), or AGGREGATE
     work_role = Column(String, nullable=False, default="AGGREGATE")
     
     # Aggregated Stats
@@ -34,4 +41,7 @@ class ProjectDailyMetrics(Base):
         TIMESTAMP(timezone=True),
         server_default=func.now(),
         onupdate=func.now(),
-    )
\ No newline at end of file
+    )
+
+    # Relationships
+    project = relationship("Project")
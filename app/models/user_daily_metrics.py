@@ -1,6 +1,6 @@
 import uuid
 from sqlalchemy import (
-    Column, String, Integer, Text, Date, Numeric, ForeignKey
+    Column, String, Integer, Text, Date, Numeric, ForeignKey, UniqueConstraint, Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
@@ -11,6 +11,12 @@ from app.db.base import Base
 
 class UserDailyMetrics(Base):
     __tablename__ = "user_daily_metrics"
+    # Conflict target of the analytics bulk upsert
+    __table_args__ = (
+        UniqueConstraint("user_id", "project_id", "metric_date", name="uq_user_daily_metrics_user_project_date"),
+        # Project-wide reads: project history report, daily scorecard
+        Index("ix_user_daily_metrics_project_date", "project_id", "metric_date"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
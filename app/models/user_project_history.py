@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Date, Integer, Numeric, ForeignKey, String
+from sqlalchemy import Column, Date, Integer, Numeric, ForeignKey, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 import uuid
 
 class UserProjectHistory(Base):
     __tablename__ = "user_project_history"
+    __table_args__ = (
+        UniqueConstraint("user_id", "project_id", name="uq_user_project_history_user_project"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
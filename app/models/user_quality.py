@@ -1,6 +1,6 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Numeric, Enum as SqEnum, Text
+from sqlalchemy import Column, String, Boolean, Date, DateTime, ForeignKey, Numeric, Enum as SqEnum, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -14,6 +14,12 @@ class QualityRating(str, enum.Enum):
 
 class UserQuality(Base):
     __tablename__ = "user_quality"
+    __table_args__ = (
+        # Point-in-time lookups (app.services.user_quality_service.rating_as_of)
+        Index("ix_user_quality_user_project_valid_from", "user_id", "project_id", "valid_from"),
+        # Versions graded from one partition, for reverting them on rejection
+        Index("ix_user_quality_project_metric_date", "project_id", "metric_date"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -27,6 +33,8 @@ class UserQuality(Base):
     quality_score = Column(Numeric(5, 2), nullable=True)
     notes = Column(Text, nullable=True)
     source = Column(String, nullable=False, default="MANUAL")
+    # AUTO_CALC versions: the day whose work was graded
+    metric_date = Column(Date, nullable=True)
     
     assessed_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     assessed_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
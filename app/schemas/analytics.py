@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import date
+from typing import Optional
+
+# Input: "Grade these projects (or all active ones) for every day in the range"
+class CalculateRangeRequest(BaseModel):
+    project_ids: Optional[list[UUID]] = None
+    start_date: date
+    end_date: date
+
+# Output: one entry per (project, date) partition
+class PartitionResult(BaseModel):
+    project_id: UUID
+    calculation_date: date
+    status: str                      # Success / Skipped / Failed
+    processed_users: int = 0
+    elapsed_ms: float
+    error: Optional[str] = None
+
+class CalculateRangeResponse(BaseModel):
+    partitions_total: int
+    succeeded: int
+    skipped: int
+    failed: int
+    elapsed_ms: float
+    partitions: list[PartitionResult]
+
+# Parameters of the "analytics.calculate_daily" background job
+class CalculateDailyParams(BaseModel):
+    project_id: UUID
+    calculation_date: date
+
+# Parameters of the "analytics.calculate_all" background job (nightly run)
+class CalculateAllParams(BaseModel):
+    calculation_date: date
+    project_ids: Optional[list[UUID]] = None
@@ -30,4 +30,10 @@ class PendingApprovalResponse(BaseModel):
     clock_in: datetime
     clock_out: Optional[datetime]
     tasks_completed: int
-    duration_minutes: float
\ No newline at end of file
+    duration_minutes: float
+
+# 4. One page of the inbox (keyset-paginated)
+class PendingApprovalPage(BaseModel):
+    items: list[PendingApprovalResponse]
+    total: int
+    next_cursor: Optional[str] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime, date
 from typing import Optional
@@ -35,7 +35,56 @@ class TimeHistoryResponse(BaseModel):
     
     class Config:
         from_attributes = True
+# 4. /time/history rows: only the requested `fields` are present
+class TimeHistoryItem(BaseModel):
+    id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
+    project_id: Optional[UUID] = None
+    work_role: Optional[str] = None
+    status: Optional[str] = None
+    minutes_worked: Optional[float] = None
+    sheet_date: Optional[date] = None
+    clock_in_at: Optional[datetime] = None
+    clock_out_at: Optional[datetime] = None
+    tasks_completed: Optional[int] = None
+    notes: Optional[str] = None
+    project_name: Optional[str] = None
+
+# 5. One page of /time/history (keyset-paginated)
+class TimeHistoryPage(BaseModel):
+    items: list[TimeHistoryItem]
+    next_cursor: Optional[str] = None
+
+# 6. /time/history/summary: totals per day, project and role
+class TimeHistoryDaySummary(BaseModel):
+    sheet_date: date
+    project_id: UUID
+    project_name: Optional[str] = None
+    work_role: str
+    sessions: int
+    minutes_worked: float
+    tasks_completed: int
+
 # Add this class to your existing file
 class ApprovalRequest(BaseModel):
     status: str  # Must be "APPROVED" or "REJECTED"
-    approval_comment: Optional[str] = None
\ No newline at end of file
+    approval_comment: Optional[str] = None
+
+# Bulk approve/reject: either `history_ids` or the filters pick the sessions
+class BulkApprovalRequest(BaseModel):
+    status: str  # Must be "APPROVED" or "REJECTED"
+    approval_comment: Optional[str] = None
+    history_ids: Optional[list[UUID]] = Field(default=None, max_length=1000)
+    project_id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+class BulkApprovalResult(BaseModel):
+    history_id: UUID
+    outcome: str  # "updated", "not_found", "not_pending" or "not_clocked_out"
+
+class BulkApprovalResponse(BaseModel):
+    status: str
+    updated: int
+    results: list[BulkApprovalResult]
@@ -0,0 +1,55 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import date, datetime
+from typing import Any, Optional
+
+from app.schemas.report import ReportFormat
+
+# Input: "Run this in the background", e.g.
+# {"kind": "analytics.calculate_daily", "params": {"project_id": ..., "calculation_date": ...}}
+class JobCreate(BaseModel):
+    kind: str
+    params: dict[str, Any] = {}
+
+# Output: what the polling client sees
+class JobResponse(BaseModel):
+    id: UUID
+    kind: str
+    params: dict[str, Any]
+    status: str
+    progress_done: int
+    progress_total: Optional[int] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    has_artifact: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    elapsed_seconds: Optional[float] = None
+    # True when an identical PENDING/RUNNING job was returned instead of a new one
+    deduplicated: bool = False
+
+
+# --- Parameters of the report job kinds (mirror the /reports query params) ---
+class ProjectDailyReportParams(BaseModel):
+    project_id: UUID
+    report_date: date
+    format: ReportFormat = ReportFormat.CSV
+
+class RoleDrilldownReportParams(BaseModel):
+    project_id: UUID
+    report_date: date
+    format: ReportFormat = ReportFormat.CSV
+
+class ProjectHistoryReportParams(BaseModel):
+    project_id: UUID
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    role: Optional[str] = None
+    format: ReportFormat = ReportFormat.CSV
+
+class UserPerformanceReportParams(BaseModel):
+    user_id: UUID
+    start_date: date
+    end_date: date
+    format: ReportFormat = ReportFormat.CSV
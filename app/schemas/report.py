@@ -0,0 +1,8 @@
+import enum
+
+
+# ?format= of the /reports endpoints and the report job kinds
+class ReportFormat(str, enum.Enum):
+    CSV = "csv"
+    PARQUET = "parquet"   # typed columnar file, one row group per batch
+    ARROW = "arrow"       # Arrow IPC file, one record batch per batch
@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+import time
+from datetime import date
+from uuid import UUID
+
+from app.db.session import SessionLocal
+from app.models.job import JobStatus
+from app.services.job_runner import job_runner
+
+logger = logging.getLogger(__name__)
+
+# How long a partition must stay quiet before it is recomputed; a manager
+# approving a whole day's sessions one by one triggers a single run.
+ANALYTICS_RECOMPUTE_DEBOUNCE_SECONDS = float(os.getenv("ANALYTICS_RECOMPUTE_DEBOUNCE_SECONDS", "30"))
+
+
+class PartitionDebouncer:
+    """
+    Collects dirty (project_id, sheet_date) partitions and hands each one
+    to `on_due` once it has not been marked again for `delay` seconds.
+    The timer thread starts on the first mark.
+    """
+
+    def __init__(self, delay: float, on_due):
+        self.delay = delay
+        self.on_due = on_due
+        self._due = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def mark(self, project_id: UUID, sheet_date: date):
+        with self._lock:
+            self._due[(project_id, sheet_date)] = time.monotonic() + self.delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="analytics-recompute", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._due)
+
+    def flush(self):
+        """Hands over every dirty partition now, e.g. on shutdown."""
+        with self._lock:
+            keys = list(self._due)
+            self._due.clear()
+        for key in keys:
+            self._emit(key)
+
+    def _pop_due(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [key for key, deadline in self._due.items() if deadline <= now]
+            for key in due:
+                del self._due[key]
+            next_deadline = min(self._due.values(), default=None)
+        return due, next_deadline
+
+    def _emit(self, key):
+        try:
+            self.on_due(key)
+        except Exception:
+            logger.exception("Could not queue analytics recompute for %s", key)
+
+    def _run(self):
+        while True:
+            due, next_deadline = self._pop_due()
+            for key in due:
+                self._emit(key)
+
+            timeout = None if next_deadline is None else max(next_deadline - time.monotonic(), 0)
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+
+def _queue_recompute(key):
+    project_id, sheet_date = key
+    with SessionLocal() as db:
+        job, created = job_runner.enqueue(
+            db,
+            "analytics.recompute_partition",
+            {"project_id": project_id, "calculation_date": sheet_date},
+        )
+        running = not created and job.status == JobStatus.RUNNING
+
+    if running:
+        # That run may have read time_history before this change: go again
+        recompute_debouncer.mark(project_id, sheet_date)
+
+
+recompute_debouncer = PartitionDebouncer(ANALYTICS_RECOMPUTE_DEBOUNCE_SECONDS, _queue_recompute)
+
+
+def mark_partition_dirty(project_id: UUID, sheet_date: date):
+    """Call after a commit that changes which sessions of a day are APPROVED."""
+    recompute_debouncer.mark(project_id, sheet_date)
@@ -0,0 +1,539 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update, delete, exists, cast, literal, or_, bindparam, Date, Float, Integer, String
+from sqlalchemy.dialects.postgresql import insert, ARRAY, UUID as PG_UUID
+from datetime import date, timedelta
+from typing import Callable, Optional
+from uuid import UUID
+
+from app.db.session import SessionLocal
+
+from app.models.history import TimeHistory
+from app.models.user_daily_metrics import UserDailyMetrics
+from app.models.project_daily_metrics import ProjectDailyMetrics
+from app.models.user_project_history import UserProjectHistory
+from app.models.project_members import ProjectMember
+from app.models.user_quality import UserQuality, QualityRating
+from app.models.user import User
+from app.models.project import Project
+from app.services.project_metrics_service import rollup_project_metrics
+from app.services.report_cache import invalidate_reports
+
+# Rating bands: above the project average is GOOD, under 70% of it is BAD
+BAD_THRESHOLD_RATIO = 0.70
+SCORES = {
+    QualityRating.GOOD: 10.0,
+    QualityRating.AVERAGE: 7.0,
+    QualityRating.BAD: 3.0,
+}
+
+# Each worker holds its own pooled connection, keep this under DB_POOL_SIZE
+ANALYTICS_MAX_WORKERS = int(os.getenv("ANALYTICS_MAX_WORKERS", "4"))
+ANALYTICS_MAX_RANGE_DAYS = int(os.getenv("ANALYTICS_MAX_RANGE_DAYS", "92"))
+# Seed of the per-project advisory lock keys taken by write_grades
+ANALYTICS_LOCK_NAMESPACE = 0x616E616C
+
+
+def _unnest(**columns):
+    """
+    FROM clause over parallel arrays: unnest(:a, :b, ...) AS g(a, b, ...).
+    The bulk writes ship each column as one array parameter and join on
+    it, so statement count and plan shape do not grow with the row count.
+    Pass name=(sql_type, values), values being a list or a pandas Series.
+    """
+    arrays = [
+        bindparam(name, values.tolist() if hasattr(values, "tolist") else list(values), type_=ARRAY(sql_type))
+        for name, (sql_type, values) in columns.items()
+    ]
+    return func.unnest(*arrays).table_valued(*columns).render_derived(name="g")
+
+
+# ------------------------------------------------------------------
+# GRADING ENGINE
+# ------------------------------------------------------------------
+def grade_day(db: Session, calculation_date: date, project_ids: Optional[list[UUID]] = None):
+    """
+    Loads the day's APPROVED time_history as one aggregate per
+    (project, user) and grades it with grouped NumPy operations.
+
+    Returns (users, projects) DataFrames: one row per graded user with
+    rating/score, one row per project with its benchmarks. Both are empty
+    when nobody has approved work.
+    """
+    import numpy as np
+    import pandas as pd  # deferred: only the analytics engine needs them
+
+    # Each user's role on the project; grouped once and hash-joined rather
+    # than looked up per row
+    member_role = (
+        select(
+            ProjectMember.project_id,
+            ProjectMember.user_id,
+            func.min(ProjectMember.work_role).label("work_role"),
+        )
+        .group_by(ProjectMember.project_id, ProjectMember.user_id)
+    )
+    if project_ids is not None:
+        member_role = member_role.where(ProjectMember.project_id.in_(project_ids))
+    member_role = member_role.subquery()
+
+    stmt = (
+        select(
+            TimeHistory.project_id,
+            TimeHistory.user_id,
+            User.name.label("user_name"),
+            func.coalesce(func.sum(TimeHistory.minutes_worked), 0).label("total_mins"),
+            func.sum(TimeHistory.tasks_completed).label("total_tasks"),
+            func.coalesce(member_role.c.work_role, "UNKNOWN").label("work_role"),
+        )
+        .join(User, TimeHistory.user_id == User.id)
+        .outerjoin(
+            member_role,
+            (member_role.c.project_id == TimeHistory.project_id)
+            & (member_role.c.user_id == TimeHistory.user_id),
+        )
+        .where(
+            TimeHistory.sheet_date == calculation_date,
+            TimeHistory.status == "APPROVED",
+        )
+        .group_by(TimeHistory.project_id, TimeHistory.user_id, User.name, member_role.c.work_role)
+    )
+    if project_ids is not None:
+        stmt = stmt.where(TimeHistory.project_id.in_(project_ids))
+
+    result = db.execute(stmt)
+    users = pd.DataFrame(result.all(), columns=list(result.keys()))
+    if users.empty:
+        return users, pd.DataFrame()
+
+    users["total_tasks"] = users["total_tasks"].astype("int64")
+    users["hours"] = users["total_mins"].astype("float64") / 60
+
+    # Per-project benchmarks broadcast back onto every user row
+    by_project = users.groupby("project_id", sort=False)
+    users["avg_tasks"] = by_project["total_tasks"].transform("mean")
+    users["bad_threshold"] = users["avg_tasks"] * BAD_THRESHOLD_RATIO
+
+    tasks = users["total_tasks"].to_numpy()
+    users["rating"] = np.select(
+        [tasks > users["avg_tasks"].to_numpy(), tasks < users["bad_threshold"].to_numpy()],
+        [QualityRating.GOOD.value, QualityRating.BAD.value],
+        default=QualityRating.AVERAGE.value,
+    )
+    users["score"] = users["rating"].map({rating.value: score for rating, score in SCORES.items()})
+
+    projects = users.groupby("project_id", sort=False).agg(
+        tasks_completed=("total_tasks", "sum"),
+        active_users_count=("user_id", "size"),
+        total_hours_worked=("hours", "sum"),
+        avg_productivity_score=("score", "mean"),
+        avg_hours_worked_per_user=("hours", "mean"),
+        avg_tasks=("avg_tasks", "first"),
+        bad_threshold=("bad_threshold", "first"),
+    ).reset_index()
+
+    return users, projects
+
+
+def _user_columns(users) -> dict:
+    return dict(
+        user_id=(PG_UUID(as_uuid=True), users["user_id"]),
+        project_id=(PG_UUID(as_uuid=True), users["project_id"]),
+        work_role=(String, users["work_role"]),
+    )
+
+
+def _grade_columns(users) -> dict:
+    return dict(
+        **_user_columns(users),
+        rating=(String, users["rating"]),
+        quality_score=(Float, users["score"]),
+    )
+
+
+def write_grades(db: Session, calculation_date: date, users, project_ids: Optional[list[UUID]] = None):
+    """
+    Bulk-writes grade_day() output: user daily metrics, the project metrics
+    rollup, the user_quality SCD2 versions and user_project_history. A
+    fixed handful of statements whatever the size of the day. Pass the
+    project_ids given to grade_day. Does not commit.
+    """
+    metric_date = literal(calculation_date, Date)
+
+    # Writers of the same project take turns until commit: the user_quality
+    # close/open below must see the versions another day's pass just opened
+    _lock_projects(db, set(users["project_id"]))
+
+    # --- User Daily Metrics ---
+    g = _unnest(
+        **_user_columns(users),
+        hours_worked=(Float, users["hours"]),
+        tasks_completed=(Integer, users["total_tasks"]),
+        productivity_score=(Float, users["score"]),
+    )
+    stmt = insert(UserDailyMetrics).from_select(
+        ["id", "user_id", "project_id", "metric_date", "work_role",
+         "hours_worked", "tasks_completed", "productivity_score"],
+        select(
+            func.gen_random_uuid(), g.c.user_id, g.c.project_id, metric_date, g.c.work_role,
+            g.c.hours_worked, g.c.tasks_completed, g.c.productivity_score,
+        ),
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "project_id", "metric_date"],
+        set_={
+            "hours_worked": stmt.excluded.hours_worked,
+            "tasks_completed": stmt.excluded.tasks_completed,
+            "productivity_score": stmt.excluded.productivity_score,
+            "updated_at": func.now(),
+        },
+    ))
+
+    # --- Project Metrics (per-role rows + AGGREGATE), reads the scores above ---
+    rollup_project_metrics(db, calculation_date, project_ids=project_ids)
+
+    # --- Quality (SCD Type 2 Versioning) ---
+    _version_user_quality(db, calculation_date, users)
+
+    # --- History (Last Worked Date) ---
+    g = _unnest(**_user_columns(users))
+    stmt = insert(UserProjectHistory).from_select(
+        ["id", "user_id", "project_id", "work_role", "first_worked_date", "last_worked_date"],
+        select(func.gen_random_uuid(), g.c.user_id, g.c.project_id, g.c.work_role, metric_date, metric_date),
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "project_id"],
+        # Recomputing an older day never moves it backwards
+        set_={"last_worked_date": func.greatest(UserProjectHistory.last_worked_date, stmt.excluded.last_worked_date)},
+    ))
+
+
+def _lock_projects(db: Session, project_ids):
+    """Transaction-level advisory locks on the projects, in a fixed order."""
+    for project_id in sorted(project_ids, key=str):
+        db.execute(select(func.pg_advisory_xact_lock(
+            func.hashtextextended(literal(str(project_id), String), ANALYTICS_LOCK_NAMESPACE)
+        )))
+
+
+def calculate_daily_productivity(db: Session, project_id: UUID, calculation_date: date) -> dict:
+    """
+    Grades every user with APPROVED work on the project that day.
+
+    The number of statements does not depend on how many users worked:
+    one aggregate read, then bulk upserts for the metrics, the SCD2
+    close/open of user_quality and user_project_history.
+    """
+    users, projects = grade_day(db, calculation_date, project_ids=[project_id])
+
+    if users.empty:
+        return {"status": "Skipped", "message": "No APPROVED work logs found.", "processed": 0}
+
+    write_grades(db, calculation_date, users, project_ids=[project_id])
+    db.commit()
+    invalidate_reports(project_id, calculation_date)
+
+    project = projects.iloc[0]
+    return {
+        "status": "Success",
+        "project_avg_tasks": round(float(project["avg_tasks"]), 2),
+        "bad_threshold": round(float(project["bad_threshold"]), 2),
+        "processed_users": len(users),
+        "details": [
+            {
+                "user_name": u["user_name"],
+                "tasks": int(u["total_tasks"]),
+                "score": float(u["score"]),
+                "rating": u["rating"],
+            }
+            for u in users.to_dict("records")
+        ],
+    }
+
+
+def calculate_all_projects(db: Session, calculation_date: date, project_ids: Optional[list[UUID]] = None) -> dict:
+    """
+    The nightly pass: grades every project with approved work that day
+    in one read, one vectorized grading step and one set of bulk writes.
+    """
+    started = time.perf_counter()
+
+    users, projects = grade_day(db, calculation_date, project_ids=project_ids)
+    if users.empty:
+        return {"status": "Skipped", "message": "No APPROVED work logs found.", "processed": 0}
+
+    write_grades(db, calculation_date, users, project_ids=project_ids)
+    db.commit()
+    for project_id in projects["project_id"]:
+        invalidate_reports(project_id, calculation_date)
+
+    return {
+        "status": "Success",
+        "calculation_date": calculation_date,
+        "projects_processed": len(projects),
+        "processed_users": len(users),
+        "elapsed_ms": _elapsed_ms(started),
+        "projects": [
+            {
+                "project_id": p["project_id"],
+                "active_users": int(p["active_users_count"]),
+                "project_avg_tasks": round(float(p["avg_tasks"]), 2),
+                "bad_threshold": round(float(p["bad_threshold"]), 2),
+                "avg_productivity_score": round(float(p["avg_productivity_score"]), 2),
+            }
+            for p in projects.to_dict("records")
+        ],
+    }
+
+
+def recalculate_partition(db: Session, project_id: UUID, calculation_date: date) -> dict:
+    """
+    calculate_daily_productivity for a partition whose approvals changed.
+    What was graded for users who no longer have APPROVED work that day
+    (the session was rejected) is undone first, so the partition matches
+    time_history: their metrics and the rating versions opened from the
+    day, and the project rows once nobody is left.
+    """
+    approved = select(TimeHistory.user_id).where(
+        TimeHistory.project_id == project_id,
+        TimeHistory.sheet_date == calculation_date,
+        TimeHistory.status == "APPROVED",
+    )
+
+    _lock_projects(db, [project_id])
+    _revert_user_quality(db, project_id, calculation_date, approved)
+
+    db.execute(
+        delete(UserDailyMetrics)
+        .where(
+            UserDailyMetrics.project_id == project_id,
+            UserDailyMetrics.metric_date == calculation_date,
+            UserDailyMetrics.user_id.not_in(approved),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(ProjectDailyMetrics)
+        .where(
+            ProjectDailyMetrics.project_id == project_id,
+            ProjectDailyMetrics.metric_date == calculation_date,
+            ~exists(approved),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    result = calculate_daily_productivity(db, project_id, calculation_date)
+    # A Skipped run returns before committing
+    db.commit()
+    invalidate_reports(project_id, calculation_date)
+    return result
+
+
+def _revert_user_quality(db: Session, project_id: UUID, calculation_date: date, approved):
+    """
+    Deletes the AUTO_CALC versions graded from calculation_date for users
+    outside `approved`, then relinks each touched chain: every version
+    ends where the next one starts and the last one is current again. A
+    user whose only rating came from that day is left without one.
+    """
+    removed = db.scalars(
+        delete(UserQuality)
+        .where(
+            UserQuality.project_id == project_id,
+            UserQuality.metric_date == calculation_date,
+            UserQuality.source == "AUTO_CALC",
+            UserQuality.user_id.not_in(approved),
+        )
+        .returning(UserQuality.user_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not removed:
+        return
+
+    chain = (
+        select(
+            UserQuality.id,
+            func.lead(UserQuality.valid_from)
+            .over(partition_by=UserQuality.user_id, order_by=UserQuality.valid_from)
+            .label("next_from"),
+        )
+        .where(UserQuality.project_id == project_id, UserQuality.user_id.in_(set(removed)))
+        .subquery()
+    )
+    db.execute(
+        update(UserQuality)
+        .where(
+            UserQuality.id == chain.c.id,
+            or_(
+                UserQuality.valid_to.is_distinct_from(chain.c.next_from),
+                UserQuality.is_current != chain.c.next_from.is_(None),
+            ),
+        )
+        .values(valid_to=chain.c.next_from, is_current=chain.c.next_from.is_(None))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _version_user_quality(db: Session, calculation_date: date, users):
+    """
+    A current rating that was already written on calculation_date is
+    overwritten in place; any older current rating is closed and a new
+    version is opened. One UPDATE each, one INSERT.
+    """
+    rating_type = UserQuality.__table__.c.rating.type
+
+    # 1. Same-day records: overwrite
+    g = _unnest(**_grade_columns(users))
+    overwritten = db.execute(
+        update(UserQuality)
+        .where(
+            UserQuality.is_current == True,
+            UserQuality.user_id == g.c.user_id,
+            UserQuality.project_id == g.c.project_id,
+            cast(UserQuality.valid_from, Date) == calculation_date,
+        )
+        .values(
+            rating=cast(g.c.rating, rating_type),
+            quality_score=g.c.quality_score,
+            metric_date=calculation_date,
+            assessed_at=func.now(),
+        )
+        .returning(UserQuality.user_id, UserQuality.project_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if overwritten:
+        done = set(map(tuple, overwritten))
+        users = users[[pair not in done for pair in zip(users["user_id"], users["project_id"])]]
+        if users.empty:
+            return
+
+    # 2. Older records: archive
+    g = _unnest(**_user_columns(users))
+    db.execute(
+        update(UserQuality)
+        .where(
+            UserQuality.is_current == True,
+            UserQuality.user_id == g.c.user_id,
+            UserQuality.project_id == g.c.project_id,
+        )
+        .values(is_current=False, valid_to=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+    # 3. New versions, valid indefinitely until the next update
+    g = _unnest(**_grade_columns(users))
+    db.execute(insert(UserQuality).from_select(
+        ["id", "user_id", "project_id", "work_role", "rating", "quality_score",
+         "source", "metric_date", "assessed_at", "is_current", "valid_from"],
+        select(
+            func.gen_random_uuid(), g.c.user_id, g.c.project_id, g.c.work_role,
+            cast(g.c.rating, rating_type), g.c.quality_score,
+            literal("AUTO_CALC"), literal(calculation_date, Date), func.now(), literal(True), func.now(),
+        ),
+    ))
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _calculate_partition(project_id: UUID, calculation_date: date) -> dict:
+    """One (project, date) grading pass on its own session, never raises."""
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        result = calculate_daily_productivity(db, project_id, calculation_date)
+        return {
+            "project_id": project_id,
+            "calculation_date": calculation_date,
+            "status": result["status"],
+            "processed_users": result.get("processed_users", 0),
+            "elapsed_ms": _elapsed_ms(started),
+        }
+    except Exception as exc:
+        db.rollback()
+        return {
+            "project_id": project_id,
+            "calculation_date": calculation_date,
+            "status": "Failed",
+            "elapsed_ms": _elapsed_ms(started),
+            "error": str(exc),
+        }
+    finally:
+        db.close()
+
+
+def _calculate_project_days(project_id: UUID, days: list[date]) -> list[dict]:
+    """One project's partitions, oldest day first, on one worker."""
+    return [_calculate_partition(project_id, day) for day in days]
+
+
+def check_range(start_date: date, end_date: date):
+    """Raises ValueError for a range calculate_range refuses to run."""
+    if start_date > end_date:
+        raise ValueError("'start_date' cannot be later than 'end_date'.")
+
+    if (end_date - start_date).days + 1 > ANALYTICS_MAX_RANGE_DAYS:
+        raise ValueError(f"Date range cannot exceed {ANALYTICS_MAX_RANGE_DAYS} days.")
+
+
+def calculate_range(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    project_ids: Optional[list[UUID]] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """
+    Grades every (project, date) partition in the range on a bounded
+    thread pool. Partitions are independent: a failure is reported in its
+    entry and does not roll back the others. on_progress(done, total) is
+    called, in partitions, as projects finish.
+
+    The pool parallelizes over projects, never over the days of one
+    project. Each worker takes one project and walks its days oldest
+    first, because user_quality is an SCD2 chain ordered by commit: every
+    pass closes the pair's current version and opens one stamped now(), so
+    whichever day commits last becomes the current rating. Running a
+    project's days concurrently would leave a random day's rating current
+    and the chain out of date order. The metrics tables are keyed by day and
+    last_worked_date only moves forward, so they alone would not need it.
+    A one-project backfill therefore runs its days serially.
+    """
+    check_range(start_date, end_date)
+    started = time.perf_counter()
+
+    if project_ids is None:
+        project_ids = db.scalars(select(Project.id).where(Project.is_active == True)).all()
+    # Hand the request's connection back before the workers need theirs
+    db.close()
+
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    total = len(project_ids) * len(days)
+
+    per_project = [None] * len(project_ids)
+    done = 0
+    with ThreadPoolExecutor(max_workers=ANALYTICS_MAX_WORKERS) as pool:
+        futures = {
+            pool.submit(_calculate_project_days, project_id, days): i
+            for i, project_id in enumerate(project_ids)
+        }
+        for future in as_completed(futures):
+            per_project[futures[future]] = future.result()
+            done += len(days)
+            if on_progress:
+                on_progress(done, total)
+
+    results = [result for project_results in per_project for result in project_results]
+    statuses = [r["status"] for r in results]
+    return {
+        "partitions_total": len(results),
+        "succeeded": statuses.count("Success"),
+        "skipped": statuses.count("Skipped"),
+        "failed": statuses.count("Failed"),
+        "elapsed_ms": _elapsed_ms(started),
+        "partitions": results,
+    }
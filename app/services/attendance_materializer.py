@@ -0,0 +1,176 @@
+import argparse
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy import Numeric, and_, case, cast, delete, exists, func, literal, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg, insert
+from sqlalchemy.orm import Session
+
+from app.models.attendance_daily import AttendanceDaily
+from app.models.history import TimeHistory
+
+# attendance_daily.source of rows created from clock-outs
+SOURCE = "TIMESHEET"
+
+# Statuses a clock-out is allowed to overwrite; LEAVE/WFH set by an
+# approved attendance request are kept.
+UNRESOLVED_STATUSES = ("UNKNOWN", "ABSENT")
+
+
+def session_minutes(clock_in_at, clock_out_at):
+    """SQL expression: minutes between the two timestamps, 2 decimals."""
+    return func.round(cast(func.extract("epoch", clock_out_at - clock_in_at) / 60, Numeric), 2)
+
+
+def _upsert(rows, set_):
+    """
+    INSERT .. SELECT of (user_id, project_id, attendance_date,
+    first_clock_in_at, last_clock_out_at, minutes_worked) rows into
+    attendance_daily, one row per (user, date).
+    """
+    stmt = insert(AttendanceDaily).from_select(
+        ["id", "user_id", "project_id", "attendance_date", "first_clock_in_at",
+         "last_clock_out_at", "minutes_worked", "status", "minutes_late", "source"],
+        select(
+            func.gen_random_uuid(),
+            rows.c.user_id,
+            rows.c.project_id,
+            rows.c.attendance_date,
+            rows.c.first_clock_in_at,
+            rows.c.last_clock_out_at,
+            rows.c.minutes_worked,
+            literal("PRESENT"),
+            literal(0),
+            literal(SOURCE),
+        ),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "attendance_date"],
+        set_={
+            **set_(stmt.excluded),
+            "status": case(
+                (AttendanceDaily.status.in_(UNRESOLVED_STATUSES), "PRESENT"),
+                else_=AttendanceDaily.status,
+            ),
+            "updated_at": func.now(),
+        },
+    )
+
+
+def fold_clock_out(db: Session, session_id: UUID):
+    """
+    Adds one closed session to its user's attendance_daily row for the
+    session's sheet_date: earliest clock-in, latest clock-out and summed
+    minutes, in a single upsert. Call it once per clock-out, after the
+    session's clock_out_at/minutes_worked are flushed. Does not commit.
+    """
+    row = (
+        select(
+            TimeHistory.user_id,
+            TimeHistory.project_id,
+            TimeHistory.sheet_date.label("attendance_date"),
+            TimeHistory.clock_in_at.label("first_clock_in_at"),
+            TimeHistory.clock_out_at.label("last_clock_out_at"),
+            TimeHistory.minutes_worked,
+        )
+        .where(TimeHistory.id == session_id, TimeHistory.clock_out_at.isnot(None))
+        .subquery()
+    )
+
+    db.execute(_upsert(row, lambda new: {
+        # LEAST/GREATEST skip NULLs, so a row made by an attendance request
+        # simply takes the session's times
+        "first_clock_in_at": func.least(AttendanceDaily.first_clock_in_at, new.first_clock_in_at),
+        "last_clock_out_at": func.greatest(AttendanceDaily.last_clock_out_at, new.last_clock_out_at),
+        "minutes_worked": func.coalesce(AttendanceDaily.minutes_worked, 0) + new.minutes_worked,
+    }))
+
+
+def rebuild_attendance(db: Session, start_date: date, end_date: date) -> dict:
+    """
+    Recomputes attendance_daily clock fields for every day in
+    [start_date, end_date] from the closed sessions in `history`, set-based:
+
+    1. fills history.minutes_worked where clock-out never set it,
+    2. upserts one row per (user, sheet_date), replacing the clock fields,
+    3. drops TIMESHEET rows left without sessions and clears the clock
+       fields of any other row in the range without sessions.
+
+    Does not commit.
+    """
+    in_range = TimeHistory.sheet_date.between(start_date, end_date)
+    closed = TimeHistory.clock_out_at.isnot(None)
+
+    filled = db.execute(
+        update(TimeHistory)
+        .where(in_range, closed, TimeHistory.minutes_worked.is_(None))
+        .values(minutes_worked=session_minutes(TimeHistory.clock_in_at, TimeHistory.clock_out_at))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    days = (
+        select(
+            TimeHistory.user_id,
+            # A new row belongs to the project of the day's first session
+            array_agg(aggregate_order_by(TimeHistory.project_id, TimeHistory.clock_in_at))[1].label("project_id"),
+            TimeHistory.sheet_date.label("attendance_date"),
+            func.min(TimeHistory.clock_in_at).label("first_clock_in_at"),
+            func.max(TimeHistory.clock_out_at).label("last_clock_out_at"),
+            func.sum(TimeHistory.minutes_worked).label("minutes_worked"),
+        )
+        .where(in_range, closed)
+        .group_by(TimeHistory.user_id, TimeHistory.sheet_date)
+        .subquery()
+    )
+    upserted = db.execute(_upsert(days, lambda new: {
+        "first_clock_in_at": new.first_clock_in_at,
+        "last_clock_out_at": new.last_clock_out_at,
+        "minutes_worked": new.minutes_worked,
+    })).rowcount
+
+    no_sessions = and_(
+        AttendanceDaily.attendance_date.between(start_date, end_date),
+        ~exists().where(
+            TimeHistory.user_id == AttendanceDaily.user_id,
+            TimeHistory.sheet_date == AttendanceDaily.attendance_date,
+            closed,
+        ),
+    )
+    removed = db.execute(
+        delete(AttendanceDaily)
+        .where(no_sessions, AttendanceDaily.source == SOURCE)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    cleared = db.execute(
+        update(AttendanceDaily)
+        .where(no_sessions, AttendanceDaily.first_clock_in_at.isnot(None))
+        .values(first_clock_in_at=None, last_clock_out_at=None, minutes_worked=None, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    return {
+        "sessions_filled": filled,
+        "rows_upserted": upserted,
+        "rows_removed": removed,
+        "rows_cleared": cleared,
+    }
+
+
+if __name__ == "__main__":
+    # python -m app.services.attendance_materializer --start 2025-01-01 --end 2025-01-31
+    import app.main  # noqa: F401  (maps every model the relationships refer to)
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild attendance_daily from history for a date range.")
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True)
+    args = parser.parse_args()
+
+    if args.end < args.start:
+        parser.error("--end must not be before --start")
+
+    with SessionLocal() as db:
+        counts = rebuild_attendance(db, args.start, args.end)
+        db.commit()
+
+    print(", ".join(f"{name}={value}" for name, value in counts.items()))
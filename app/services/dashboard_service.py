@@ -0,0 +1,65 @@
+import os
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.orm import Session
+
+from app.core.cache import StaleWhileRevalidate
+from app.db.session import read_session
+from app.models.history import TimeHistory
+from app.models.project import Project
+from app.models.user import User
+from app.schemas.dashboard import GlobalStatsResponse
+
+# Served as is for the TTL, then (stale) while one background refresh runs
+DASHBOARD_STATS_TTL_SECONDS = float(os.getenv("DASHBOARD_STATS_TTL_SECONDS", "15"))
+DASHBOARD_STATS_STALE_SECONDS = float(os.getenv("DASHBOARD_STATS_STALE_SECONDS", "300"))
+
+
+def compute_global_stats(db: Session, today: date) -> GlobalStatsResponse:
+    """The dashboard's headline numbers, in one statement."""
+    row = db.execute(
+        select(
+            select(func.count()).select_from(User).scalar_subquery().label("total_users"),
+            select(func.coalesce(func.sum(TimeHistory.minutes_worked), 0))
+            .where(TimeHistory.sheet_date == today)
+            .scalar_subquery()
+            .label("today_minutes"),
+            select(array_agg(aggregate_order_by(Project.name, Project.name)))
+            .where(Project.is_active == True)
+            .scalar_subquery()
+            .label("active_project_names"),
+        )
+    ).one()
+
+    names = row.active_project_names or []
+    return GlobalStatsResponse(
+        total_users=row.total_users,
+        active_projects=len(names),
+        total_hours_today=round(row.today_minutes / 60, 1),
+        active_project_names=names,
+    )
+
+
+def _load_global_stats(today: date) -> GlobalStatsResponse:
+    with read_session() as db:
+        return compute_global_stats(db, today)
+
+
+# Keyed by the day, so yesterday's totals are never served after midnight
+global_stats_cache = StaleWhileRevalidate(
+    _load_global_stats,
+    ttl=DASHBOARD_STATS_TTL_SECONDS,
+    stale_ttl=DASHBOARD_STATS_STALE_SECONDS,
+    name="dashboard-stats",
+)
+
+
+def get_global_stats() -> GlobalStatsResponse:
+    return global_stats_cache.get(date.today())
+
+
+def invalidate_dashboard_stats():
+    """Called after clock-outs and project writes."""
+    global_stats_cache.invalidate()
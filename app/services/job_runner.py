@@ -0,0 +1,467 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.job import Job, JobStatus
+from app.schemas.analytics import CalculateAllParams, CalculateDailyParams, CalculateRangeRequest
+from app.schemas.report import ReportFormat
+from app.schemas.job import (
+    ProjectDailyReportParams,
+    RoleDrilldownReportParams,
+    ProjectHistoryReportParams,
+    UserPerformanceReportParams,
+)
+from app.services import analytics_service, report_service
+
+logger = logging.getLogger(__name__)
+
+# Threads running jobs in this process; each one holds a pooled connection
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Every process stamps heartbeat_at on the jobs it is running this often...
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+# ...and fails RUNNING jobs whose heartbeat is older than this: their
+# process died. Also how long a PENDING job may wait before any process
+# picks it up.
+JOB_STALE_AFTER_SECONDS = int(os.getenv("JOB_STALE_AFTER_SECONDS", "120"))
+# Report jobs write their files here. Every process serving
+# /jobs/{id}/download must see the same directory (a shared volume when
+# workers run on several hosts).
+JOB_ARTIFACT_DIR = os.getenv("JOB_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "job-artifacts"))
+# The sweep deletes files older than this; their download answers 410
+JOB_ARTIFACT_RETENTION_HOURS = float(os.getenv("JOB_ARTIFACT_RETENTION_HOURS", "168"))
+
+ACTIVE_STATUSES = (JobStatus.PENDING, JobStatus.RUNNING)
+
+
+class JobArtifact:
+    """
+    Returned by handlers that produce a file instead of a JSON result.
+    `chunks` (str or bytes) are written to JOB_ARTIFACT_DIR one at a time
+    while the handler's session is still open, so they may stream from it.
+    """
+
+    def __init__(self, name: str, media_type: str, chunks: Iterable):
+        self.name = name
+        self.media_type = media_type
+        self.chunks = chunks
+
+
+def artifact_path(job_id: UUID) -> str:
+    return os.path.join(JOB_ARTIFACT_DIR, str(job_id))
+
+
+def _write_artifact(job_id: UUID, artifact: JobArtifact) -> int:
+    """Streams the artifact to its file; returns the size in bytes."""
+    os.makedirs(JOB_ARTIFACT_DIR, exist_ok=True)
+    path = artifact_path(job_id)
+    partial = f"{path}.partial"
+    size = 0
+    try:
+        with open(partial, "wb") as out:
+            for chunk in artifact.chunks:
+                data = chunk.encode() if isinstance(chunk, str) else chunk
+                out.write(data)
+                size += len(data)
+        # Downloads never see a half-written file
+        os.replace(partial, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(partial)
+        raise
+    return size
+
+
+def _remove_expired_artifacts():
+    cutoff = time.time() - JOB_ARTIFACT_RETENTION_HOURS * 3600
+    try:
+        entries = list(os.scandir(JOB_ARTIFACT_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        # Other processes sweep the same directory
+        with contextlib.suppress(OSError):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+
+class JobProgress:
+    """
+    Passed to handlers as progress(done, total). Every report is its own
+    short transaction so pollers see it while the handler is still working.
+    """
+
+    def __init__(self, job_id: UUID):
+        self.job_id = job_id
+
+    def __call__(self, done: int, total: Optional[int] = None):
+        values = {"progress_done": done, "heartbeat_at": func.now()}
+        if total is not None:
+            values["progress_total"] = total
+
+        with SessionLocal() as db:
+            db.execute(update(Job).where(Job.id == self.job_id).values(**values))
+            db.commit()
+
+
+class JobKind:
+    def __init__(self, handler: Callable, params_model, check: Optional[Callable] = None):
+        self.handler = handler
+        self.params_model = params_model
+        self.check = check
+
+
+class JobRunner:
+    """
+    In-process worker pool over the `jobs` table. The table is the source of
+    truth: a job is claimed with a conditional UPDATE, so a job submitted in
+    two processes still runs once.
+
+    A background thread per process heartbeats the jobs this process is
+    running and sweeps the table (see sweep()), so a job cut off by a crash
+    or restart is failed within JOB_STALE_AFTER_SECONDS and stops blocking
+    identical new jobs.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._kinds = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        # Jobs submitted to / running in this process's executor
+        self._queued = set()
+        self._running = set()
+        self._sweeper = None
+        self._stopping = threading.Event()
+
+    def register(self, kind: str, params_model, check: Optional[Callable] = None):
+        """Decorator: handler(db, params, progress) -> JSON-able result or JobArtifact."""
+        def decorator(handler):
+            self._kinds[kind] = JobKind(handler, params_model, check)
+            return handler
+        return decorator
+
+    def parse_params(self, kind: str, params: dict) -> dict:
+        """
+        Validates params for `kind`. Raises KeyError for an unknown kind and
+        ValueError (pydantic's ValidationError included) for bad params.
+        """
+        spec = self._kinds[kind]
+        parsed = spec.params_model.model_validate(params)
+        if spec.check:
+            spec.check(parsed)
+        return parsed.model_dump(mode="json")
+
+    def enqueue(self, db: Session, kind: str, params: dict, user_id: Optional[UUID] = None) -> tuple[Job, bool]:
+        """
+        Returns (job, created). When an identical job is already PENDING or
+        RUNNING, that job is returned with created=False.
+        """
+        params = self.parse_params(kind, params)
+        params_hash = hashlib.sha256(
+            json.dumps([kind, params], sort_keys=True).encode()
+        ).hexdigest()
+
+        stmt = (
+            insert(Job)
+            .values(
+                kind=kind,
+                params=params,
+                params_hash=params_hash,
+                status=JobStatus.PENDING,
+                progress_done=0,
+                created_by_user_id=user_id,
+            )
+            .on_conflict_do_nothing(
+                index_elements=[Job.kind, Job.params_hash],
+                index_where=Job.status.in_(ACTIVE_STATUSES),
+            )
+            .returning(Job)
+        )
+        active = select(Job).where(
+            Job.kind == kind,
+            Job.params_hash == params_hash,
+            Job.status.in_(ACTIVE_STATUSES),
+        )
+
+        # The active twin can finish between the insert and the re-select;
+        # then the next insert goes through.
+        while True:
+            job = db.scalars(stmt).first()
+            db.commit()
+            if job:
+                self._submit(job.id)
+                return job, True
+
+            job = db.scalars(active).first()
+            if job:
+                return job, False
+
+    def recover(self):
+        """
+        Startup hook: resubmits every PENDING job, fails RUNNING ones whose
+        process stopped heartbeating, and starts the periodic sweep.
+
+        RUNNING jobs with a live heartbeat are left alone: they belong to
+        another worker process that is still running them.
+        """
+        self.sweep(pending_older_than=None)
+        with self._lock:
+            if self._sweeper is None:
+                self._stopping.clear()
+                self._sweeper = threading.Thread(target=self._sweep_forever, name="job-sweeper", daemon=True)
+                self._sweeper.start()
+
+    def sweep(self, pending_older_than: Optional[float] = JOB_STALE_AFTER_SECONDS):
+        """
+        One maintenance pass, each step its own statement:
+
+        1. stamps heartbeat_at on the jobs running in this process,
+        2. fails RUNNING jobs whose heartbeat is older than
+           JOB_STALE_AFTER_SECONDS (their process died mid-job),
+        3. submits PENDING jobs that have waited longer than
+           `pending_older_than` seconds (all of them for None), unless this
+           process already queued them. The claim in _run() makes a job
+           submitted by several processes run once,
+        4. deletes artifact files past JOB_ARTIFACT_RETENTION_HOURS.
+        """
+        with self._lock:
+            running = list(self._running)
+            queued = set(self._queued)
+
+        try:
+            with SessionLocal() as db:
+                if running:
+                    db.execute(update(Job).where(Job.id.in_(running)).values(heartbeat_at=func.now()))
+                    db.commit()
+
+                failed = db.execute(
+                    update(Job)
+                    .where(
+                        Job.status == JobStatus.RUNNING,
+                        func.coalesce(Job.heartbeat_at, Job.started_at)
+                        < func.now() - timedelta(seconds=JOB_STALE_AFTER_SECONDS),
+                    )
+                    .values(
+                        status=JobStatus.FAILED,
+                        error="Interrupted: the worker stopped before finishing",
+                        finished_at=func.now(),
+                    )
+                ).rowcount
+                db.commit()
+                if failed:
+                    logger.warning("Failed %d background job(s) left RUNNING by a stopped worker", failed)
+
+                pending = select(Job.id).where(Job.status == JobStatus.PENDING).order_by(Job.created_at)
+                if pending_older_than is not None:
+                    pending = pending.where(Job.created_at < func.now() - timedelta(seconds=pending_older_than))
+                pending = db.scalars(pending).all()
+        except Exception:
+            logger.exception("Could not sweep background jobs")
+            return
+
+        for job_id in pending:
+            if job_id not in queued:
+                self._submit(job_id)
+
+        _remove_expired_artifacts()
+
+    def _sweep_forever(self):
+        while not self._stopping.wait(JOB_HEARTBEAT_SECONDS):
+            self.sweep()
+
+    def shutdown(self):
+        # Not-yet-started jobs stay PENDING and are picked up by recover();
+        # jobs already running finish before the interpreter exits
+        self._stopping.set()
+        with self._lock:
+            self._sweeper = None
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self._queued.clear()
+
+    def _submit(self, job_id: UUID):
+        # Created on first use so importing the app starts no threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            self._queued.add(job_id)
+            self._executor.submit(self._run, job_id)
+
+    def _finish(self, job_id: UUID, **values):
+        with SessionLocal() as db:
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id)
+                .values(finished_at=func.now(), **values)
+            )
+            db.commit()
+
+    def _run(self, job_id: UUID):
+        with self._lock:
+            self._running.add(job_id)
+        try:
+            self._claim_and_run(job_id)
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+                self._queued.discard(job_id)
+
+    def _claim_and_run(self, job_id: UUID):
+        with SessionLocal() as db:
+            claimed = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == JobStatus.PENDING)
+                .values(status=JobStatus.RUNNING, started_at=func.now(), heartbeat_at=func.now())
+                .returning(Job.kind, Job.params)
+            ).first()
+            db.commit()
+
+        if claimed is None:
+            return
+
+        spec = self._kinds.get(claimed.kind)
+        if spec is None:
+            self._finish(job_id, status=JobStatus.FAILED, error=f"Unknown job kind '{claimed.kind}'")
+            return
+
+        db = SessionLocal()
+        try:
+            params = spec.params_model.model_validate(claimed.params)
+            result = spec.handler(db, params, JobProgress(job_id))
+            if isinstance(result, JobArtifact):
+                size = _write_artifact(job_id, result)
+        except Exception as exc:
+            db.rollback()
+            self._finish(job_id, status=JobStatus.FAILED, error=str(exc) or exc.__class__.__name__)
+            return
+        finally:
+            db.close()
+
+        values = {
+            "status": JobStatus.SUCCEEDED,
+            "progress_total": func.coalesce(Job.progress_total, 1),
+            "progress_done": func.coalesce(Job.progress_total, 1),
+        }
+        if isinstance(result, JobArtifact):
+            values.update(
+                artifact_name=result.name,
+                artifact_media_type=result.media_type,
+                result={"filename": result.name, "size_bytes": size},
+            )
+        else:
+            values["result"] = jsonable_encoder(result)
+
+        self._finish(job_id, **values)
+
+
+def job_to_response(job: Job, deduplicated: bool = False) -> dict:
+    elapsed = None
+    if job.started_at:
+        end = job.finished_at or datetime.now(timezone.utc)
+        elapsed = round((end - job.started_at).total_seconds(), 3)
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status.value,
+        "progress_done": job.progress_done,
+        "progress_total": job.progress_total,
+        "result": job.result,
+        "error": job.error,
+        "has_artifact": job.artifact_name is not None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "elapsed_seconds": elapsed,
+        "deduplicated": deduplicated,
+    }
+
+
+job_runner = JobRunner(JOB_WORKERS)
+
+
+# ------------------------------------------------------------------
+# Job kinds
+# ------------------------------------------------------------------
+@job_runner.register("analytics.calculate_daily", CalculateDailyParams)
+def _calculate_daily(db: Session, params: CalculateDailyParams, progress: JobProgress):
+    progress(0, 1)
+    return analytics_service.calculate_daily_productivity(db, params.project_id, params.calculation_date)
+
+
+@job_runner.register("analytics.calculate_all", CalculateAllParams)
+def _calculate_all(db: Session, params: CalculateAllParams, progress: JobProgress):
+    progress(0, 1)
+    return analytics_service.calculate_all_projects(db, params.calculation_date, project_ids=params.project_ids)
+
+
+@job_runner.register("analytics.recompute_partition", CalculateDailyParams)
+def _recompute_partition(db: Session, params: CalculateDailyParams, progress: JobProgress):
+    # Queued by app.services.analytics_recompute after approvals
+    progress(0, 1)
+    return analytics_service.recalculate_partition(db, params.project_id, params.calculation_date)
+
+
+@job_runner.register(
+    "analytics.calculate_range",
+    CalculateRangeRequest,
+    check=lambda params: analytics_service.check_range(params.start_date, params.end_date),
+)
+def _calculate_range(db: Session, params: CalculateRangeRequest, progress: JobProgress):
+    return analytics_service.calculate_range(
+        db,
+        params.start_date,
+        params.end_date,
+        project_ids=params.project_ids,
+        on_progress=progress,
+    )
+
+
+def _report_artifact(report: report_service.Report, fmt: ReportFormat) -> JobArtifact:
+    filename, media_type, chunks = report_service.render(report, fmt)
+    return JobArtifact(filename or f"report.{fmt.value}", media_type, chunks)
+
+
+@job_runner.register("reports.project_daily", ProjectDailyReportParams)
+def _project_daily_report(db: Session, params: ProjectDailyReportParams, progress: JobProgress):
+    return _report_artifact(report_service.build_project_daily_csv(db, params.project_id, params.report_date), params.format)
+
+
+@job_runner.register("reports.role_drilldown", RoleDrilldownReportParams)
+def _role_drilldown_report(db: Session, params: RoleDrilldownReportParams, progress: JobProgress):
+    return _report_artifact(report_service.build_role_drilldown_csv(db, params.project_id, params.report_date), params.format)
+
+
+@job_runner.register("reports.project_history", ProjectHistoryReportParams)
+def _project_history_report(db: Session, params: ProjectHistoryReportParams, progress: JobProgress):
+    return _report_artifact(
+        report_service.build_project_history_csv(
+            db, params.project_id, params.start_date, params.end_date, params.role
+        ),
+        params.format,
+    )
+
+
+@job_runner.register("reports.user_performance", UserPerformanceReportParams)
+def _user_performance_report(db: Session, params: UserPerformanceReportParams, progress: JobProgress):
+    return _report_artifact(
+        report_service.build_user_performance_csv(db, params.user_id, params.start_date, params.end_date),
+        params.format,
+    )
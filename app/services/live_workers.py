@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.session import async_engine
+from app.models.history import TimeHistory
+from app.models.project import Project
+from app.models.user import User
+from app.schemas.dashboard import LiveWorkerResponse
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel carrying clock-in / clock-out deltas
+LIVE_WORKERS_CHANNEL = "live_workers"
+# Comment line sent when a stream has been idle this long, so proxies keep it open
+LIVE_STREAM_HEARTBEAT_SECONDS = float(os.getenv("LIVE_STREAM_HEARTBEAT_SECONDS", "15"))
+# Deltas buffered per client; a client that falls this far behind gets a new snapshot
+LIVE_STREAM_QUEUE_SIZE = int(os.getenv("LIVE_STREAM_QUEUE_SIZE", "1000"))
+LIVE_STREAM_RETRY_SECONDS = float(os.getenv("LIVE_STREAM_RETRY_SECONDS", "2"))
+
+# Queued in place of deltas that were lost; the stream answers with a snapshot
+RESYNC = object()
+
+
+def open_sessions_query():
+    """
+    Sessions clocked in but not out, with user and project names joined in.
+    Served by the partial ix_history_open_sessions index.
+    """
+    return (
+        select(
+            TimeHistory.user_id,
+            TimeHistory.work_role,
+            TimeHistory.clock_in_at,
+            User.name.label("user_name"),
+            Project.name.label("project_name"),
+        )
+        .outerjoin(User, User.id == TimeHistory.user_id)
+        .outerjoin(Project, Project.id == TimeHistory.project_id)
+        .where(TimeHistory.clock_out_at == None)
+    )
+
+
+def to_live_worker(row) -> LiveWorkerResponse:
+    # How long they have been running (in minutes)
+    duration = 0
+    if row.clock_in_at:
+        delta = datetime.now(row.clock_in_at.tzinfo) - row.clock_in_at
+        duration = int(delta.total_seconds() / 60)
+
+    return LiveWorkerResponse(
+        user_id=row.user_id,
+        user_name=row.user_name or "Unknown",
+        project_name=row.project_name or "Unknown",
+        work_role=row.work_role,
+        clock_in_time=row.clock_in_at,
+        current_duration_minutes=duration,
+    )
+
+
+# ------------------------------------------------------------------
+# Publishing (sync sessions, inside the writer's transaction)
+# ------------------------------------------------------------------
+def _notify(db: Session, event: str, data: str):
+    payload = '{"event": %s, "data": %s}' % (json.dumps(event), data)
+    db.execute(select(func.pg_notify(LIVE_WORKERS_CHANNEL, payload)))
+
+
+def publish_clock_in(db: Session, session_id: UUID):
+    """
+    Announces a new open session to every live stream. Call after the
+    session is flushed; Postgres delivers the notification on commit, and
+    not at all on rollback.
+    """
+    row = db.execute(open_sessions_query().where(TimeHistory.id == session_id)).first()
+    if row is not None:
+        _notify(db, "clock_in", to_live_worker(row).model_dump_json())
+
+
+def publish_clock_out(db: Session, user_id: UUID):
+    """Announces that the user's open session closed. Delivered on commit."""
+    _notify(db, "clock_out", json.dumps({"user_id": str(user_id)}))
+
+
+# ------------------------------------------------------------------
+# Subscribing (async, one LISTEN connection per process)
+# ------------------------------------------------------------------
+class _Subscriber:
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=LIVE_STREAM_QUEUE_SIZE)
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.resync()
+
+    def resync(self):
+        # Pending deltas are superseded by the snapshot the stream will send
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC)
+
+
+class LiveWorkerBus:
+    """
+    Fans Postgres notifications on LIVE_WORKERS_CHANNEL out to the open
+    live streams of this process. The LISTEN connection is opened with the
+    first subscriber and closed with the last. Notifications go through
+    the database, so clock-ins handled by any worker process reach every
+    stream, and only committed ones are sent.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._subscribers = set()
+        self._task = None
+        self._ready = None
+
+    @asynccontextmanager
+    async def subscribe(self):
+        """
+        Yields a subscriber whose queue receives (event, data) tuples, or
+        RESYNC. LISTEN is active on entry, so a snapshot read afterwards
+        plus the queued deltas never misses a change.
+        """
+        subscriber = _Subscriber()
+        self._subscribers.add(subscriber)
+        try:
+            if self._task is None:
+                self._ready = asyncio.Event()
+                self._task = asyncio.create_task(self._listen(self._ready))
+            await self._ready.wait()
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+            event = (message["event"], message["data"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed %s notification: %r", channel, payload)
+            return
+        for subscriber in list(self._subscribers):
+            subscriber.deliver(event)
+
+    async def _listen(self, ready: asyncio.Event):
+        while True:
+            try:
+                async with async_engine.connect() as conn:
+                    raw = (await conn.get_raw_connection()).driver_connection
+                    lost = asyncio.Event()
+                    raw.add_termination_listener(lambda _: lost.set())
+                    await raw.add_listener(self.channel, self._on_notify)
+                    try:
+                        if ready.is_set():
+                            # Reconnected: whatever happened meanwhile was missed
+                            for subscriber in list(self._subscribers):
+                                subscriber.resync()
+                        ready.set()
+                        await lost.wait()
+                    finally:
+                        if not raw.is_closed():
+                            await raw.remove_listener(self.channel, self._on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Live workers listener lost its connection", exc_info=True)
+                # Let waiting streams go on; their snapshot read reports the outage
+                ready.set()
+            await asyncio.sleep(LIVE_STREAM_RETRY_SECONDS)
+
+
+live_worker_bus = LiveWorkerBus(LIVE_WORKERS_CHANNEL)
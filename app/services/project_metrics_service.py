@@ -0,0 +1,105 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, delete, case, literal, distinct, Date
+from sqlalchemy.dialects.postgresql import insert
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from app.models.history import TimeHistory
+from app.models.project_daily_metrics import ProjectDailyMetrics
+from app.models.user_daily_metrics import UserDailyMetrics
+
+
+def rollup_project_metrics(db: Session, metric_date: date, project_ids: Optional[list[UUID]] = None) -> list:
+    """
+    Rebuilds project_daily_metrics for metric_date from APPROVED time_history:
+    one row per (project, work_role) plus the project's AGGREGATE row, all
+    from a single GROUP BY project_id, ROLLUP(work_role) upsert. Rows whose
+    role (or project) no longer has approved work that day are removed.
+
+    avg_productivity_score averages the users' scores in user_daily_metrics,
+    so run it after the analytics grading has written them. Returns the
+    ids of the rows written. Does not commit.
+    """
+    sessions = (
+        select(
+            TimeHistory.project_id,
+            TimeHistory.work_role,
+            TimeHistory.user_id,
+            TimeHistory.tasks_completed,
+            func.coalesce(TimeHistory.minutes_worked, 0).label("minutes"),
+            UserDailyMetrics.productivity_score.label("score"),
+            # A user's score must count once per role row and once in AGGREGATE,
+            # however many sessions they logged
+            func.row_number().over(
+                partition_by=[TimeHistory.project_id, TimeHistory.user_id]
+            ).label("user_rank"),
+            func.row_number().over(
+                partition_by=[TimeHistory.project_id, TimeHistory.user_id, TimeHistory.work_role]
+            ).label("role_rank"),
+        )
+        .outerjoin(
+            UserDailyMetrics,
+            (UserDailyMetrics.user_id == TimeHistory.user_id)
+            & (UserDailyMetrics.project_id == TimeHistory.project_id)
+            & (UserDailyMetrics.metric_date == TimeHistory.sheet_date),
+        )
+        .where(
+            TimeHistory.sheet_date == metric_date,
+            TimeHistory.status == "APPROVED",
+        )
+    )
+    if project_ids is not None:
+        sessions = sessions.where(TimeHistory.project_id.in_(project_ids))
+    s = sessions.subquery()
+
+    is_aggregate = func.grouping(s.c.work_role) == 1
+    users = func.count(distinct(s.c.user_id))
+    hours = func.sum(s.c.minutes) / 60
+
+    rollup = (
+        select(
+            func.gen_random_uuid(),
+            s.c.project_id,
+            literal(metric_date, Date),
+            case((is_aggregate, "AGGREGATE"), else_=s.c.work_role),
+            func.sum(s.c.tasks_completed),
+            users,
+            hours,
+            hours / users,
+            case(
+                (is_aggregate, func.avg(s.c.score).filter(s.c.user_rank == 1)),
+                else_=func.avg(s.c.score).filter(s.c.role_rank == 1),
+            ),
+        )
+        .group_by(s.c.project_id, func.rollup(s.c.work_role))
+    )
+
+    stmt = insert(ProjectDailyMetrics).from_select(
+        ["id", "project_id", "metric_date", "work_role", "tasks_completed", "active_users_count",
+         "total_hours_worked", "avg_hours_worked_per_user", "avg_productivity_score"],
+        rollup,
+    )
+    written = db.scalars(
+        stmt.on_conflict_do_update(
+            index_elements=["project_id", "metric_date", "work_role"],
+            set_={
+                "tasks_completed": stmt.excluded.tasks_completed,
+                "active_users_count": stmt.excluded.active_users_count,
+                "total_hours_worked": stmt.excluded.total_hours_worked,
+                "avg_hours_worked_per_user": stmt.excluded.avg_hours_worked_per_user,
+                "avg_productivity_score": stmt.excluded.avg_productivity_score,
+                "updated_at": func.now(),
+            },
+        ).returning(ProjectDailyMetrics.id)
+    ).all()
+
+    stale = delete(ProjectDailyMetrics).where(
+        ProjectDailyMetrics.metric_date == metric_date,
+        ProjectDailyMetrics.id.not_in(written),
+    )
+    if project_ids is not None:
+        stale = stale.where(ProjectDailyMetrics.project_id.in_(project_ids))
+    db.execute(stale.execution_options(synchronize_session=False))
+
+    return written
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import date, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Optional
+from uuid import UUID
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.core.cache import TTLCache
+from app.schemas.report import ReportFormat
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "128"))
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "3600"))
+# Larger exports are streamed but never kept
+REPORT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("REPORT_CACHE_MAX_ENTRY_BYTES", str(8 * 1024 * 1024)))
+# Optional second tier shared by every worker process on the host
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR")
+
+
+class CachedReport:
+    def __init__(self, etag: str, last_modified: Optional[str], filename: Optional[str], media_type: str, body: bytes):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.filename = filename
+        self.media_type = media_type
+        self.body = body
+
+
+class ReportCache:
+    """
+    Rendered report bodies keyed by (kind, project_id, scope_date, params,
+    format). Each entry remembers the ETag it was built for; the ETag hashes
+    the key with the data watermark, so an entry is only served while the
+    source rows are unchanged. invalidate() drops a project/date's entries
+    early, when analytics or approvals write.
+
+    Correctness does not depend on invalidate(): the watermark is read on
+    every request, so with several workers an entry another process
+    invalidated is still never served once the data has moved on. The
+    memory tier is per process and invalidate() only clears this process's
+    copy (and the shared disk tier); elsewhere it just takes up room until
+    the TTL or the next ETag mismatch replaces it.
+
+    scope_date is the day a report is about, or None for reports that span
+    the whole project (those are dropped by every invalidation of it).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, directory: Optional[str] = None):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.directory = directory
+
+    # --- lookups -------------------------------------------------------
+    def respond(
+        self,
+        request: Request,
+        kind: str,
+        project_id: UUID,
+        scope_date: Optional[date],
+        params: tuple,
+        fmt: ReportFormat,
+        watermark: tuple,
+        render: Callable,
+    ) -> Response:
+        """
+        Answers a report request: 304 when the client's copy is current,
+        the cached body when there is one, otherwise the freshly rendered
+        stream (kept for next time once it has been sent in full).
+
+        `watermark` is (last_modified datetime or None, anything else that
+        changes with the data); `render()` returns report_service.render()'s
+        (filename, media_type, chunks).
+        """
+        key = (kind, str(project_id), scope_date.isoformat() if scope_date else None, params, fmt.value)
+        last_modified, *rest = watermark
+        etag = '"' + hashlib.sha256(repr((key, last_modified, rest)).encode()).hexdigest()[:32] + '"'
+        last_modified = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True) if last_modified else None
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+
+        if _not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers=headers)
+
+        entry = self.memory.get(key)
+        if entry is None or entry.etag != etag:
+            entry = self._read_disk(key, etag)
+            if entry is not None:
+                self.memory.set(key, entry)
+
+        if entry is not None and entry.etag == etag:
+            return Response(content=entry.body, media_type=entry.media_type, headers=_with_filename(headers, entry.filename))
+
+        filename, media_type, chunks = render()
+        meta = CachedReport(etag, last_modified, filename, media_type, b"")
+        return StreamingResponse(
+            self._keep(key, meta, chunks),
+            media_type=media_type,
+            headers=_with_filename(headers, filename),
+        )
+
+    def _keep(self, key, meta: CachedReport, chunks):
+        parts = []
+        size = 0
+        for chunk in chunks:
+            data = chunk.encode() if isinstance(chunk, str) else chunk
+            if parts is not None:
+                size += len(data)
+                if size <= REPORT_CACHE_MAX_ENTRY_BYTES:
+                    parts.append(data)
+                else:
+                    parts = None
+            yield data
+
+        # Only reached once the whole body was produced and sent
+        if parts is not None:
+            meta.body = b"".join(parts)
+            self.memory.set(key, meta)
+            self._write_disk(key, meta)
+
+    # --- invalidation --------------------------------------------------
+    def invalidate(self, project_id: UUID, scope_date: Optional[date] = None):
+        """
+        Drops the project's cached reports for scope_date plus its
+        project-wide ones; every date's when scope_date is None. Frees the
+        memory of this process only, see the class docstring.
+        """
+        project = str(project_id)
+        day = scope_date.isoformat() if scope_date else None
+
+        self.memory.discard(
+            lambda key: key[1] == project and (day is None or key[2] in (day, None))
+        )
+
+        if self.directory:
+            base = os.path.join(self.directory, project)
+            targets = [base] if day is None else [os.path.join(base, day), os.path.join(base, "all")]
+            for path in targets:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def stats(self) -> dict:
+        return {**self.memory.stats(), "disk_dir": self.directory}
+
+    # --- disk tier -----------------------------------------------------
+    def _path(self, key) -> str:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, key[1], key[2] or "all", digest)
+
+    def _read_disk(self, key, etag: str) -> Optional[CachedReport]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                if meta["etag"] != etag:
+                    return None
+                return CachedReport(meta["etag"], meta["last_modified"], meta["filename"], meta["media_type"], f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            logger.warning("Unreadable report cache file for %s", key, exc_info=True)
+            return None
+
+    def _write_disk(self, key, entry: CachedReport):
+        if not self.directory:
+            return
+        path = self._path(key)
+        meta = {
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "filename": entry.filename,
+            "media_type": entry.media_type,
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written aside and renamed so readers never see half a file
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(json.dumps(meta).encode() + b"\n")
+                f.write(entry.body)
+            os.replace(tmp, path)
+        except OSError:
+            logger.warning("Could not write report cache file for %s", key, exc_info=True)
+
+
+def _with_filename(headers: dict, filename: Optional[str]) -> dict:
+    if filename:
+        return {**headers, "Content-Disposition": f"attachment; filename={filename}"}
+    return headers
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+report_cache = ReportCache(REPORT_CACHE_SIZE, REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_DIR)
+
+
+def invalidate_reports(project_id: UUID, scope_date: Optional[date] = None):
+    """Called after analytics or approvals change a project's data."""
+    report_cache.invalidate(project_id, scope_date)
@@ -0,0 +1,462 @@
+import csv
+import io
+import itertools
+import os
+from sqlalchemy.orm import Session
+from sqlalchemy import func, true
+from fastapi import HTTPException
+from typing import Iterable, Iterator, Optional
+from uuid import UUID
+from datetime import date
+
+from app.models.project import Project
+from app.models.user import User
+from app.models.attendance_daily import AttendanceDaily
+from app.models.project_members import ProjectMember
+from app.models.user_daily_metrics import UserDailyMetrics
+from app.models.user_quality import UserQuality
+from app.services.user_quality_service import rating_as_of
+
+from app.schemas.report import ReportFormat
+
+# Rows fetched per round trip from the server-side cursor, and rows per CSV
+# chunk handed to the response
+REPORT_CHUNK_ROWS = int(os.getenv("REPORT_CHUNK_ROWS", "1000"))
+# Rows per Parquet row group / Arrow record batch; bounds columnar memory
+REPORT_BATCH_ROWS = int(os.getenv("REPORT_BATCH_ROWS", "65536"))
+
+MEDIA_TYPES = {
+    ReportFormat.CSV: "text/csv",
+    ReportFormat.PARQUET: "application/vnd.apache.parquet",
+    ReportFormat.ARROW: "application/vnd.apache.arrow.file",
+}
+
+
+class Report:
+    """
+    What every builder returns, so the same export can be streamed by
+    app.api.reports or written out by a background job. `columns` maps each
+    header to its type ("str", "int", "float", "decimal" or "date") and
+    `rows` is a lazy iterable of tuples in that order: the queries behind it
+    run while the output is being produced, a chunk at a time. `csv_body`,
+    when set, is sent as the whole CSV instead of columns and rows.
+    """
+
+    def __init__(
+        self,
+        filename: Optional[str],
+        columns: dict[str, str],
+        rows: Iterable[tuple],
+        csv_body: Optional[str] = None,
+    ):
+        self.filename = filename
+        self.columns = columns
+        self.rows = rows
+        self.csv_body = csv_body
+
+
+def _message(filename: Optional[str], text: str, bare: bool = False) -> Report:
+    """
+    A one-cell "Message" report. With bare=True the CSV is just the text,
+    without header or newline, as some exports have always sent it.
+    """
+    return Report(filename, {"Message": "str"}, [(text,)], csv_body=text if bare else None)
+
+
+def _blank_csv_when_empty(report: Report) -> Report:
+    """
+    Fetches the first row up front. A report without rows keeps its
+    columns for the columnar formats, but its CSV is a bare newline, which
+    is what these exports sent for an empty pandas frame.
+    """
+    rows = iter(report.rows)
+    first = next(rows, None)
+    if first is None:
+        report.rows, report.csv_body = [], "\n"
+    else:
+        report.rows = itertools.chain([first], rows)
+    return report
+
+
+def _stream(db: Session, query):
+    """Runs `query` on a server-side cursor, REPORT_CHUNK_ROWS at a time."""
+    return db.execute(query.statement.execution_options(yield_per=REPORT_CHUNK_ROWS))
+
+
+def iter_csv(report: Report) -> Iterator[str]:
+    """The report as CSV text chunks; nothing is buffered beyond one chunk."""
+    if report.csv_body is not None:
+        yield report.csv_body
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(report.columns)
+
+    pending = 1
+    for row in report.rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= REPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if pending:
+        yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file for the pyarrow writers that hands out what was written
+    so far. tell() keeps counting from the start of the file, which the
+    Parquet/Arrow footers' offsets depend on.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema(report: Report):
+    import pyarrow as pa  # deferred: only columnar exports need it
+
+    types = {
+        "str": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "decimal": pa.decimal128(12, 2),
+        "date": pa.date32(),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in report.columns.items()])
+
+
+def _record_batches(report: Report, schema):
+    import pyarrow as pa
+
+    # Numeric columns without a fixed scale arrive as Decimal
+    floats = [kind == "float" for kind in report.columns.values()]
+
+    def to_batch(rows):
+        arrays = []
+        for values, field, as_float in zip(zip(*rows), schema, floats):
+            if as_float:
+                values = [None if v is None else float(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.record_batch(arrays, schema=schema)
+
+    rows = []
+    for row in report.rows:
+        rows.append(row)
+        if len(rows) >= REPORT_BATCH_ROWS:
+            yield to_batch(rows)
+            rows = []
+    if rows:
+        yield to_batch(rows)
+
+
+def iter_columnar(report: Report, fmt: ReportFormat) -> Iterator[bytes]:
+    """
+    The report as a Parquet or Arrow IPC file, written one batch of
+    REPORT_BATCH_ROWS rows at a time; each batch's bytes are yielded as soon
+    as it is written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(report)
+    sink = _ChunkSink()
+    if fmt == ReportFormat.PARQUET:
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_file(sink, schema)
+
+    for batch in _record_batches(report, schema):
+        writer.write_batch(batch)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def render(report: Report, fmt: ReportFormat = ReportFormat.CSV) -> tuple[Optional[str], str, Iterator]:
+    """(filename, media_type, chunks) of the report in the requested format."""
+    filename = report.filename
+    if fmt == ReportFormat.CSV:
+        return filename, MEDIA_TYPES[fmt], iter_csv(report)
+
+    if filename:
+        filename = f"{os.path.splitext(filename)[0]}.{fmt.value}"
+    return filename, MEDIA_TYPES[fmt], iter_columnar(report, fmt)
+
+
+def _rating_text(rating) -> str:
+    if rating is None:
+        return "N/A"
+    return rating.value if hasattr(rating, 'value') else rating
+
+
+def _metrics_filters(project_id: UUID, start_date: Optional[date], end_date: Optional[date], role: Optional[str]) -> list:
+    filters = [UserDailyMetrics.project_id == project_id]
+    if start_date:
+        filters.append(UserDailyMetrics.metric_date >= start_date)
+    if end_date:
+        filters.append(UserDailyMetrics.metric_date <= end_date)
+    if role:
+        filters.append(UserDailyMetrics.work_role == role)
+    return filters
+
+
+def metrics_watermark(
+    db: Session,
+    project_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    role: Optional[str] = None,
+) -> tuple:
+    """
+    (last modified, row counts) of everything a project report reads: its
+    user_daily_metrics rows, their users, the project's ratings and the
+    project itself. It changes whenever one of those rows is written or
+    deleted.
+
+    Call it before building the report: it moves the session to REPEATABLE
+    READ, so the report's own queries see the snapshot the watermark was
+    taken from and a body is never cached under an older watermark.
+    """
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    metrics_modified, users_modified, metrics = db.query(
+        func.max(UserDailyMetrics.updated_at),
+        func.max(User.updated_at),
+        func.count(UserDailyMetrics.id),
+    ).join(
+        User, UserDailyMetrics.user_id == User.id
+    ).filter(*_metrics_filters(project_id, start_date, end_date, role)).one()
+    ratings_modified, ratings = db.query(
+        func.max(UserQuality.updated_at),
+        func.count(UserQuality.id),
+    ).filter(UserQuality.project_id == project_id).one()
+    project_modified = db.query(Project.updated_at).filter(Project.id == project_id).scalar()
+
+    modified = [t for t in (metrics_modified, users_modified, ratings_modified, project_modified) if t is not None]
+    return (max(modified, default=None), metrics, ratings)
+
+
+def build_project_daily_csv(db: Session, project_id: UUID, target_date: date) -> Report:
+    """
+    The 'Daily Scorecard' CSV for the Analytics Dashboard.
+    Now includes 'Minutes Worked'.
+    """
+    filename = f"Daily_Report_{target_date}.csv"
+    # Rating valid on the report date (SCD lookup), resolved in the same query
+    quality = rating_as_of(UserDailyMetrics.user_id, UserDailyMetrics.project_id, target_date)
+    query = db.query(
+        UserDailyMetrics.user_id,
+        UserDailyMetrics.work_role,
+        UserDailyMetrics.tasks_completed,
+        UserDailyMetrics.hours_worked,
+        UserDailyMetrics.productivity_score,
+        User.name,
+        User.email,
+        quality.c.rating
+    ).join(
+        User, UserDailyMetrics.user_id == User.id
+    ).outerjoin(
+        quality, true()
+    ).filter(
+        UserDailyMetrics.project_id == project_id,
+        UserDailyMetrics.metric_date == target_date
+    )
+
+    if not db.query(query.exists()).scalar():
+        return _message(filename, "No data found for this date")
+
+    def rows():
+        for r in _stream(db, query):
+            # Calculate Minutes
+            hours = float(r.hours_worked or 0)
+            yield (
+                r.name,
+                r.email,
+                r.work_role,
+                r.tasks_completed,
+                int(hours * 60),
+                round(hours, 2),
+                r.productivity_score,
+                _rating_text(r.rating),
+            )
+
+    return Report(
+        filename,
+        {"User Name": "str", "Email": "str", "Role": "str", "Tasks Completed": "int", "Minutes Worked": "int",
+         "Hours Worked": "float", "Productivity Score": "decimal", "Rating": "str"},
+        rows(),
+    )
+
+
+def build_role_drilldown_csv(db: Session, project_id: UUID, report_date: date) -> Report:
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(404, "Project not found")
+
+    # attendance_daily holds one row per user per day
+    query = db.query(
+        ProjectMember.work_role,
+        User.name,
+        User.email,
+        AttendanceDaily.status,
+        AttendanceDaily.minutes_worked,
+    ).join(
+        User, ProjectMember.user_id == User.id
+    ).outerjoin(
+        AttendanceDaily,
+        (AttendanceDaily.user_id == ProjectMember.user_id)
+        & (AttendanceDaily.attendance_date == report_date)
+    ).filter(
+        ProjectMember.project_id == project_id,
+        ProjectMember.is_active == True
+    )
+
+    def rows():
+        for r in _stream(db, query):
+            minutes = r.minutes_worked if r.status is not None else 0
+            yield (
+                project.code,
+                project.name,
+                report_date,
+                r.work_role,
+                r.name,
+                r.email,
+                r.status or "ABSENT",
+                minutes,
+                round(minutes / 60, 2) if minutes else 0,
+            )
+
+    return _blank_csv_when_empty(Report(
+        f"roster_{project.code}_{report_date}.csv",
+        {"project_code": "str", "project_name": "str", "date": "date", "role": "str", "user_name": "str",
+         "email": "str", "attendance_status": "str", "minutes_worked": "float", "hours_worked": "float"},
+        rows(),
+    ))
+
+
+def build_project_history_csv(
+    db: Session,
+    project_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    role: Optional[str] = None,
+) -> Report:
+    """
+    One summary row per user over the project's daily metrics, optionally
+    limited to a date window and a work role. The totals come from a single
+    GROUP BY user_id, so the output (and the work) scales with users, not
+    user-days.
+    """
+    project = db.query(Project).filter(Project.id == project_id).first()
+
+    filters = _metrics_filters(project_id, start_date, end_date, role)
+    if not db.query(db.query(UserDailyMetrics.id).filter(*filters).exists()).scalar():
+        return _message(None, "No data available", bare=True)
+
+    query = db.query(
+        User.name,
+        User.email,
+        func.sum(UserDailyMetrics.hours_worked).label("total_hours"),
+        func.sum(UserDailyMetrics.tasks_completed).label("total_tasks"),
+        # A score of 0 counts as "no score", as it always has
+        func.avg(UserDailyMetrics.productivity_score).filter(
+            UserDailyMetrics.productivity_score != 0
+        ).label("avg_score"),
+    ).join(
+        User, UserDailyMetrics.user_id == User.id
+    ).filter(
+        *filters
+    ).group_by(
+        UserDailyMetrics.user_id, User.name, User.email
+    ).order_by(User.name)
+
+    def rows():
+        for r in _stream(db, query):
+            total_hours = float(r.total_hours or 0)
+            yield (
+                project.name,
+                r.name,
+                r.email,
+                int(total_hours * 60),
+                round(total_hours, 2),
+                r.total_tasks or 0,
+                round(float(r.avg_score or 0), 2),
+            )
+
+    return Report(
+        f"history_{project.code}.csv",
+        {"project_name": "str", "user_name": "str", "email": "str", "total_minutes": "int",
+         "total_hours": "float", "total_tasks": "int", "avg_score": "float"},
+        rows(),
+    )
+
+
+def build_user_performance_csv(db: Session, user_id: UUID, start_date: date, end_date: date) -> Report:
+    user = db.query(User).get(user_id)
+    if not user:
+        raise HTTPException(404, "User not found")
+
+    quality = rating_as_of(UserDailyMetrics.user_id, UserDailyMetrics.project_id, UserDailyMetrics.metric_date)
+    query = db.query(
+        UserDailyMetrics.metric_date,
+        UserDailyMetrics.project_id,
+        UserDailyMetrics.work_role,
+        UserDailyMetrics.tasks_completed,
+        UserDailyMetrics.hours_worked,
+        UserDailyMetrics.productivity_score,
+        Project.name.label("project_name"),
+        quality.c.rating,
+    ).outerjoin(
+        Project, UserDailyMetrics.project_id == Project.id
+    ).outerjoin(
+        quality, true()
+    ).filter(
+        UserDailyMetrics.user_id == user_id,
+        UserDailyMetrics.metric_date >= start_date,
+        UserDailyMetrics.metric_date <= end_date
+    ).order_by(UserDailyMetrics.metric_date)
+
+    def rows():
+        for m in _stream(db, query):
+            hours = float(m.hours_worked or 0)
+            yield (
+                m.metric_date,
+                m.project_name or "N/A",
+                m.work_role,
+                m.tasks_completed,
+                int(hours * 60),
+                round(hours, 2),
+                m.productivity_score,
+                _rating_text(m.rating),
+            )
+
+    return _blank_csv_when_empty(Report(
+        f"report_{user.name}_{start_date}.csv",
+        {"Date": "date", "Project": "str", "Role": "str", "Tasks": "int", "Minutes Worked": "int",
+         "Hours Worked": "float", "Score": "decimal", "Rating": "str"},
+        rows(),
+    ))
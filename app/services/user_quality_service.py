@@ -0,0 +1,40 @@
+from datetime import date
+
+from sqlalchemy import Date, DateTime, cast, literal, or_, select
+
+from app.models.user_quality import UserQuality
+
+
+def rating_as_of(user_id, project_id, on_date):
+    """
+    LATERAL subquery with the user_quality row (`rating`, `quality_score`)
+    valid on `on_date` (a date or a date column) for each outer
+    (user_id, project_id): the latest version that started on or before
+    that day and had not ended before it.
+
+    Outer-join it so rows without a rating are kept:
+
+        q = rating_as_of(UserDailyMetrics.user_id, UserDailyMetrics.project_id, UserDailyMetrics.metric_date)
+        select(..., q.c.rating).outerjoin(q, true())
+
+    The day bounds are cast to timestamps instead of truncating valid_from /
+    valid_to, so the (user_id, project_id, valid_from) index is used.
+    """
+    if isinstance(on_date, date):
+        on_date = literal(on_date, Date)
+
+    day_start = cast(on_date, DateTime(timezone=True))
+    next_day_start = cast(on_date + 1, DateTime(timezone=True))
+
+    return (
+        select(UserQuality.rating, UserQuality.quality_score)
+        .where(
+            UserQuality.user_id == user_id,
+            UserQuality.project_id == project_id,
+            UserQuality.valid_from < next_day_start,
+            or_(UserQuality.valid_to == None, UserQuality.valid_to >= day_start),
+        )
+        .order_by(UserQuality.valid_from.desc())
+        .limit(1)
+        .lateral("quality_as_of")
+    )
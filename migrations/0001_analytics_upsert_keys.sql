@@ -0,0 +1,62 @@
+-- Conflict targets of the analytics bulk upserts
+-- (app.services.analytics_service.write_grades).
+--
+-- Rows that would violate the new keys are merged first: the most recently
+-- updated user_daily_metrics row wins, and duplicate user_project_history
+-- rows collapse into one spanning the earliest first and latest last
+-- worked date.
+
+BEGIN;
+
+-- user_daily_metrics: one row per (user, project, day)
+DELETE FROM user_daily_metrics d
+USING (
+    SELECT id,
+           row_number() OVER (
+               PARTITION BY user_id, project_id, metric_date
+               ORDER BY updated_at DESC NULLS LAST, created_at DESC NULLS LAST, id
+           ) AS rn
+    FROM user_daily_metrics
+) ranked
+WHERE d.id = ranked.id AND ranked.rn > 1;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_user_daily_metrics_user_project_date') THEN
+        ALTER TABLE user_daily_metrics
+            ADD CONSTRAINT uq_user_daily_metrics_user_project_date UNIQUE (user_id, project_id, metric_date);
+    END IF;
+END $$;
+
+-- user_project_history: one row per (user, project)
+WITH merged AS (
+    SELECT user_id,
+           project_id,
+           min(id::text)::uuid AS keep_id,
+           min(first_worked_date) AS first_worked_date,
+           max(last_worked_date) AS last_worked_date
+    FROM user_project_history
+    GROUP BY user_id, project_id
+    HAVING count(*) > 1
+)
+UPDATE user_project_history h
+SET first_worked_date = merged.first_worked_date,
+    last_worked_date = merged.last_worked_date
+FROM merged
+WHERE h.id = merged.keep_id;
+
+DELETE FROM user_project_history h
+USING user_project_history keep
+WHERE h.user_id = keep.user_id
+  AND h.project_id = keep.project_id
+  AND h.id::text > keep.id::text;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_user_project_history_user_project') THEN
+        ALTER TABLE user_project_history
+            ADD CONSTRAINT uq_user_project_history_user_project UNIQUE (user_id, project_id);
+    END IF;
+END $$;
+
+COMMIT;
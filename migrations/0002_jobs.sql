@@ -0,0 +1,38 @@
+-- The background job queue (app.models.job, app.services.job_runner).
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'job_status') THEN
+        CREATE TYPE job_status AS ENUM ('PENDING', 'RUNNING', 'SUCCEEDED', 'FAILED');
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id                  uuid PRIMARY KEY,
+    kind                varchar NOT NULL,
+    params              jsonb NOT NULL,
+    params_hash         varchar(64) NOT NULL,
+    status              job_status NOT NULL,
+    progress_done       integer NOT NULL,
+    progress_total      integer,
+    result              jsonb,
+    error               text,
+    -- The file itself lives in JOB_ARTIFACT_DIR, named after the job id
+    artifact_name       varchar,
+    artifact_media_type varchar,
+    created_by_user_id  uuid REFERENCES users (id),
+    created_at          timestamptz NOT NULL DEFAULT now(),
+    started_at          timestamptz,
+    -- Refreshed by the running process; the sweep fails jobs where it goes stale
+    heartbeat_at        timestamptz,
+    finished_at         timestamptz
+);
+
+-- At most one PENDING/RUNNING job per (kind, params): the enqueue conflict target
+CREATE UNIQUE INDEX IF NOT EXISTS uq_jobs_active_kind_params
+    ON jobs (kind, params_hash)
+    WHERE status IN ('PENDING', 'RUNNING');
+
+COMMIT;
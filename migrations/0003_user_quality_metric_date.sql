@@ -0,0 +1,13 @@
+-- The day an AUTO_CALC rating version was graded from, so that rejecting
+-- that day's work can revert the version
+-- (app.services.analytics_service.recalculate_partition).
+--
+-- Versions written before this column existed keep metric_date NULL and
+-- are left alone by the revert.
+--
+-- Not wrapped in a transaction: the index is built CONCURRENTLY.
+
+ALTER TABLE user_quality ADD COLUMN IF NOT EXISTS metric_date date;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_quality_project_metric_date
+    ON user_quality (project_id, metric_date);
@@ -0,0 +1,30 @@
+-- Conflict target of the project_daily_metrics rollup upsert
+-- (app.services.project_metrics_service.rollup_project_metrics): one row
+-- per project, day and work_role, AGGREGATE included.
+--
+-- Duplicates left by the old per-role and aggregate writers are removed
+-- first, keeping the most recently updated row; the next rollup of that
+-- day rewrites it in full.
+
+BEGIN;
+
+DELETE FROM project_daily_metrics d
+USING (
+    SELECT id,
+           row_number() OVER (
+               PARTITION BY project_id, metric_date, work_role
+               ORDER BY updated_at DESC NULLS LAST, created_at DESC NULLS LAST, id
+           ) AS rn
+    FROM project_daily_metrics
+) ranked
+WHERE d.id = ranked.id AND ranked.rn > 1;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_project_daily_metrics_project_date_role') THEN
+        ALTER TABLE project_daily_metrics
+            ADD CONSTRAINT uq_project_daily_metrics_project_date_role UNIQUE (project_id, metric_date, work_role);
+    END IF;
+END $$;
+
+COMMIT;
@@ -0,0 +1,63 @@
+-- Conflict target of the attendance_daily upserts
+-- (app.services.attendance_materializer): one roster row per user per day.
+--
+-- Where a (user, day) has several rows, one is kept: the row tied to an
+-- attendance request first, then one whose status was set (not UNKNOWN
+-- or ABSENT), then the most recently updated. Its clock fields are
+-- recomputed from the day's closed sessions in history, the way
+-- rebuild_attendance does it, since the deleted rows may have held some
+-- of them.
+
+BEGIN;
+
+CREATE TEMP TABLE attendance_duplicates ON COMMIT DROP AS
+SELECT user_id, attendance_date
+FROM attendance_daily
+GROUP BY user_id, attendance_date
+HAVING count(*) > 1;
+
+DELETE FROM attendance_daily a
+USING (
+    SELECT d.id,
+           row_number() OVER (
+               PARTITION BY d.user_id, d.attendance_date
+               ORDER BY (d.request_id IS NOT NULL) DESC,
+                        (d.status NOT IN ('UNKNOWN', 'ABSENT')) DESC,
+                        d.updated_at DESC,
+                        d.id
+           ) AS rn
+    FROM attendance_daily d
+    JOIN attendance_duplicates USING (user_id, attendance_date)
+) ranked
+WHERE a.id = ranked.id AND ranked.rn > 1;
+
+UPDATE attendance_daily a
+SET first_clock_in_at = s.first_clock_in_at,
+    last_clock_out_at = s.last_clock_out_at,
+    minutes_worked = s.minutes_worked,
+    updated_at = now()
+FROM (
+    SELECT h.user_id,
+           h.sheet_date,
+           min(h.clock_in_at) AS first_clock_in_at,
+           max(h.clock_out_at) AS last_clock_out_at,
+           sum(coalesce(
+               h.minutes_worked,
+               round((extract(epoch FROM h.clock_out_at - h.clock_in_at) / 60)::numeric, 2)
+           )) AS minutes_worked
+    FROM history h
+    JOIN attendance_duplicates d ON d.user_id = h.user_id AND d.attendance_date = h.sheet_date
+    WHERE h.clock_out_at IS NOT NULL
+    GROUP BY h.user_id, h.sheet_date
+) s
+WHERE a.user_id = s.user_id AND a.attendance_date = s.sheet_date;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_attendance_daily_user_date') THEN
+        ALTER TABLE attendance_daily
+            ADD CONSTRAINT uq_attendance_daily_user_date UNIQUE (user_id, attendance_date);
+    END IF;
+END $$;
+
+COMMIT;
@@ -0,0 +1,8 @@
+-- Point-in-time rating lookups
+-- (app.services.user_quality_service.rating_as_of): the LATERAL join seeks
+-- a user's versions on a project by valid_from.
+--
+-- Not wrapped in a transaction: the index is built CONCURRENTLY.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_quality_user_project_valid_from
+    ON user_quality (user_id, project_id, valid_from);
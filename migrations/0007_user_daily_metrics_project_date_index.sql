@@ -0,0 +1,8 @@
+-- Project-wide reads of user_daily_metrics: the project-history GROUP BY,
+-- the daily scorecard and the report watermark
+-- (app.services.report_service).
+--
+-- Not wrapped in a transaction: the index is built CONCURRENTLY.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_daily_metrics_project_date
+    ON user_daily_metrics (project_id, metric_date);
@@ -0,0 +1,7 @@
+-- Open sessions only: the live workers dashboard and stream
+-- (app.services.live_workers) and the clock-in/out lookups.
+--
+-- Not wrapped in a transaction: the index is built CONCURRENTLY.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_history_open_sessions
+    ON history (user_id) WHERE clock_out_at IS NULL;
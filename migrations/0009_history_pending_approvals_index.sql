@@ -0,0 +1,7 @@
+-- The pending-approvals queue: completed PENDING sessions walked by
+-- (clock_in_at, id) keyset cursors.
+--
+-- Not wrapped in a transaction: the index is built CONCURRENTLY.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_history_pending_approvals
+    ON history (clock_in_at, id) WHERE status = 'PENDING' AND clock_out_at IS NOT NULL;
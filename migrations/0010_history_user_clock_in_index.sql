@@ -0,0 +1,7 @@
+-- A user's own /time/history, paginated by (clock_in_at, id) keyset
+-- cursors.
+--
+-- Not wrapped in a transaction: the index is built CONCURRENTLY.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_history_user_clock_in
+    ON history (user_id, clock_in_at, id);
@@ -0,0 +1,104 @@
+"""
+Statements issued and time taken by /analytics/calculate-daily as the
+project grows. The set-based grading should issue the same number of
+statements for 10 users as for 10,000; only the rows per statement grow.
+tests/test_analytics_equivalence.py checks its results against the old
+row-by-row implementation.
+
+Seeds one project per size in DATABASE_URL (users with two approved
+sessions each on one day), grades it twice (first run, then a same-day
+rerun) and deletes everything again:
+
+    PYTHONPATH=. python scripts/bench_calculate_daily.py
+    PYTHONPATH=. python scripts/bench_calculate_daily.py --sizes 100 1000 10000
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import delete, event, insert
+
+import app.main  # noqa: F401  (maps every model the relationships refer to)
+from app.db.session import SessionLocal, engine
+from app.models.history import TimeHistory
+from app.models.project import Project
+from app.models.project_daily_metrics import ProjectDailyMetrics
+from app.models.user import User, UserRole
+from app.models.user_daily_metrics import UserDailyMetrics
+from app.models.user_project_history import UserProjectHistory
+from app.models.user_quality import UserQuality
+from app.services.analytics_service import calculate_daily_productivity
+
+
+def seed(size: int, day: date):
+    rnd = random.Random(size)
+    tag = uuid.uuid4().hex[:8]
+    project_id = uuid.uuid4()
+    user_ids = [uuid.uuid4() for _ in range(size)]
+    with SessionLocal() as db:
+        db.add(Project(id=project_id, code=f"C{tag}", name=f"Calculate bench {tag}", start_date=day))
+        db.flush()
+        db.execute(insert(User), [
+            {"id": user_id, "email": f"calc-{tag}-{i}@example.com", "name": f"calc {i}", "role": UserRole.USER}
+            for i, user_id in enumerate(user_ids)
+        ])
+        db.execute(insert(TimeHistory), [
+            {
+                "user_id": user_id, "project_id": project_id, "work_role": "ANNOTATION", "sheet_date": day,
+                "status": "APPROVED", "minutes_worked": rnd.randint(30, 300), "tasks_completed": rnd.randint(0, 40),
+            }
+            for user_id in user_ids for _ in range(2)
+        ])
+        db.commit()
+    return project_id, user_ids
+
+
+def cleanup(project_id, user_ids):
+    with SessionLocal() as db:
+        for model in (UserDailyMetrics, ProjectDailyMetrics, UserQuality, UserProjectHistory, TimeHistory):
+            db.execute(delete(model).where(model.project_id == project_id))
+        db.execute(delete(Project).where(Project.id == project_id))
+        db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
+
+
+def measure(project_id, day: date):
+    statements = []
+    count = lambda *args: statements.append(1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            calculate_daily_productivity(db, project_id, day)
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return len(statements), elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    args = parser.parse_args()
+    day = date.today()
+
+    # Warm up: the first grading pays for pandas' import and the pool
+    project_id, user_ids = seed(1, day)
+    measure(project_id, day)
+    cleanup(project_id, user_ids)
+
+    print(f"{'users':>7} {'run':<8} {'statements':>10} {'ms':>9}")
+    for size in args.sizes:
+        project_id, user_ids = seed(size, day)
+        try:
+            for run in ("first", "rerun"):
+                statements, ms = measure(project_id, day)
+                print(f"{size:>7} {run:<8} {statements:>10} {ms:>9.1f}")
+        finally:
+            cleanup(project_id, user_ids)
+
+
+if __name__ == "__main__":
+    main()
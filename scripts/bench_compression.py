@@ -0,0 +1,133 @@
+"""
+What CompressionMiddleware costs and saves per response: bytes on the
+wire, server time spent producing the body, time to the first body chunk
+of a streamed export, and the resulting time until a client on a link of
+the given speed has the whole body (network latency left out).
+
+The payloads are built in process, no database needed: a JSON list shaped
+like a dashboard response and a CSV export streamed through
+report_service.iter_csv. Each is sent through the middleware as plain
+ASGI calls, once per content-coding this install supports (zstd and br
+need the optional zstandard / brotli packages) and once uncompressed:
+
+    PYTHONPATH=. python scripts/bench_compression.py
+    PYTHONPATH=. python scripts/bench_compression.py --csv-rows 1000000 --mbits 5 50 1000
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from starlette.responses import Response, StreamingResponse
+
+from app.middlewares.compression import ENCODERS, CompressionMiddleware
+from app.services.report_service import Report, iter_csv
+
+
+def json_payload(items: int) -> bytes:
+    rnd = random.Random(items)
+    return json.dumps([
+        {
+            "user_id": f"00000000-0000-0000-0000-{i:012d}",
+            "name": f"Worker {i}",
+            "email": f"worker{i}@example.com",
+            "project_code": f"PRJ-{i % 40:03d}",
+            "work_role": rnd.choice(["ANNOTATION", "QA", "REVIEW"]),
+            "clock_in_at": f"2026-10-01T{8 + i % 4:02d}:{i % 60:02d}:00+00:00",
+            "minutes_so_far": rnd.randint(0, 480),
+            "tasks_completed": rnd.randint(0, 60),
+        }
+        for i in range(items)
+    ]).encode()
+
+
+def csv_report(rows: int) -> Report:
+    rnd = random.Random(rows)
+    start = date(2024, 1, 1)
+    return Report(
+        "bench.csv",
+        {"Date": "date", "Project": "str", "Role": "str", "Tasks": "int", "Minutes Worked": "int",
+         "Hours Worked": "float", "Score": "float", "Rating": "str"},
+        (
+            (start + timedelta(days=i % 500), f"Project {i % 40}", rnd.choice(["ANNOTATION", "QA"]),
+             rnd.randint(0, 40), minutes, round(minutes / 60, 2), rnd.choice([3.0, 7.0, 10.0]),
+             rnd.choice(["GOOD", "AVERAGE", "BAD"]))
+            for i, minutes in ((i, rnd.randint(30, 480)) for i in range(rows))
+        ),
+    )
+
+
+async def send_once(make_response, coding):
+    """One request through the middleware; (wire bytes, seconds, seconds to first body chunk)."""
+    app = CompressionMiddleware(make_response())
+    headers = [(b"accept-encoding", coding.encode())] if coding else []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""}
+    size = 0
+    first = None
+
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client never disconnects; StreamingResponse waits on this
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal size, first
+        if message["type"] == "http.response.body":
+            if first is None:
+                first = time.perf_counter()
+            size += len(message.get("body", b""))
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    return size, time.perf_counter() - started, first - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json-items", type=int, default=5000)
+    parser.add_argument("--csv-rows", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--mbits", type=float, nargs="+", default=[10, 100, 1000], help="link speeds, Mbit/s")
+    args = parser.parse_args()
+
+    body = json_payload(args.json_items)
+    # name -> (response factory, whether the body is sent while it is produced)
+    payloads = {
+        f"json {args.json_items} items": (lambda: Response(body, media_type="application/json"), False),
+        f"csv {args.csv_rows} rows": (
+            lambda: StreamingResponse(iter_csv(csv_report(args.csv_rows)), media_type="text/csv"), True,
+        ),
+    }
+
+    speeds = "".join(f" {f'@{mbits:g}Mb ms':>12}" for mbits in args.mbits)
+    print(f"{'payload':<22} {'coding':<9} {'bytes':>11} {'ratio':>6} {'server ms':>10} {'first ms':>9}{speeds}")
+    for name, (make_response, streamed) in payloads.items():
+        plain = None
+        for coding in [None, *ENCODERS]:
+            runs = [asyncio.run(send_once(make_response, coding)) for _ in range(args.runs)]
+            size = runs[0][0]
+            server = statistics.median(seconds for _, seconds, _ in runs)
+            first = statistics.median(first for _, _, first in runs)
+            plain = plain or size
+            # Time until the client has the whole body: a streamed body is on
+            # the wire while the rest is produced, a single one only after
+            combine = max if streamed else (lambda produce, transfer: produce + transfer)
+            totals = "".join(
+                f" {combine(server, size * 8 / (mbits * 1e6)) * 1000:>12.0f}" for mbits in args.mbits
+            )
+            print(
+                f"{name:<22} {coding or 'identity':<9} {size:>11} {plain / size:>6.1f}"
+                f" {server * 1000:>10.1f} {first * 1000:>9.1f}{totals}"
+            )
+
+
+if __name__ == "__main__":
+    main()
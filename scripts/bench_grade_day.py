@@ -0,0 +1,185 @@
+"""
+Time taken by the nightly all-projects grading (calculate_all_projects)
+at 100k user-days, split into its stages: grade_day's read, the
+vectorized grading, and write_grades' bulk writes. --per-project also
+times the same day graded one project at a time through
+calculate_daily_productivity, which is what a nightly loop over
+/analytics/calculate-daily would do.
+
+Seeds --projects projects of --users-per-project users each in
+DATABASE_URL, drawn from a pool of --users people, every user-day with
+two approved sessions, with INSERT ... SELECT generate_series. Grades the
+day twice (first run, then a same-day rerun) and deletes everything
+again. The pool is kept small because deleting a user checks every
+table that refers to users, several of them without an index:
+
+    PYTHONPATH=. python scripts/bench_grade_day.py
+    PYTHONPATH=. python scripts/bench_grade_day.py --projects 50 --users-per-project 2000 --per-project
+"""
+import argparse
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import delete, event, select, text
+
+import app.main  # noqa: F401  (maps every model the relationships refer to)
+from app.db.session import SessionLocal, engine
+from app.models.history import TimeHistory
+from app.models.project import Project
+from app.models.project_daily_metrics import ProjectDailyMetrics
+from app.models.user import User
+from app.models.user_daily_metrics import UserDailyMetrics
+from app.models.user_project_history import UserProjectHistory
+from app.models.user_quality import UserQuality
+from app.services import analytics_service
+
+# Far from any real sheet_date, so only the seeded sessions are graded
+DAY = date(2001, 1, 1)
+
+
+def seed(projects: int, users_per_project: int, users: int):
+    tag = uuid.uuid4().hex[:8]
+    params = {"tag": tag, "projects": projects, "per_project": users_per_project, "users": users, "day": DAY}
+    with engine.begin() as conn:
+        conn.execute(text("""
+            insert into projects (id, code, name, is_active, start_date, created_at, updated_at)
+            select gen_random_uuid(), 'G' || :tag || p, 'Grade bench ' || :tag || ' ' || p, true, :day, now(), now()
+            from generate_series(1, :projects) p
+        """), params)
+        conn.execute(text("""
+            insert into users (id, email, name, role, is_active, created_at, updated_at)
+            select gen_random_uuid(), 'grade-' || :tag || '-' || i || '@example.com', 'grade ' || i, 'USER', true, now(), now()
+            from generate_series(1, :users) i
+        """), params)
+        # Project n staffs the pool users n * per_project + j (mod users),
+        # j < per_project; two sessions each
+        conn.execute(text("""
+            with p as (
+                select id, row_number() over (order by code) - 1 as n
+                from projects where code like 'G' || :tag || '%'
+            ), u as (
+                select id, split_part(name, ' ', 2)::int - 1 as i
+                from users where email like 'grade-' || :tag || '-%'
+            ), staffing as (
+                select p.id as project_id, (p.n * :per_project + j) % :users as i
+                from p, generate_series(0, :per_project - 1) j
+            )
+            insert into history
+                (id, user_id, project_id, work_role, status, sheet_date, clock_in_at,
+                 tasks_completed, minutes_worked, created_at, updated_at)
+            select gen_random_uuid(), u.id, p.id, 'ANNOTATION', 'APPROVED', :day, now(),
+                   (random() * 40)::int, 30 + (random() * 270)::int, now(), now()
+            from staffing s join u on u.i = s.i join p on p.id = s.project_id, generate_series(1, 2)
+        """), params)
+        project_ids = conn.scalars(select(Project.id).where(Project.code.like(f"G{tag}%"))).all()
+        conn.execute(text("analyze history; analyze users; analyze projects"))
+    return tag, project_ids
+
+
+def cleanup(tag: str, project_ids):
+    with SessionLocal() as db:
+        for model in (UserDailyMetrics, ProjectDailyMetrics, UserQuality, UserProjectHistory, TimeHistory):
+            db.execute(delete(model).where(model.project_id.in_(project_ids)))
+        db.commit()
+    # The foreign key checks of the user delete scan history and
+    # user_quality (approved_by/assessed_by have no index); vacuum first so
+    # they no longer cover the pages of the rows just deleted
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("vacuum history, user_quality"))
+    with SessionLocal() as db:
+        db.execute(delete(Project).where(Project.id.in_(project_ids)))
+        db.execute(delete(User).where(User.email.like(f"grade-{tag}-%")))
+        db.commit()
+
+
+class Statements:
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def all_projects(project_ids):
+    """calculate_all_projects, stage by stage."""
+    with SessionLocal() as db, Statements() as statements:
+        started = time.perf_counter()
+        users, projects = analytics_service.grade_day(db, DAY, project_ids=project_ids)
+        graded = time.perf_counter()
+        analytics_service.write_grades(db, DAY, users, project_ids=project_ids)
+        db.commit()
+        done = time.perf_counter()
+    return {
+        "user-days": len(users),
+        "grade ms": (graded - started) * 1000,
+        "write ms": (done - graded) * 1000,
+        "total ms": (done - started) * 1000,
+        "statements": statements.count,
+    }
+
+
+def per_project(project_ids):
+    """The same day through calculate_daily_productivity, one project after another."""
+    with SessionLocal() as db, Statements() as statements:
+        started = time.perf_counter()
+        processed = sum(
+            analytics_service.calculate_daily_productivity(db, project_id, DAY)["processed_users"]
+            for project_id in project_ids
+        )
+        done = time.perf_counter()
+    return {
+        "user-days": processed,
+        "grade ms": None,
+        "write ms": None,
+        "total ms": (done - started) * 1000,
+        "statements": statements.count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--users-per-project", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=5000, help="size of the pool the projects draw from")
+    parser.add_argument("--per-project", action="store_true", help="also grade one project at a time")
+    args = parser.parse_args()
+
+    # Warm up: the first grading pays for pandas' import and the pool
+    tag, project_ids = seed(1, 10, 10)
+    all_projects(project_ids)
+    cleanup(tag, project_ids)
+
+    tag, project_ids = seed(args.projects, min(args.users_per_project, args.users), args.users)
+    try:
+        passes = [("all", all_projects)] + ([("per-project", per_project)] if args.per_project else [])
+        print(f"{'pass':<12} {'run':<6} {'user-days':>9} {'grade ms':>9} {'write ms':>9} {'total ms':>9} {'statements':>10}")
+        for name, grade in passes:
+            for run in ("first", "rerun"):
+                row = grade(project_ids)
+                grade_ms, write_ms, total_ms = (
+                    "-" if row[key] is None else f"{row[key]:.0f}" for key in ("grade ms", "write ms", "total ms")
+                )
+                print(
+                    f"{name:<12} {run:<6} {row['user-days']:>9} {grade_ms:>9} {write_ms:>9}"
+                    f" {total_ms:>9} {row['statements']:>10}"
+                )
+            if name == "all" and args.per_project:
+                # Start the per-project passes from the same empty tables
+                with SessionLocal() as db:
+                    for model in (UserDailyMetrics, ProjectDailyMetrics, UserQuality, UserProjectHistory):
+                        db.execute(delete(model).where(model.project_id.in_(project_ids)))
+                    db.commit()
+    finally:
+        cleanup(tag, project_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Size and generation time of one large export as CSV, Parquet and Arrow.
+
+Seeds the same million user_daily_metrics rows as bench_report_memory.py
+and writes them out with report_service.render in each format, with the
+user-performance columns (one row per user-day, nothing aggregated). Each
+format runs in a fresh interpreter for its peak RSS. "read only" streams
+the rows without writing them, i.e. the query's share of the time; "gzip"
+is the size CompressionMiddleware would send for the CSV, and the time
+it adds, which is not counted in "seconds". pyarrow's import is left out
+of the time but not out of the peak RSS.
+
+    PYTHONPATH=. python scripts/bench_report_formats.py
+    PYTHONPATH=. python scripts/bench_report_formats.py --users 200 --days 100
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from bench_report_memory import cleanup, seed
+
+# Runs in the child: one export of the seeded project, then its peak RSS
+CHILD = """
+import json, resource, sys, time, uuid, zlib
+import app.main
+from app.db.session import SessionLocal
+from app.models.user_daily_metrics import UserDailyMetrics
+from app.schemas.report import ReportFormat
+from app.services import report_service
+
+project_id, fmt = uuid.UUID(sys.argv[1]), sys.argv[2]
+if fmt in ("parquet", "arrow"):
+    import pyarrow.parquet  # loaded on first use; not part of the export's time
+started = time.perf_counter()
+with SessionLocal() as db:
+    query = db.query(
+        UserDailyMetrics.metric_date, UserDailyMetrics.work_role, UserDailyMetrics.tasks_completed,
+        UserDailyMetrics.hours_worked, UserDailyMetrics.productivity_score,
+    ).filter(UserDailyMetrics.project_id == project_id).order_by(UserDailyMetrics.user_id, UserDailyMetrics.metric_date)
+
+    def rows():
+        for m in report_service._stream(db, query):
+            hours = float(m.hours_worked or 0)
+            yield (m.metric_date, m.work_role, m.tasks_completed, int(hours * 60), round(hours, 2), m.productivity_score)
+
+    report = report_service.Report(
+        "bench.csv",
+        {"Date": "date", "Role": "str", "Tasks": "int", "Minutes Worked": "int", "Hours Worked": "float", "Score": "decimal"},
+        rows(),
+    )
+    size = gzipped = gzip_seconds = 0
+    if fmt == "read":
+        for _ in report.rows:
+            pass
+    else:
+        gzip = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in report_service.render(report, ReportFormat(fmt))[2]:
+            data = chunk.encode() if isinstance(chunk, str) else chunk
+            size += len(data)
+            if fmt == "csv":
+                gzip_started = time.perf_counter()
+                gzipped += len(gzip.compress(data))
+                gzip_seconds += time.perf_counter() - gzip_started
+        gzipped += len(gzip.flush()) if fmt == "csv" else 0
+print(json.dumps({
+    "bytes": size,
+    "gzip": gzipped,
+    "seconds": time.perf_counter() - started - gzip_seconds,
+    "gzip_seconds": gzip_seconds,
+    "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def export(project_id, fmt: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, str(project_id), fmt],
+        env={**os.environ, "PYTHONPATH": os.path.abspath(".")},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=500)
+    args = parser.parse_args()
+
+    tag, project_id = seed(args.users, args.days)
+    try:
+        print(f"{args.users * args.days} rows")
+        print(f"{'format':<10} {'MB':>8} {'seconds':>8} {'gzip MB':>8} {'gzip s':>8} {'peak MB':>8}")
+        for fmt in ("read", "csv", "parquet", "arrow"):
+            row = export(project_id, fmt)
+            size = "-" if fmt == "read" else f"{row['bytes'] / 1e6:.1f}"
+            gzipped, gzip_seconds = (
+                (f"{row['gzip'] / 1e6:.1f}", f"{row['gzip_seconds']:.2f}") if fmt == "csv" else ("-", "-")
+            )
+            name = "read only" if fmt == "read" else fmt
+            print(
+                f"{name:<10} {size:>8} {row['seconds']:>8.2f} {gzipped:>8} {gzip_seconds:>8} {row['peak_mb']:>8.0f}"
+            )
+    finally:
+        cleanup(tag, project_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Peak memory and time of the project-history export over a million
+user_daily_metrics rows.
+
+Seeds one project with --users users and --days days of metrics each
+(2,000 x 500 = 1M rows by default) in DATABASE_URL with INSERT ... SELECT
+generate_series. Each export then runs in a fresh interpreter that goes
+through the FastAPI app, so peak RSS belongs to that one request. The
+request goes through the HTTP route rather than report_service, so
+--compare can measure an older checkout whose builders differ:
+
+    PYTHONPATH=. python scripts/bench_report_memory.py
+    git worktree add /tmp/before <old revision>
+    PYTHONPATH=. python scripts/bench_report_memory.py --compare /tmp/before --formats csv
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import uuid
+from datetime import date
+
+from sqlalchemy import delete, text
+
+import app.main  # noqa: F401  (maps every model the relationships refer to)
+from app.db.session import SessionLocal, engine
+from app.models.project import Project
+from app.models.user import User
+from app.models.user_daily_metrics import UserDailyMetrics
+
+FIRST_DAY = date(2024, 1, 1)
+
+# Runs in the child: one GET through the app, then its own peak RSS
+CHILD = """
+import json, resource, sys, time
+from starlette.testclient import TestClient
+from app.main import app
+
+path = sys.argv[1]
+client = TestClient(app)
+imported_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+response = client.get(path)
+elapsed = time.perf_counter() - started
+response.raise_for_status()
+print(json.dumps({
+    "bytes": len(response.content),
+    "seconds": elapsed,
+    "imported_mb": imported_kb / 1024,
+    "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def seed(users: int, days: int):
+    tag = uuid.uuid4().hex[:8]
+    project_id = uuid.uuid4()
+    params = {"tag": tag, "project_id": project_id, "users": users, "days": days, "first_day": FIRST_DAY}
+    with SessionLocal() as db:
+        db.add(Project(id=project_id, code=f"M{tag}", name=f"Memory bench {tag}", start_date=FIRST_DAY))
+        db.commit()
+    with engine.begin() as conn:
+        conn.execute(text("""
+            insert into users (id, email, name, role, is_active, created_at, updated_at)
+            select gen_random_uuid(), 'memory-' || :tag || '-' || i || '@example.com', 'memory ' || i, 'USER', true,
+                   now(), now()
+            from generate_series(1, :users) i
+        """), params)
+        conn.execute(text("""
+            insert into user_daily_metrics
+                (id, user_id, project_id, work_role, metric_date, hours_worked, tasks_completed, productivity_score,
+                 created_at, updated_at)
+            select gen_random_uuid(), u.id, :project_id, 'ANNOTATION', cast(:first_day as date) + d,
+                   round((random() * 8)::numeric, 2), (random() * 40)::int, (array[3, 7, 10])[1 + (random() * 2)::int],
+                   now(), now()
+            from users u, generate_series(0, :days - 1) d
+            where u.email like 'memory-' || :tag || '-%'
+        """), params)
+        conn.execute(text("analyze user_daily_metrics"))
+    return tag, project_id
+
+
+def cleanup(tag: str, project_id):
+    with SessionLocal() as db:
+        db.execute(delete(UserDailyMetrics).where(UserDailyMetrics.project_id == project_id))
+        db.execute(delete(Project).where(Project.id == project_id))
+        db.execute(delete(User).where(User.email.like(f"memory-{tag}-%")))
+        db.commit()
+
+
+def export(root: str, path: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, path],
+        cwd=root,
+        env={**os.environ, "PYTHONPATH": root},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=500)
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet"], choices=["csv", "parquet", "arrow"])
+    parser.add_argument("--compare", action="append", default=[], metavar="ROOT", help="also measure this checkout")
+    args = parser.parse_args()
+
+    tag, project_id = seed(args.users, args.days)
+    try:
+        print(f"{args.users * args.days} user_daily_metrics rows")
+        print(f"{'checkout':<28} {'format':<8} {'bytes':>10} {'seconds':>8} {'after import MB':>15} {'peak MB':>8}")
+        for root in [os.path.abspath(".")] + [os.path.abspath(root) for root in args.compare]:
+            for fmt in args.formats:
+                row = export(root, f"/reports/project-history?project_id={project_id}&format={fmt}")
+                print(
+                    f"{root[-28:]:<28} {fmt:<8} {row['bytes']:>10} {row['seconds']:>8.2f}"
+                    f" {row['imported_mb']:>15.0f} {row['peak_mb']:>8.0f}"
+                )
+    finally:
+        cleanup(tag, project_id)
+
+
+if __name__ == "__main__":
+    main()
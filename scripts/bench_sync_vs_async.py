@@ -0,0 +1,145 @@
+"""
+Throughput of the same read endpoint served sync (def + Session, run in
+Starlette's threadpool) and async (async def + AsyncSession on asyncpg),
+at increasing concurrency.
+
+Both handlers are the /admin/dashboard/live query (open_sessions_query)
+over a seeded set of open sessions. --db-latency-ms adds a pg_sleep to
+every request to model a slower query or a remote database, which is
+where the threadpool, not Postgres, becomes the limit for the sync side.
+Requests go through httpx's ASGI transport, in process, so the numbers
+compare the two request paths rather than a network stack.
+
+Writes to DATABASE_URL (one project, its users and open sessions) and
+removes them again:
+
+    PYTHONPATH=. python scripts/bench_sync_vs_async.py
+    PYTHONPATH=. python scripts/bench_sync_vs_async.py --db-latency-ms 20 --concurrency 10 50 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import date
+
+from fastapi import Depends, FastAPI
+from sqlalchemy import delete, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import app.main  # noqa: F401  (maps every model the relationships refer to)
+from app.db.session import SessionLocal, async_engine, get_async_read_db, get_read_db
+from app.models.history import TimeHistory
+from app.models.project import Project
+from app.models.user import User, UserRole
+from app.schemas.dashboard import LiveWorkerResponse
+from app.services.live_workers import open_sessions_query, to_live_worker
+
+
+def build_app(latency_seconds: float) -> FastAPI:
+    bench = FastAPI()
+    pause = select(func.pg_sleep(latency_seconds))
+
+    @bench.get("/sync", response_model=list[LiveWorkerResponse])
+    def live_sync(db: Session = Depends(get_read_db)):
+        if latency_seconds:
+            db.execute(pause)
+        return [to_live_worker(row) for row in db.execute(open_sessions_query()).all()]
+
+    @bench.get("/async", response_model=list[LiveWorkerResponse])
+    async def live_async(db: AsyncSession = Depends(get_async_read_db)):
+        if latency_seconds:
+            await db.execute(pause)
+        return [to_live_worker(row) for row in (await db.execute(open_sessions_query())).all()]
+
+    return bench
+
+
+def seed(sessions: int):
+    tag = uuid.uuid4().hex[:8]
+    project_id = uuid.uuid4()
+    user_ids = [uuid.uuid4() for _ in range(sessions)]
+    with SessionLocal() as db:
+        db.add(Project(id=project_id, code=f"B{tag}", name=f"Bench {tag}", start_date=date.today()))
+        for i, user_id in enumerate(user_ids):
+            db.add(User(id=user_id, email=f"bench-{tag}-{i}@example.com", name=f"bench {i}", role=UserRole.USER))
+        db.flush()
+        for user_id in user_ids:
+            db.add(TimeHistory(user_id=user_id, project_id=project_id, work_role="ANNOTATION"))
+        db.commit()
+    return project_id, user_ids
+
+
+def cleanup(project_id, user_ids):
+    with SessionLocal() as db:
+        db.execute(delete(TimeHistory).where(TimeHistory.project_id == project_id))
+        db.execute(delete(Project).where(Project.id == project_id))
+        db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
+
+
+async def run(client, path: str, concurrency: int, requests: int):
+    latencies = []
+    errors = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                response.raise_for_status()
+            except Exception as exc:
+                # e.g. QueuePool checkout timeouts once the pool is exhausted
+                errors.append(type(exc).__name__)
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if not latencies:
+        return 0.0, float("nan"), float("nan"), errors
+    latencies.sort()
+    return (
+        len(latencies) / elapsed,
+        statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.95)] * 1000,
+        errors,
+    )
+
+
+async def main_async(args):
+    import httpx
+
+    transport = httpx.ASGITransport(app=build_app(args.db_latency_ms / 1000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/sync", "/async"):
+            await run(client, path, 4, 50)  # warm both pools
+        print(f"{'mode':<6} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}  errors")
+        for concurrency in args.concurrency:
+            for path in ("/sync", "/async"):
+                rate, p50, p95, errors = await run(client, path, concurrency, args.requests)
+                failed = f"{len(errors)} ({', '.join(sorted(set(errors)))})" if errors else "0"
+                print(f"{path[1:]:<6} {concurrency:>5} {rate:>9.0f} {p50:>9.1f} {p95:>9.1f}  {failed}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200, help="open sessions returned per request")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per mode and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    project_id, user_ids = seed(args.sessions)
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        cleanup(project_id, user_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Latency of verifying a Supabase access token locally (JWT signature and
+claims, SUPABASE_AUTH_MODE=local) against asking Supabase (auth.get_user,
+SUPABASE_AUTH_MODE=remote).
+
+By default the remote side talks to a stub of the /auth/v1/user endpoint
+on localhost, so it measures the client round trip without network
+latency; pass --remote-delay-ms to model the RTT to your Supabase region.
+To measure the real thing, point SUPABASE_URL / SUPABASE_ANON_KEY /
+SUPABASE_JWT_SECRET at a project and pass one of its access tokens:
+
+    PYTHONPATH=. python scripts/bench_token_verification.py
+    PYTHONPATH=. python scripts/bench_token_verification.py --remote-delay-ms 40
+    PYTHONPATH=. python scripts/bench_token_verification.py --token "$ACCESS_TOKEN"
+"""
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _stub_supabase(delay_seconds: float) -> str:
+    """Serves GET /auth/v1/user like Supabase does for a valid token."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay_seconds)
+            body = json.dumps({
+                "id": str(uuid.UUID(int=1)),
+                "aud": "authenticated",
+                "role": "authenticated",
+                "email": "bench@example.com",
+                "app_metadata": {},
+                "user_metadata": {"full_name": "Bench"},
+                "created_at": "2026-01-01T00:00:00Z",
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def _mint_token(secret: str, issuer: str) -> str:
+    from jose import jwt
+
+    now = int(time.time())
+    return jwt.encode(
+        {
+            "sub": str(uuid.UUID(int=1)),
+            "email": "bench@example.com",
+            "aud": "authenticated",
+            "iss": issuer,
+            "iat": now,
+            "exp": now + 3600,
+            "user_metadata": {"full_name": "Bench"},
+        },
+        secret,
+        algorithm="HS256",
+    )
+
+
+def _measure(label: str, verify, iterations: int):
+    verify()  # warm up (client construction, key lookup)
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        verify()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    print(
+        f"{label:<8} n={iterations:<6} mean={statistics.fmean(samples):8.3f} ms  "
+        f"p50={samples[len(samples) // 2]:8.3f} ms  p95={samples[int(len(samples) * 0.95)]:8.3f} ms"
+    )
+    return statistics.fmean(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--remote-iterations", type=int, default=200)
+    parser.add_argument("--remote-delay-ms", type=float, default=0.0, help="stub server delay per request")
+    parser.add_argument("--token", help="a real access token; uses SUPABASE_* from the environment")
+    args = parser.parse_args()
+
+    if not args.token:
+        os.environ["SUPABASE_URL"] = _stub_supabase(args.remote_delay_ms / 1000)
+        os.environ["SUPABASE_ANON_KEY"] = "bench-anon-key"
+        os.environ["SUPABASE_JWT_SECRET"] = "bench-secret-" + uuid.uuid4().hex
+    os.environ["SUPABASE_AUTH_MODE"] = "local"
+
+    # Reads the settings above at import
+    from app.core import supabase_auth
+
+    token = args.token or _mint_token(supabase_auth.SUPABASE_JWT_SECRET, supabase_auth.SUPABASE_JWT_ISSUER)
+    if supabase_auth.verify_token_locally(token) is None:
+        raise SystemExit("Token cannot be verified locally (HS256 secret / issuer not configured?)")
+
+    local = _measure("local", lambda: supabase_auth.verify_token_locally(token), args.iterations)
+    remote = _measure("remote", lambda: supabase_auth._get_user_remote(token), args.remote_iterations)
+    print(f"local verification is {remote / local:.0f}x faster per request")
+
+
+if __name__ == "__main__":
+    main()
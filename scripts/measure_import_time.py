@@ -0,0 +1,76 @@
+"""
+Cold import cost of the application, from `python -X importtime`.
+
+Imports `app.main` in fresh interpreters and reports the median wall time,
+the cumulative import time of app.main, the heaviest top-level packages,
+and whether the packages that should load lazily were imported at start.
+--root measures another checkout, so a before/after comparison is:
+
+    git worktree add /tmp/before <old revision>
+    PYTHONPATH=. python scripts/measure_import_time.py --root /tmp/before
+    PYTHONPATH=. python scripts/measure_import_time.py
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+# Loaded on first use, never by importing the app
+LAZY_PACKAGES = ("supabase", "pandas", "httpx", "pyarrow")
+
+
+def import_once(root: str, module: str):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root,
+        env={**os.environ, "PYTHONPATH": root},
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+
+    # "import time: self [us] | cumulative | imported package"
+    cumulative = {}
+    by_package = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        cumulative[name] = int(cumulative_us)
+        by_package[name.split(".")[0]] += int(self_us)
+    return wall, cumulative, by_package
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=".", help="checkout to measure")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    root = os.path.abspath(args.root)
+
+    import_once(root, args.module)  # warm the bytecode and file system caches
+    runs = [import_once(root, args.module) for _ in range(args.runs)]
+    walls = [wall for wall, _, _ in runs]
+    totals = [cumulative[args.module] for _, cumulative, _ in runs]
+    _, cumulative, by_package = runs[-1]
+
+    print(f"{root}: import {args.module}, {args.runs} runs")
+    print(f"  wall time (interpreter included): median {statistics.median(walls) * 1000:.0f} ms")
+    print(f"  cumulative import time:           median {statistics.median(totals) / 1000:.0f} ms")
+    print(f"  heaviest top-level packages (self time, last run):")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"    {package:<24} {self_us / 1000:8.1f} ms")
+    loaded = [package for package in LAZY_PACKAGES if package in cumulative]
+    print(f"  lazy packages imported at start:  {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
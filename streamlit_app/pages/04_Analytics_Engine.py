@@ -1,3 +1,4 @@
+import time
 import streamlit as st
 import requests
 import pandas as pd
@@ -51,20 +52,45 @@ with col3:
 st.divider()
 
 # --- 3. RUN CALCULATION ---
+def wait_for_job(job_id, progress_bar):
+    """Polls the background job until it finishes and returns it."""
+    while True:
+        job_res = requests.get(f"{API_URL}/jobs/{job_id}", headers=headers)
+        job_res.raise_for_status()
+        job = job_res.json()
+
+        total = job.get("progress_total") or 1
+        progress_bar.progress(
+            min(job["progress_done"] / total, 1.0),
+            text=f"{job['status'].title()}... {job.get('elapsed_seconds') or 0:.1f}s"
+        )
+
+        if job["status"] in ("SUCCEEDED", "FAILED"):
+            return job
+        time.sleep(1)
+
 if run_btn:
     with st.spinner("Crunching numbers... calculating averages... grading users..."):
         try:
-            # Call the Analytics API
-            calc_url = f"{API_URL}/analytics/calculate-daily"
-            params = {
-                "project_id": project_id,
-                "calculation_date": str(selected_date)
-            }
-            
-            res = requests.post(calc_url, params=params, headers=headers)
-            
-            if res.status_code == 200:
-                data = res.json()
+            # Queue the analysis; the API answers at once with a job id
+            res = requests.post(
+                f"{API_URL}/jobs/",
+                json={
+                    "kind": "analytics.calculate_daily",
+                    "params": {
+                        "project_id": project_id,
+                        "calculation_date": str(selected_date)
+                    }
+                },
+                headers=headers
+            )
+
+            job = None
+            if res.status_code == 202:
+                job = wait_for_job(res.json()["id"], st.progress(0.0, text="Queued..."))
+
+            if job and job["status"] == "SUCCEEDED":
+                data = job["result"]
                 
                 # A. Show Summary Metrics
                 st.success("Analysis Complete!")
@@ -131,8 +157,8 @@ if run_btn:
                 else:
                     st.error("Report generated, but CSV download failed.")
                     
-            elif res.status_code == 404:
-                st.error("No APPROVED work logs found for this date. Go to 'Approvals' page first!")
+            elif job:
+                st.error(f"Analysis failed: {job.get('error')}")
             else:
                 st.error(f"Error {res.status_code}: {res.text}")
                 
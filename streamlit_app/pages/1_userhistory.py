@@ -42,19 +42,25 @@ with col1:
 with col2:
     date_to = st.date_input("📅 Date To", value=date.today())
 
-# Fetch data first to populate project/role dropdowns
-all_history = authenticated_request("GET", "/time/history")
+params = {}
+if date_from:
+    params["start_date"] = str(date_from)
+if date_to:
+    params["end_date"] = str(date_to)
+
+# Per-day totals (summed by the API) populate the dropdowns and the stats
+summary = authenticated_request("GET", "/time/history/summary", params=params) or []
+df_summary = pd.DataFrame(summary)
 
 # Get unique projects and roles for dropdown
 projects_list = ["All Projects"]
 roles_list = ["All Roles"]
+project_ids = {}
 
-if all_history:
-    df_all = pd.DataFrame(all_history)
-    if 'project_name' in df_all.columns:
-        projects_list += list(df_all['project_name'].dropna().unique())
-    if 'work_role' in df_all.columns:
-        roles_list += list(df_all['work_role'].dropna().unique())
+if not df_summary.empty:
+    project_ids = dict(zip(df_summary['project_name'].fillna("Unknown"), df_summary['project_id']))
+    projects_list += sorted(project_ids)
+    roles_list += sorted(df_summary['work_role'].dropna().unique())
 
 with col3:
     project_filter = st.selectbox("🏢 Project (Optional)", projects_list)
@@ -69,33 +75,41 @@ with col5:
 st.markdown("---")
 
 # --- FETCH & FILTER DATA ---
-params = {}
-if date_from:
-    params["start_date"] = str(date_from)
-if date_to:
-    params["end_date"] = str(date_to)
-
-time_history = authenticated_request("GET", "/time/history", params=params)
+if project_filter != "All Projects":
+    params["project_id"] = project_ids[project_filter]
+    df_summary = df_summary[df_summary['project_id'] == params["project_id"]]
+if role_filter != "All Roles":
+    params["work_role"] = role_filter
+    df_summary = df_summary[df_summary['work_role'] == role_filter]
+
+# Sessions are fetched a page at a time; "Load more" appends the next page
+HISTORY_FIELDS = "sheet_date,project_name,work_role,clock_in_at,clock_out_at,minutes_worked,tasks_completed,status"
+PAGE_SIZE = 100
+
+# New sessions change the summary, which also starts the list over
+filter_key = (tuple(sorted(params.items())), str(summary))
+if st.session_state.get("history_filter") != filter_key:
+    first_page = authenticated_request(
+        "GET", "/time/history", params={**params, "fields": HISTORY_FIELDS, "limit": PAGE_SIZE}
+    ) or {}
+    st.session_state["history_filter"] = filter_key
+    st.session_state["history_items"] = first_page.get("items", [])
+    st.session_state["history_cursor"] = first_page.get("next_cursor")
+
+time_history = st.session_state["history_items"]
 
 if time_history:
     df = pd.DataFrame(time_history)
     
-    # Apply project filter
-    if project_filter != "All Projects" and 'project_name' in df.columns:
-        df = df[df['project_name'] == project_filter]
-    
-    # Apply role filter
-    if role_filter != "All Roles" and 'work_role' in df.columns:
-        df = df[df['work_role'] == role_filter]
-    
     if df.empty:
         st.info("📭 No records found for the selected filters.")
     else:
         # --- SUMMARY STATS ---
-        total_minutes = df['minutes_worked'].sum() if 'minutes_worked' in df.columns else 0
+        # From the summary, so they cover the whole range, not just the loaded pages
+        total_minutes = df_summary['minutes_worked'].sum()
         total_hours = total_minutes / 60
-        total_tasks = int(df['tasks_completed'].sum()) if 'tasks_completed' in df.columns else 0
-        unique_projects = df['project_name'].dropna().nunique() if 'project_name' in df.columns else 0
+        total_tasks = int(df_summary['tasks_completed'].sum())
+        unique_projects = df_summary['project_id'].nunique()
         
         col_s1, col_s2, col_s3 = st.columns(3)
         col_s1.metric("⏱️ Total Hours", f"{total_hours:.1f}h")
@@ -162,14 +176,25 @@ if time_history:
         df_display = df_display[final_cols]
         
         st.dataframe(df_display, use_container_width=True, hide_index=True)
+
+        if st.session_state["history_cursor"]:
+            if st.button("⬇️ Load more"):
+                next_page = authenticated_request(
+                    "GET", "/time/history",
+                    params={**params, "fields": HISTORY_FIELDS, "limit": PAGE_SIZE,
+                            "cursor": st.session_state["history_cursor"]},
+                ) or {}
+                st.session_state["history_items"] += next_page.get("items", [])
+                st.session_state["history_cursor"] = next_page.get("next_cursor")
+                st.rerun()
         
         st.markdown("---")
         
         # --- PROJECT BREAKDOWN ---
         st.subheader("🏢 Time by Project")
         
-        if 'project_name' in df.columns:
-            project_stats = df.groupby('project_name').agg({
+        if not df_summary.empty:
+            project_stats = df_summary.fillna({'project_name': "Unknown"}).groupby('project_name').agg({
                 'minutes_worked': 'sum',
                 'tasks_completed': 'sum'
             }).reset_index()
@@ -192,6 +217,7 @@ if time_history:
         st.markdown("---")
         
         # --- EXPORT ---
+        # The sessions loaded so far
         csv = df.to_csv(index=False)
         st.download_button("📥 Download CSV", csv, f"work_history_{date.today()}.csv", "text/csv")
 
@@ -146,14 +146,17 @@ with col2:
 # ---------------------------------------------------------
 # FETCH ATTENDANCE DATA
 # ---------------------------------------------------------
-sessions = authenticated_request(
+history_page = authenticated_request(
     "GET",
     "/time/history",
     params={
         "start_date": selected_date.isoformat(),
         "end_date": selected_date.isoformat(),
+        # One day of sessions always fits in a page
+        "limit": 500,
     }
-) or []
+) or {}
+sessions = history_page.get("items", [])
 
 sessions = [
     s for s in sessions
@@ -1,13 +1,14 @@
 import streamlit as st
 import requests
 import time
+from datetime import date, timedelta
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Approvals Inbox", layout="centered")
 API_BASE_URL = "http://127.0.0.1:8000"
 
 # --- HELPER FUNCTIONS ---
-def authenticated_request(method, endpoint, data=None):
+def authenticated_request(method, endpoint, data=None, params=None):
     token = st.session_state.get("token")
     if not token:
         st.warning("🔒 Please login first.")
@@ -15,7 +16,7 @@ def authenticated_request(method, endpoint, data=None):
 
     headers = {"Authorization": f"Bearer {token}"}
     try:
-        response = requests.request(method, f"{API_BASE_URL}{endpoint}", headers=headers, json=data)
+        response = requests.request(method, f"{API_BASE_URL}{endpoint}", headers=headers, json=data, params=params)
         # response = requests.request(method, f"{API_BASE_URL}{endpoint}", json=data)
         if response.status_code >= 400:
             st.error(f"Error {response.status_code}: {response.text}")
@@ -48,20 +49,93 @@ def submit_decision(history_id, action, notes=""):
         time.sleep(1)
         st.rerun()
 
+def submit_bulk_decision(action, notes="", history_ids=None, filters=None):
+    # One call for many sessions: either the ticked ids or everything matching the filters
+    payload = {
+        "status": "APPROVED" if action == "approve" else "REJECTED",
+        "approval_comment": notes,
+    }
+    if history_ids is not None:
+        payload["history_ids"] = history_ids
+    else:
+        payload.update(filters)
+
+    resp = authenticated_request("POST", "/time/history/bulk-approve", data=payload)
+    if resp:
+        skipped = len(resp["results"]) - resp["updated"] if history_ids is not None else 0
+        verb = "Approved" if action == "approve" else "Rejected"
+        st.toast(f"{verb} {resp['updated']} logs" + (f" ({skipped} already handled)" if skipped else ""))
+        time.sleep(1)
+        st.rerun()
+
 # --- TITLE ---
 st.title("Inbox: Pending Approvals")
 st.markdown("Verify and approve team timesheets.")
 st.markdown("---")
 
+# --- FILTERS ---
+PAGE_SIZE = 25
+
+projects = authenticated_request("GET", "/admin/projects/") or []
+project_options = {"All projects": None}
+project_options.update({p["name"]: p["id"] for p in projects})
+
+f1, f2 = st.columns(2)
+with f1:
+    project_label = st.selectbox("Project", list(project_options.keys()))
+with f2:
+    date_range = st.date_input(
+        "Sheet date range",
+        value=(date.today() - timedelta(days=30), date.today()),
+    )
+
+params = {"limit": PAGE_SIZE}
+if project_options[project_label]:
+    params["project_id"] = project_options[project_label]
+if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+    params["start_date"] = date_range[0].isoformat()
+    params["end_date"] = date_range[1].isoformat()
+
+# Cursors of the pages seen so far; a filter change starts over at page 1
+filter_key = tuple(sorted((k, v) for k, v in params.items() if k != "limit"))
+if st.session_state.get("approvals_filter") != filter_key:
+    st.session_state["approvals_filter"] = filter_key
+    st.session_state["approvals_cursors"] = [None]
+cursors = st.session_state["approvals_cursors"]
+if cursors[-1]:
+    params["cursor"] = cursors[-1]
+
 # --- FETCH DATA ---
-# We use the Dashboard API to get the list of pending items
-pending_items = authenticated_request("GET", "/admin/dashboard/pending-approvals")
+# We use the Dashboard API to get one page of pending items
+page = authenticated_request("GET", "/admin/dashboard/pending-approvals", params=params) or {}
+pending_items = page.get("items", [])
 
 if not pending_items:
     st.success("🎉 All caught up! No pending approvals.")
     st.balloons()
 else:
-    st.write(f"**{len(pending_items)} Pending Items**")
+    first = (len(cursors) - 1) * PAGE_SIZE + 1
+    st.write(f"**{page['total']} Pending Items** (showing {first}–{first + len(pending_items) - 1})")
+
+    # Everything the filters match, across all pages
+    with st.expander(f"Bulk: decide all {page['total']} matching items"):
+        bulk_filters = {k: v for k, v in params.items() if k in ("project_id", "start_date", "end_date")}
+        if not bulk_filters:
+            st.caption("Pick a project or date range first.")
+        else:
+            b1, b2 = st.columns(2)
+            if b1.button("✅ Approve all matching", use_container_width=True, type="primary"):
+                submit_bulk_decision("approve", "Approved via Inbox (bulk)", filters=bulk_filters)
+            if b2.button("❌ Reject all matching", use_container_width=True):
+                submit_bulk_decision("reject", "Rejected via Inbox (bulk)", filters=bulk_filters)
+
+    p_prev, p_next = st.columns(2)
+    if p_prev.button("← Previous", disabled=len(cursors) == 1, use_container_width=True):
+        cursors.pop()
+        st.rerun()
+    if p_next.button("Next →", disabled=not page.get("next_cursor"), use_container_width=True):
+        cursors.append(page["next_cursor"])
+        st.rerun()
     
     for item in pending_items:
         with st.container(border=True):
@@ -69,6 +143,7 @@ else:
             c_details, c_actions = st.columns([3, 1])
             
             with c_details:
+                st.checkbox("Select", key=f"sel_{item['history_id']}")
                 # Header: Name & Project
                 st.markdown(f"### 👤 {item['user_name']}")
                 st.caption(f"📂 **{item['project_name']}** | Role: `{item['work_role']}`")
@@ -97,3 +172,12 @@ else:
                     reason = st.text_input("Reason (Optional)", key=f"reason_{item['history_id']}")
                     if st.button("Confirm Reject", key=f"conf_rej_{item['history_id']}", type="primary"):
                         submit_decision(item['history_id'], "reject", reason)
+
+    # --- BULK ACTIONS ON THE TICKED ITEMS ---
+    selected = [item['history_id'] for item in pending_items if st.session_state.get(f"sel_{item['history_id']}")]
+    st.markdown("---")
+    s1, s2 = st.columns(2)
+    if s1.button(f"✅ Approve selected ({len(selected)})", disabled=not selected, use_container_width=True, type="primary"):
+        submit_bulk_decision("approve", "Approved via Inbox", history_ids=selected)
+    if s2.button(f"❌ Reject selected ({len(selected)})", disabled=not selected, use_container_width=True):
+        submit_bulk_decision("reject", "Rejected via Inbox", history_ids=selected)
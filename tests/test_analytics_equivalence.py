@@ -0,0 +1,271 @@
+import os
+import random
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="needs a Postgres DATABASE_URL")
+
+# Today, so a rerun takes the same-day overwrite path of the rating versions
+DAY = date.today()
+
+
+def reference_calculate_daily(db, project_id, calculation_date):
+    """
+    The row-by-row /analytics/calculate-daily from before the set-based
+    rewrite, kept as the oracle for its results. Users are looked up one at
+    a time, so it issues several statements per graded user.
+    """
+    from sqlalchemy import func
+    from app.models.history import TimeHistory
+    from app.models.project_daily_metrics import ProjectDailyMetrics
+    from app.models.project_members import ProjectMember
+    from app.models.user import User
+    from app.models.user_daily_metrics import UserDailyMetrics
+    from app.models.user_project_history import UserProjectHistory
+    from app.models.user_quality import QualityRating, UserQuality
+
+    daily_logs = db.query(
+        TimeHistory.user_id,
+        User.name.label("user_name"),
+        func.sum(TimeHistory.minutes_worked).label("total_mins"),
+        func.sum(TimeHistory.tasks_completed).label("total_tasks"),
+    ).join(User, TimeHistory.user_id == User.id).filter(
+        TimeHistory.project_id == project_id,
+        TimeHistory.sheet_date == calculation_date,
+        TimeHistory.status == "APPROVED",
+    ).group_by(TimeHistory.user_id, User.name).all()
+
+    if not daily_logs:
+        return {"status": "Skipped", "message": "No APPROVED work logs found.", "processed": 0}
+
+    total_project_tasks = sum(log.total_tasks for log in daily_logs)
+    total_project_hours = sum(float(log.total_mins or 0) for log in daily_logs) / 60
+    active_users = len(daily_logs)
+    avg_tasks = total_project_tasks / active_users
+    avg_hours = total_project_hours / active_users
+
+    p_metric = db.query(ProjectDailyMetrics).filter(
+        ProjectDailyMetrics.project_id == project_id,
+        ProjectDailyMetrics.metric_date == calculation_date,
+    ).first()
+    if not p_metric:
+        p_metric = ProjectDailyMetrics(project_id=project_id, metric_date=calculation_date)
+        db.add(p_metric)
+    p_metric.tasks_completed = total_project_tasks
+    p_metric.active_users_count = active_users
+    p_metric.total_hours_worked = total_project_hours
+    p_metric.avg_hours_worked_per_user = avg_hours
+
+    bad_threshold = avg_tasks * 0.70
+    total_score_sum = 0
+    results_summary = []
+
+    for log in daily_logs:
+        if log.total_tasks > avg_tasks:
+            score, rating_label = 10.0, QualityRating.GOOD
+        elif log.total_tasks < bad_threshold:
+            score, rating_label = 3.0, QualityRating.BAD
+        else:
+            score, rating_label = 7.0, QualityRating.AVERAGE
+        total_score_sum += score
+
+        u_metric = db.query(UserDailyMetrics).filter(
+            UserDailyMetrics.user_id == log.user_id,
+            UserDailyMetrics.metric_date == calculation_date,
+        ).first()
+        member = db.query(ProjectMember).filter(
+            ProjectMember.project_id == project_id,
+            ProjectMember.user_id == log.user_id,
+        ).first()
+        current_role = member.work_role if member else "UNKNOWN"
+        if not u_metric:
+            u_metric = UserDailyMetrics(
+                user_id=log.user_id, project_id=project_id,
+                metric_date=calculation_date, work_role=current_role,
+            )
+            db.add(u_metric)
+        u_metric.hours_worked = float(log.total_mins or 0) / 60
+        u_metric.tasks_completed = log.total_tasks
+        u_metric.productivity_score = score
+
+        current_quality = db.query(UserQuality).filter(
+            UserQuality.user_id == log.user_id,
+            UserQuality.project_id == project_id,
+            UserQuality.is_current == True,
+        ).first()
+        needs_new_version = True
+        if current_quality:
+            if current_quality.valid_from and current_quality.valid_from.date() == calculation_date:
+                current_quality.rating = rating_label
+                current_quality.quality_score = score
+                current_quality.assessed_at = func.now()
+                needs_new_version = False
+            else:
+                current_quality.is_current = False
+                current_quality.valid_to = func.now()
+        if needs_new_version:
+            db.add(UserQuality(
+                user_id=log.user_id, project_id=project_id, work_role=current_role,
+                rating=rating_label, quality_score=score, source="AUTO_CALC",
+                assessed_at=func.now(), is_current=True, valid_from=func.now(), valid_to=None,
+            ))
+
+        history = db.query(UserProjectHistory).filter(
+            UserProjectHistory.user_id == log.user_id,
+            UserProjectHistory.project_id == project_id,
+        ).first()
+        if not history:
+            history = UserProjectHistory(
+                user_id=log.user_id, project_id=project_id,
+                work_role=current_role, first_worked_date=calculation_date,
+            )
+            db.add(history)
+        history.last_worked_date = calculation_date
+
+        results_summary.append({
+            "user_name": log.user_name,
+            "tasks": log.total_tasks,
+            "score": score,
+            "rating": rating_label.value,
+        })
+
+    p_metric.avg_productivity_score = total_score_sum / active_users
+    db.commit()
+
+    return {
+        "status": "Success",
+        "project_avg_tasks": round(avg_tasks, 2),
+        "bad_threshold": round(bad_threshold, 2),
+        "processed_users": active_users,
+        "details": results_summary,
+    }
+
+
+@pytest.fixture
+def make_project():
+    """
+    Seeds a project whose `size` users each have two approved sessions on
+    DAY; four in five are members, one in three has an older rating. The
+    same `seed` gives the same numbers, with user names "user <i>".
+    """
+    import app.main  # noqa: F401  (maps every model the relationships refer to)
+    from sqlalchemy import delete
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.models.history import TimeHistory
+    from app.models.project import Project
+    from app.models.project_daily_metrics import ProjectDailyMetrics
+    from app.models.project_members import ProjectMember
+    from app.models.user import User, UserRole
+    from app.models.user_daily_metrics import UserDailyMetrics
+    from app.models.user_project_history import UserProjectHistory
+    from app.models.user_quality import QualityRating, UserQuality
+
+    Base.metadata.create_all(engine)
+    created = []
+
+    def make(size, seed=1):
+        rnd = random.Random(seed)
+        tag = uuid.uuid4().hex[:8]
+        project_id = uuid.uuid4()
+        user_ids = [uuid.uuid4() for _ in range(size)]
+        created.append((project_id, user_ids))
+        rated_at = datetime.now(timezone.utc) - timedelta(days=3)
+        with SessionLocal() as db:
+            db.add(Project(id=project_id, code=f"Q{tag}", name=f"Equivalence {tag}", start_date=DAY))
+            for i, user_id in enumerate(user_ids):
+                db.add(User(id=user_id, email=f"eq-{tag}-{i}@example.com", name=f"user {i}", role=UserRole.USER))
+            db.flush()
+            for i, user_id in enumerate(user_ids):
+                if i % 5:
+                    db.add(ProjectMember(project_id=project_id, user_id=user_id, work_role="ANNOTATION", assigned_from=DAY))
+                for _ in range(2):
+                    db.add(TimeHistory(
+                        user_id=user_id, project_id=project_id, work_role="ANNOTATION", sheet_date=DAY,
+                        status="APPROVED", minutes_worked=rnd.randint(30, 300), tasks_completed=rnd.randint(0, 40),
+                    ))
+                if i % 3 == 0:
+                    db.add(UserQuality(
+                        user_id=user_id, project_id=project_id, work_role="ANNOTATION",
+                        rating=QualityRating.AVERAGE, is_current=True, valid_from=rated_at,
+                    ))
+            db.commit()
+        return project_id
+
+    yield make
+
+    with SessionLocal() as db:
+        for project_id, user_ids in created:
+            for model in (UserDailyMetrics, ProjectDailyMetrics, UserQuality, UserProjectHistory, TimeHistory, ProjectMember):
+                db.execute(delete(model).where(model.project_id == project_id))
+            db.execute(delete(Project).where(Project.id == project_id))
+            db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
+
+
+def _tables(project_id):
+    """The project's graded rows, keyed by user name instead of id."""
+    from sqlalchemy import text
+    from app.db.session import engine
+
+    queries = {
+        "user_daily_metrics": """
+            select u.name, m.work_role, m.hours_worked, m.tasks_completed, m.productivity_score
+            from user_daily_metrics m join users u on u.id = m.user_id where m.project_id = :p""",
+        # Per-role rollup rows came later; the old code only wrote AGGREGATE
+        "project_daily_metrics": """
+            select work_role, tasks_completed, active_users_count, total_hours_worked,
+                   avg_productivity_score, avg_hours_worked_per_user
+            from project_daily_metrics where project_id = :p and work_role = 'AGGREGATE'""",
+        "user_quality": """
+            select u.name, q.work_role, q.rating::text, q.quality_score, q.is_current, q.valid_to is null, q.source
+            from user_quality q join users u on u.id = q.user_id where q.project_id = :p""",
+        "user_project_history": """
+            select u.name, h.work_role, h.first_worked_date, h.last_worked_date
+            from user_project_history h join users u on u.id = h.user_id where h.project_id = :p""",
+    }
+    with engine.connect() as conn:
+        return {name: sorted(conn.execute(text(sql), {"p": project_id}).all(), key=str) for name, sql in queries.items()}
+
+
+def _run(calculate, project_id, times=1):
+    """Runs calculate `times` times; returns the last response and the statement count."""
+    from sqlalchemy import event
+    from app.db.session import SessionLocal, engine
+
+    statements = []
+    count = lambda *args: statements.append(1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        with SessionLocal() as db:
+            for _ in range(times):
+                response = calculate(db, project_id, DAY)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    response["details"].sort(key=lambda detail: detail["user_name"])
+    return response, len(statements)
+
+
+@pytest.mark.parametrize("times", [1, 2], ids=["first-run", "same-day-rerun"])
+def test_matches_row_by_row_implementation(make_project, times):
+    from app.services.analytics_service import calculate_daily_productivity
+
+    reference_project, project = make_project(30), make_project(30)
+
+    expected, _ = _run(reference_calculate_daily, reference_project, times)
+    actual, _ = _run(calculate_daily_productivity, project, times)
+
+    assert actual == expected
+    assert _tables(project) == _tables(reference_project)
+
+
+def test_statement_count_does_not_grow_with_project_size(make_project):
+    from app.services.analytics_service import calculate_daily_productivity
+
+    counts = {size: _run(calculate_daily_productivity, make_project(size))[1] for size in (10, 100)}
+    reference = {size: _run(reference_calculate_daily, make_project(size))[1] for size in (10, 100)}
+
+    assert counts[10] == counts[100]
+    assert reference[100] > reference[10] > counts[10]
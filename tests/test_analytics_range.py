@@ -0,0 +1,150 @@
+import os
+import random
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="needs a Postgres DATABASE_URL")
+
+USERS = 40
+PROJECTS = 2
+DAYS = 5
+START = date(2026, 3, 2)
+
+
+@pytest.fixture
+def seeded():
+    import app.main  # noqa: F401  (maps every model the relationships refer to)
+    from sqlalchemy import delete
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.models.history import TimeHistory
+    from app.models.project import Project
+    from app.models.project_daily_metrics import ProjectDailyMetrics
+    from app.models.user import User, UserRole
+    from app.models.user_daily_metrics import UserDailyMetrics
+    from app.models.user_project_history import UserProjectHistory
+    from app.models.user_quality import UserQuality
+
+    Base.metadata.create_all(engine)
+    rnd = random.Random(7)
+    tag = uuid.uuid4().hex[:8]
+    project_ids = [uuid.uuid4() for _ in range(PROJECTS)]
+    user_ids = [uuid.uuid4() for _ in range(USERS)]
+
+    with SessionLocal() as db:
+        for i, project_id in enumerate(project_ids):
+            db.add(Project(id=project_id, code=f"T{tag}{i}", name=f"Range test {tag} {i}", start_date=START))
+        for i, user_id in enumerate(user_ids):
+            db.add(User(id=user_id, email=f"range-{tag}-{i}@example.com", name=f"range {tag} {i}", role=UserRole.USER))
+        db.flush()
+        for project_id in project_ids:
+            for user_id in user_ids:
+                for d in range(DAYS):
+                    db.add(TimeHistory(
+                        user_id=user_id,
+                        project_id=project_id,
+                        work_role="ANNOTATION",
+                        sheet_date=START + timedelta(days=d),
+                        status="APPROVED",
+                        minutes_worked=rnd.randint(60, 480),
+                        tasks_completed=rnd.randint(0, 40),
+                    ))
+        db.commit()
+
+    yield project_ids, user_ids
+
+    with SessionLocal() as db:
+        for model in (UserDailyMetrics, ProjectDailyMetrics, UserQuality, UserProjectHistory, TimeHistory):
+            db.execute(delete(model).where(model.project_id.in_(project_ids)))
+        db.execute(delete(Project).where(Project.id.in_(project_ids)))
+        db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
+
+
+def test_parallel_range_keeps_one_current_rating(seeded, monkeypatch):
+    from sqlalchemy import func, select
+    from app.db.session import SessionLocal
+    from app.models.user_project_history import UserProjectHistory
+    from app.models.user_quality import UserQuality
+    from app.services import analytics_service
+
+    project_ids, _ = seeded
+    monkeypatch.setattr(analytics_service, "ANALYTICS_MAX_WORKERS", 8)
+    end = START + timedelta(days=DAYS - 1)
+
+    for _ in range(2):
+        with SessionLocal() as db:
+            result = analytics_service.calculate_range(db, START, end, project_ids=project_ids)
+        assert result["failed"] == 0
+        assert result["succeeded"] == PROJECTS * DAYS
+
+    with SessionLocal() as db:
+        current = db.execute(
+            select(UserQuality.user_id, UserQuality.project_id, func.count())
+            .where(UserQuality.project_id.in_(project_ids), UserQuality.is_current == True)
+            .group_by(UserQuality.user_id, UserQuality.project_id)
+        ).all()
+        last_worked = db.scalars(
+            select(UserProjectHistory.last_worked_date).where(UserProjectHistory.project_id.in_(project_ids))
+        ).all()
+
+    assert len(current) == USERS * PROJECTS
+    assert max(count for _, _, count in current) == 1
+    assert set(last_worked) == {end}
+
+
+def test_recomputing_an_older_day_keeps_last_worked_date(seeded):
+    from sqlalchemy import select
+    from app.db.session import SessionLocal
+    from app.models.user_project_history import UserProjectHistory
+    from app.services import analytics_service
+
+    project_ids, _ = seeded
+    end = START + timedelta(days=DAYS - 1)
+
+    with SessionLocal() as db:
+        analytics_service.calculate_range(db, START, end, project_ids=project_ids)
+    with SessionLocal() as db:
+        analytics_service.recalculate_partition(db, project_ids[0], START)
+        last_worked = db.scalars(
+            select(UserProjectHistory.last_worked_date).where(UserProjectHistory.project_id.in_(project_ids))
+        ).all()
+
+    assert set(last_worked) == {end}
+
+
+def test_rejecting_a_day_reverts_the_rating_versions_it_opened(seeded):
+    from sqlalchemy import select, update
+    from app.db.session import SessionLocal
+    from app.models.history import TimeHistory
+    from app.models.user_quality import UserQuality
+    from app.services import analytics_service
+
+    project_ids, user_ids = seeded
+    project_id = project_ids[0]
+    days = [START + timedelta(days=d) for d in range(DAYS)]
+
+    with SessionLocal() as db:
+        analytics_service.calculate_range(db, days[0], days[-1], project_ids=[project_id])
+
+        # The last day of a chain, one in the middle and the first one
+        for user_id, day in zip(user_ids, (days[-1], days[2], days[0])):
+            db.execute(update(TimeHistory).where(
+                TimeHistory.project_id == project_id, TimeHistory.user_id == user_id, TimeHistory.sheet_date == day,
+            ).values(status="REJECTED"))
+            db.commit()
+            analytics_service.recalculate_partition(db, project_id, day)
+
+            chain = db.execute(
+                select(UserQuality.metric_date, UserQuality.valid_from, UserQuality.valid_to, UserQuality.is_current)
+                .where(UserQuality.project_id == project_id, UserQuality.user_id == user_id)
+                .order_by(UserQuality.valid_from)
+            ).all()
+            assert day not in [row.metric_date for row in chain]
+            assert [row.valid_to for row in chain[:-1]] == [row.valid_from for row in chain[1:]]
+            assert [row.is_current for row in chain] == [False] * (len(chain) - 1) + [True]
+            assert chain[-1].valid_to is None
+            if day == days[-1]:
+                assert chain[-1].metric_date == days[-2]
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+import uuid
+
+import pytest
+from pydantic import BaseModel
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="needs a Postgres DATABASE_URL")
+
+
+class WaitParams(BaseModel):
+    token: str
+
+
+@pytest.fixture
+def runner():
+    """
+    A JobRunner of its own with one job kind, "test.wait", whose jobs run
+    until the test sets runner.release.
+    """
+    import app.main  # noqa: F401  (maps every model the relationships refer to)
+    from sqlalchemy import delete
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.models.job import Job
+    from app.services.job_runner import JobRunner
+
+    Base.metadata.create_all(engine)
+    runner = JobRunner(max_workers=2)
+    runner.kind = f"test.wait.{uuid.uuid4().hex[:8]}"
+    runner.release = threading.Event()
+
+    @runner.register(runner.kind, WaitParams)
+    def wait(db, params, progress):
+        runner.release.wait(10)
+        return {"token": params.token}
+
+    yield runner
+
+    runner.release.set()
+    runner.shutdown()
+    with SessionLocal() as db:
+        db.execute(delete(Job).where(Job.kind == runner.kind))
+        db.commit()
+
+
+def _job(job_id):
+    from app.db.session import SessionLocal
+    from app.models.job import Job
+
+    with SessionLocal() as db:
+        return db.get(Job, job_id)
+
+
+def _wait_for(job_id, status, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = _job(job_id)
+        if job.status.value == status:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} is {job.status.value}, expected {status}")
+
+
+def _orphan(job_id):
+    """Makes the job look RUNNING in a process that died an hour ago."""
+    from sqlalchemy import func, text, update
+    from app.db.session import SessionLocal
+    from app.models.job import Job, JobStatus
+
+    an_hour_ago = func.now() - text("interval '1 hour'")
+    with SessionLocal() as db:
+        db.execute(update(Job).where(Job.id == job_id).values(
+            status=JobStatus.RUNNING, started_at=an_hour_ago, heartbeat_at=an_hour_ago,
+        ))
+        db.commit()
+
+
+def test_sweep_fails_an_orphaned_job_so_it_stops_blocking_new_ones(runner, monkeypatch):
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        monkeypatch.setattr(runner, "_submit", lambda job_id: None)
+        orphan, created = runner.enqueue(db, runner.kind, {"token": "a"})
+        _orphan(orphan.id)
+        twin, twin_created = runner.enqueue(db, runner.kind, {"token": "a"})
+        assert created and not twin_created and twin.id == orphan.id
+
+        runner.sweep()
+        failed = _job(orphan.id)
+        assert failed.status.value == "FAILED"
+        assert failed.error.startswith("Interrupted")
+
+        retry, retry_created = runner.enqueue(db, runner.kind, {"token": "a"})
+        assert retry_created and retry.id != orphan.id
+
+
+def test_sweep_heartbeats_jobs_running_in_this_process(runner):
+    from sqlalchemy import func, text, update
+    from app.db.session import SessionLocal
+    from app.models.job import Job
+
+    with SessionLocal() as db:
+        job, _ = runner.enqueue(db, runner.kind, {"token": "b"})
+    _wait_for(job.id, "RUNNING")
+
+    # Heartbeat lost long ago as far as the table knows, but the job is alive here
+    with SessionLocal() as db:
+        db.execute(update(Job).where(Job.id == job.id).values(heartbeat_at=func.now() - text("interval '1 hour'")))
+        db.commit()
+    runner.sweep()
+    assert _job(job.id).status.value == "RUNNING"
+
+    runner.release.set()
+    assert _wait_for(job.id, "SUCCEEDED").result == {"token": "b"}
+
+
+def test_sweep_picks_up_pending_jobs_nobody_ran(runner, monkeypatch):
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        with monkeypatch.context() as patched:
+            # Queued by a process that died before running it
+            patched.setattr(runner, "_submit", lambda job_id: None)
+            job, _ = runner.enqueue(db, runner.kind, {"token": "c"})
+
+    runner.release.set()
+    runner.sweep(pending_older_than=0)
+    assert _wait_for(job.id, "SUCCEEDED").result == {"token": "c"}
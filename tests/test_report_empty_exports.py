@@ -0,0 +1,81 @@
+import os
+import uuid
+from datetime import date
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="needs a Postgres DATABASE_URL")
+
+
+@pytest.fixture
+def empty_project():
+    import app.main  # noqa: F401  (maps every model the relationships refer to)
+    from sqlalchemy import delete
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.models.project import Project
+
+    Base.metadata.create_all(engine)
+    project_id = uuid.uuid4()
+    with SessionLocal() as db:
+        db.add(Project(id=project_id, code=f"E{project_id.hex[:8]}", name="Empty export test", start_date=date(2026, 1, 1)))
+        db.commit()
+
+    yield project_id
+
+    with SessionLocal() as db:
+        db.execute(delete(Project).where(Project.id == project_id))
+        db.commit()
+
+
+@pytest.fixture
+def idle_user():
+    import app.main  # noqa: F401  (maps every model the relationships refer to)
+    from sqlalchemy import delete
+    from app.db.session import SessionLocal
+    from app.models.user import User, UserRole
+
+    user_id = uuid.uuid4()
+    with SessionLocal() as db:
+        db.add(User(id=user_id, email=f"idle-{user_id.hex[:8]}@example.com", name="Idle export test", role=UserRole.USER))
+        db.commit()
+
+    yield user_id
+
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+
+
+def _csv(report) -> str:
+    from app.services.report_service import iter_csv
+
+    return "".join(iter_csv(report))
+
+
+def test_empty_exports_keep_their_original_bodies(empty_project):
+    from app.db.session import SessionLocal
+    from app.services import report_service
+
+    with SessionLocal() as db:
+        history = report_service.build_project_history_csv(db, empty_project)
+        daily = report_service.build_project_daily_csv(db, empty_project, date(2026, 1, 2))
+
+        assert _csv(history) == "No data available"
+        assert history.filename is None
+        assert _csv(daily) == "Message\nNo data found for this date\n"
+
+
+def test_empty_roster_and_user_report_send_a_bare_newline(empty_project, idle_user):
+    from app.db.session import SessionLocal
+    from app.schemas.report import ReportFormat
+    from app.services import report_service
+
+    with SessionLocal() as db:
+        roster = report_service.build_role_drilldown_csv(db, empty_project, date(2026, 1, 2))
+        performance = report_service.build_user_performance_csv(db, idle_user, date(2026, 1, 1), date(2026, 1, 31))
+
+        assert _csv(roster) == "\n"
+        assert _csv(performance) == "\n"
+        # The columnar formats still describe the columns
+        assert b"".join(report_service.iter_columnar(roster, ReportFormat.PARQUET)).startswith(b"PAR1")
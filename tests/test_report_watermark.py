@@ -0,0 +1,102 @@
+import os
+import uuid
+from datetime import date
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="needs a Postgres DATABASE_URL")
+
+DAY = date(2026, 2, 2)
+
+
+@pytest.fixture
+def scored_project():
+    """A project with one user's metrics on DAY."""
+    import app.main  # noqa: F401  (maps every model the relationships refer to)
+    from sqlalchemy import delete
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.models.project import Project
+    from app.models.user import User, UserRole
+    from app.models.user_daily_metrics import UserDailyMetrics
+    from app.models.user_quality import UserQuality
+
+    Base.metadata.create_all(engine)
+    project_id, user_id = uuid.uuid4(), uuid.uuid4()
+    with SessionLocal() as db:
+        db.add(Project(id=project_id, code=f"W{project_id.hex[:8]}", name="Watermark test", start_date=DAY))
+        db.add(User(id=user_id, email=f"watermark-{user_id.hex[:8]}@example.com", name="before", role=UserRole.USER))
+        db.flush()
+        db.add(UserDailyMetrics(
+            user_id=user_id, project_id=project_id, metric_date=DAY, work_role="ANNOTATION",
+            hours_worked=2, tasks_completed=10, productivity_score=7,
+        ))
+        db.commit()
+
+    yield project_id, user_id
+
+    with SessionLocal() as db:
+        for model in (UserDailyMetrics, UserQuality):
+            db.execute(delete(model).where(model.project_id == project_id))
+        db.execute(delete(Project).where(Project.id == project_id))
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+
+
+def _watermark(project_id):
+    from app.db.session import SessionLocal
+    from app.services.report_service import metrics_watermark
+
+    with SessionLocal() as db:
+        return metrics_watermark(db, project_id, DAY, DAY)
+
+
+def test_watermark_moves_with_users_and_ratings(scored_project):
+    from sqlalchemy import delete, update
+    from app.db.session import SessionLocal
+    from app.models.user import User
+    from app.models.user_quality import QualityRating, UserQuality
+
+    project_id, user_id = scored_project
+    seen = [_watermark(project_id)]
+
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id == user_id).values(name="after"))
+        db.commit()
+    seen.append(_watermark(project_id))
+
+    with SessionLocal() as db:
+        db.add(UserQuality(user_id=user_id, project_id=project_id, work_role="ANNOTATION", rating=QualityRating.GOOD))
+        db.commit()
+    seen.append(_watermark(project_id))
+
+    with SessionLocal() as db:
+        db.execute(delete(UserQuality).where(UserQuality.project_id == project_id))
+        db.commit()
+    seen.append(_watermark(project_id))
+
+    renamed, rated, unrated = seen[1:]
+    assert seen[0] != renamed != rated != unrated
+    # Back to the same rows as after the rename, so the same watermark
+    assert unrated == renamed
+
+
+def test_report_reads_the_snapshot_of_its_watermark(scored_project):
+    from sqlalchemy import update
+    from app.db.session import SessionLocal
+    from app.models.user_daily_metrics import UserDailyMetrics
+    from app.services import report_service
+
+    project_id, _ = scored_project
+    with SessionLocal() as db:
+        watermark = report_service.metrics_watermark(db, project_id, DAY, DAY)
+
+        # Written by another request between the watermark and the body
+        with SessionLocal() as other:
+            other.execute(update(UserDailyMetrics).where(UserDailyMetrics.project_id == project_id).values(tasks_completed=99))
+            other.commit()
+
+        body = "".join(report_service.iter_csv(report_service.build_project_daily_csv(db, project_id, DAY)))
+
+    assert ",10," in body and ",99," not in body
+    assert _watermark(project_id) != watermark
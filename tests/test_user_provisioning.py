@@ -0,0 +1,87 @@
+import asyncio
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="needs a Postgres DATABASE_URL")
+
+LOGINS = 16
+
+
+@pytest.fixture
+def first_login(monkeypatch):
+    """
+    A Supabase identity with no users row yet, and get_current_user wired
+    to it with the user cache disabled, so every call reaches the database.
+    """
+    import app.main  # noqa: F401  (maps every model the relationships refer to)
+    from sqlalchemy import delete
+    from app.core import dependencies
+    from app.core.cache import TTLCache
+    from app.core.supabase_auth import TokenUser
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.models.user import User
+
+    Base.metadata.create_all(engine)
+    email = f"first-login-{uuid.uuid4().hex[:8]}@example.com"
+    token_user = TokenUser({"sub": str(uuid.uuid4()), "email": email, "user_metadata": {}})
+    monkeypatch.setattr(dependencies, "get_user_from_token", lambda token: token_user)
+    monkeypatch.setattr(dependencies, "verify_token_locally", lambda token: token_user)
+    monkeypatch.setattr(dependencies, "user_cache", TTLCache(maxsize=LOGINS, ttl=0))
+
+    yield email
+
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.email == email))
+        db.commit()
+
+
+def _users_with_email(email):
+    from sqlalchemy import func, select
+    from app.db.session import SessionLocal
+    from app.models.user import User
+
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(User).where(User.email == email))
+
+
+def test_parallel_first_logins_provision_one_user(first_login):
+    from app.core.dependencies import get_current_user
+    from app.db.session import SessionLocal
+
+    start = threading.Barrier(LOGINS)
+
+    def login(_):
+        with SessionLocal() as db:
+            start.wait()
+            return get_current_user(authorization="Bearer token", db=db).id
+
+    with ThreadPoolExecutor(max_workers=LOGINS) as pool:
+        ids = list(pool.map(login, range(LOGINS)))
+
+    assert len(set(ids)) == 1
+    assert _users_with_email(first_login) == 1
+
+
+def test_parallel_async_first_logins_provision_one_user(first_login):
+    from app.core.dependencies import get_current_user_async
+    from app.db.session import AsyncSessionLocal, async_engine
+
+    async def login():
+        async with AsyncSessionLocal() as db:
+            return (await get_current_user_async(authorization="Bearer token", db=db)).id
+
+    async def logins():
+        return await asyncio.gather(*(login() for _ in range(LOGINS)))
+
+    # Pooled asyncpg connections belong to the loop that opened them
+    async_engine.sync_engine.dispose(close=False)
+    ids = asyncio.run(logins())
+    async_engine.sync_engine.dispose(close=False)
+
+    assert len(set(ids)) == 1
+    assert _users_with_email(first_login) == 1